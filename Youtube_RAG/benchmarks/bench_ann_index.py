@@ -0,0 +1,67 @@
+"""
+Recall and latency of the library IVF index against a brute-force cosine scan.
+
+Uses synthetic clustered vectors (videos drift around a topic), so no database
+or embedding service is needed. Run from the Youtube_RAG directory:
+    python -m benchmarks.bench_ann_index
+"""
+import time
+import numpy as np
+from utils.ann_index import IVFIndex, top_k_indices
+from utils.vector_codec import normalize_rows
+
+
+def _synthetic_library(num_videos: int, chunks_per_video: int, dim: int, topics: int, rng):
+    topic_centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    videos = {}
+    for v in range(num_videos):
+        centre = topic_centres[rng.integers(topics)] + 0.5 * rng.standard_normal(dim).astype(np.float32)
+        videos[f"video{v:05d}"] = centre + 2.0 * rng.standard_normal((chunks_per_video, dim)).astype(np.float32)
+    queries = topic_centres[rng.integers(topics, size=200)] + 2.0 * rng.standard_normal((200, dim)).astype(np.float32)
+    return videos, queries
+
+
+def main(num_videos: int = 2000, chunks_per_video: int = 50, dim: int = 256, top_k: int = 10):
+    rng = np.random.default_rng(0)
+    videos, queries = _synthetic_library(num_videos, chunks_per_video, dim, topics=100, rng=rng)
+
+    start = time.perf_counter()
+    index = IVFIndex()
+    for video_id, vectors in videos.items():
+        index.add(video_id, vectors)
+    build_time = time.perf_counter() - start
+
+    keys = [(video_id, i) for video_id, vectors in videos.items() for i in range(len(vectors))]
+    matrix = normalize_rows(np.concatenate(list(videos.values()))).astype(np.float32)
+    queries = normalize_rows(queries).astype(np.float32)
+
+    start = time.perf_counter()
+    truth = [{keys[i] for i in top_k_indices(matrix @ q, top_k)} for q in queries]
+    brute_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    stats = index.stats()
+    print(f"vectors:      {stats['vectors']} x {dim} from {num_videos} videos")
+    print(f"lists:        {stats['lists']} (largest {stats['largest_list']}), built in {build_time:.1f}s incrementally")
+    print(f"brute force:  {brute_ms:.2f} ms/query")
+
+    for nprobe in (1, 4, 8, 16, 32):
+        start = time.perf_counter()
+        results = [index.search(q, top_k=top_k, nprobe=nprobe) for q in queries]
+        ann_ms = (time.perf_counter() - start) / len(queries) * 1000
+        recall = np.mean([
+            len(expected & {(video_id, chunk_id) for video_id, chunk_id, _ in hits}) / top_k
+            for expected, hits in zip(truth, results)
+        ])
+        print(f"nprobe {nprobe:>2}:    {ann_ms:.2f} ms/query, recall@{top_k} {recall:.3f}, "
+              f"{brute_ms / ann_ms:.1f}x faster")
+
+    video_filter = list(videos)[:20]
+    start = time.perf_counter()
+    filtered = [index.search(q, top_k=top_k, video_ids=video_filter) for q in queries]
+    filtered_ms = (time.perf_counter() - start) / len(queries) * 1000
+    assert all(video_id in video_filter for hits in filtered for video_id, _, _ in hits)
+    print(f"filtered to {len(video_filter)} videos: {filtered_ms:.2f} ms/query (exact)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+semantic_chunking vs token_chunking on synthetic multi-hour transcripts.
+
+Speech runs at ~150 words per minute, so one hour is ~9,000 words. Run from
+the Youtube_RAG directory:
+    python -m benchmarks.bench_chunking
+"""
+import random
+import re
+import time
+from utils.chunking import semantic_chunking, token_chunking
+from utils.embedding_scheduler import estimate_tokens
+
+WORDS_PER_HOUR = 150 * 60
+VOCABULARY = (
+    "the a and of to in that it is was for on with as you this we they be at have not "
+    "procrastination monkey panic monster deadline instant gratification brain rational "
+    "decision maker long term goals habit mindfulness therapy research study people"
+).split()
+
+
+def _transcript(hours: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    words = 0
+    while words < hours * WORDS_PER_HOUR:
+        length = rng.randint(4, 35)
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize() + rng.choice(".?!."))
+        words += length
+    return " ".join(sentences)
+
+
+def _split_words(chunks, transcript_words) -> int:
+    """Chunks whose first or last word is a fragment of a transcript word."""
+    return sum(
+        1 for chunk in chunks
+        if chunk.split()[0].strip(".?!") not in transcript_words
+        or chunk.split()[-1].strip(".?!") not in transcript_words
+    )
+
+
+def _report(name, seconds, chunks):
+    tokens = [estimate_tokens(chunk) for chunk in chunks]
+    print(f"  {name:<17} {seconds * 1000:8.1f} ms  {len(chunks):6d} chunks  "
+          f"avg {sum(tokens) / len(tokens):5.1f} / max {max(tokens):4d} tokens  "
+          f"{sum(tokens):8d} tokens to embed")
+
+
+def main(hours=(1, 3, 10)):
+    vocabulary = {word.lower() for word in VOCABULARY}
+
+    for h in hours:
+        transcript = _transcript(h)
+        transcript_words = vocabulary | {w.capitalize() for w in vocabulary}
+        print(f"{h}h transcript: {len(transcript):,} characters, ~{estimate_tokens(transcript):,} tokens")
+
+        start = time.perf_counter()
+        old = semantic_chunking(transcript)
+        _report("semantic_chunking", time.perf_counter() - start, old)
+
+        start = time.perf_counter()
+        new = token_chunking(transcript)
+        _report("token_chunking", time.perf_counter() - start, [chunk.text for chunk in new])
+
+        assert all(transcript[c.start:c.end] == c.text for c in new), "offsets out of sync"
+        print(f"  chunks cutting a word: semantic {_split_words(old, transcript_words)}, "
+              f"token {_split_words([c.text for c in new], transcript_words)}")
+
+        # No punctuation at all, as some ASR output looks
+        flat = re.sub(r"[.?!]", "", transcript)
+        start = time.perf_counter()
+        old = semantic_chunking(flat)
+        old_time = time.perf_counter() - start
+        start = time.perf_counter()
+        new = token_chunking(flat)
+        new_time = time.perf_counter() - start
+        print(f"  unpunctuated: semantic {old_time * 1000:.1f} ms ({len(old)} chunks), "
+              f"token {new_time * 1000:.1f} ms ({len(new)} chunks)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+End-to-end timings for ingestion and answering, written as JSON for regression checks.
+
+Runs against local stand-ins for Azure embeddings, Whisper and Gemini (with
+configurable latency), a synthetic audio file instead of a YouTube download
+and a throwaway database, so no network access or API keys are needed.
+
+Measures:
+  - each graph node (decision_maker, update_state_only, handle_rag_search,
+    process_new_video_and_update_state) called with a realistic state; new
+    videos are ingested both from audio and from a caption fixture
+  - selecting and parsing each caption fixture (benchmarks/captions), after
+    checking the fixtures parse as expected (see check_captions)
+  - chunking, storing, loading (cold and cached) and searching transcripts
+    of 5 minutes to 5 hours
+
+Ingestion is timed on the inline, non-streaming path (streaming ingestion
+needs ffmpeg to cut segments). Run from the Youtube_RAG directory:
+    python -m benchmarks.bench_e2e [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from typing import Callable, Dict, List
+from benchmarks.fixtures import (
+    CAPTION_FIXTURES, CAPTIONS_DIR, fake_services, fake_youtube_audio, fake_youtube_captions, load_caption_fixture,
+    temp_database
+)
+
+TRANSCRIPT_MINUTES = (5, 15, 60, 180, 300)
+WORDS_PER_MINUTE = 150
+EMBEDDING_DIM = 256
+VIDEO_ID = "benchVideo0"
+REGRESSION_THRESHOLD = 0.2
+# Sub-millisecond timings swing by more than the threshold from run to run
+MIN_REGRESSION_MS = 1.0
+
+
+def _stats(samples_ms: List[float]) -> Dict:
+    ordered = sorted(samples_ms)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "min_ms": round(ordered[0], 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def _time_ms(function: Callable, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    # Nodes log every step; keep the report readable
+    with redirect_stdout(StringIO()):
+        function(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def _synthetic_transcript(minutes: int) -> str:
+    from benchmarks.fake_services import _WORDS
+
+    words = [_WORDS[i % len(_WORDS)] for i in range(minutes * WORDS_PER_MINUTE)]
+    sentences = (" ".join(words[i:i + 14]).capitalize() + "." for i in range(0, len(words), 14))
+    return " ".join(sentences)
+
+
+def bench_nodes(runs: int, audio_seconds: float) -> Dict:
+    """Time each graph node with the fake services answering."""
+    from langchain_core.messages import HumanMessage, ToolMessage
+    from config import settings
+    from nodes.agent import decision_maker
+    from nodes.existing_video_porcessor import update_state_only
+    from nodes.new_video_processor import process_new_video_and_update_state
+    from nodes.rag_search import handle_rag_search
+    from utils.index_cache import video_index_cache
+
+    settings.INGESTION_QUEUE = False
+    settings.STREAMING_INGESTION = False
+    settings.CAPTIONS_FIRST = False
+    settings.GOOGLE_API_KEY = os.environ["GOOGLE_API_KEY"]
+
+    def tool_message(name: str, payload: Dict) -> ToolMessage:
+        return ToolMessage(content=json.dumps(payload), name=name, tool_call_id="bench")
+
+    timings = {name: [] for name in (
+        "process_new_video_and_update_state", "process_new_video_and_update_state[captions]",
+        "update_state_only", "handle_rag_search", "decision_maker"
+    )}
+    with fake_youtube_audio(audio_seconds):
+        for run in range(runs):
+            video_id = f"benchNew{run:03d}"
+            timings["process_new_video_and_update_state"].append(_time_ms(process_new_video_and_update_state, {
+                "messages": [tool_message("youtube_video_data_checker", {"status": "not_found", "video_id": video_id})]
+            }))
+
+    settings.CAPTIONS_FIRST = True
+    with fake_youtube_captions("auto"):
+        for run in range(runs):
+            video_id = f"benchCap{run:03d}"
+            timings["process_new_video_and_update_state[captions]"].append(_time_ms(
+                process_new_video_and_update_state,
+                {"messages": [tool_message("youtube_video_data_checker", {"status": "not_found", "video_id": video_id})]}
+            ))
+
+    for run in range(runs):
+        video_index_cache.invalidate(VIDEO_ID)
+        timings["update_state_only"].append(_time_ms(update_state_only, {
+            "messages": [tool_message("youtube_video_data_checker", {"status": "found", "video_id": VIDEO_ID})]
+        }))
+
+    for run in range(runs):
+        # A new query each run, so every search includes its embedding request
+        timings["handle_rag_search"].append(_time_ms(handle_rag_search, {
+            "messages": [tool_message("perform_rag_search", {"query": f"what happens to deadline {run} in the talk"})],
+            "youtube_video_id": VIDEO_ID,
+        }))
+
+    for run in range(runs):
+        timings["decision_maker"].append(_time_ms(decision_maker, {
+            "messages": [HumanMessage(content=f"why does the present moment win in example {run}?")],
+            "youtube_video_id": VIDEO_ID,
+            "ingestion_status": "complete",
+        }))
+
+    return {name: _stats(samples) for name, samples in timings.items()}
+
+
+def bench_transcripts(runs: int) -> Dict:
+    """Time chunking, storing, loading and searching transcripts of increasing length."""
+    import numpy as np
+    from benchmarks.fake_services import fake_embedding
+    from utils.chunking import token_chunking
+    from utils.db_handler import store_video_data, load_video_index
+    from utils.index_cache import video_index_cache
+    from utils.rag_search import search_video_index, lexical_search
+
+    results = {}
+    query = "why does the present moment usually win"
+    for minutes in TRANSCRIPT_MINUTES:
+        transcript = _synthetic_transcript(minutes)
+        video_id = f"bench{minutes:04d}min"
+
+        chunk_ms = [_time_ms(token_chunking, transcript) for _ in range(runs)]
+        chunks = [chunk.text for chunk in token_chunking(transcript)]
+        vectors = np.asarray([fake_embedding(chunk, EMBEDDING_DIM) for chunk in chunks], dtype=np.float32)
+
+        store_ms = [_time_ms(store_video_data, video_id, transcript, vectors, chunks=chunks) for _ in range(runs)]
+
+        load_cold_ms = []
+        for _ in range(runs):
+            video_index_cache.invalidate(video_id)
+            load_cold_ms.append(_time_ms(load_video_index, video_id))
+        load_cached_ms = [_time_ms(load_video_index, video_id) for _ in range(runs)]
+
+        index = load_video_index(video_id)
+        # First search embeds the query; the timed ones hit the query cache
+        search_video_index(query, index)
+        search_ms = [_time_ms(search_video_index, query, index) for _ in range(runs)]
+        lexical_ms = [_time_ms(lexical_search, "deadline", video_id) for _ in range(runs)]
+
+        results[f"{minutes}min"] = {
+            "minutes": minutes,
+            "words": minutes * WORDS_PER_MINUTE,
+            "chunks": len(chunks),
+            "chunking": _stats(chunk_ms),
+            "db_store": _stats(store_ms),
+            "db_load_cold": _stats(load_cold_ms),
+            "db_load_cached": _stats(load_cached_ms),
+            "search": _stats(search_ms),
+            "lexical_search": _stats(lexical_ms),
+        }
+    return results
+
+
+def _caption_words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def check_captions() -> None:
+    """
+    Check caption handling against the fixtures; raises AssertionError on a mismatch.
+
+    - music (only a "[Music]" track) and translated (only machine-translated
+      tracks) have no usable captions, so ingestion falls back to Whisper
+    - the auto track's rolling VTT cues de-duplicate to the manual track's words
+    - the auto track parses to the same text from json3 as from VTT
+    """
+    from config import settings
+    from services.transcripts import fetch_transcript
+    from utils.captions import parse_json3, parse_vtt
+
+    settings.CAPTIONS_FIRST = True
+    for name in ("music", "translated"):
+        assert load_caption_fixture(name) is None, f"{name} fixture: expected no usable caption track"
+        with fake_youtube_captions(name), fake_youtube_audio(30), redirect_stdout(StringIO()):
+            source = fetch_transcript(f"https://www.youtube.com/watch?v={VIDEO_ID}").source
+        assert source == "whisper", f"{name} fixture: transcript came from {source}, not whisper"
+
+    auto, manual = load_caption_fixture("auto"), load_caption_fixture("manual")
+    assert _caption_words(auto["text"]) == _caption_words(manual["text"]), \
+        "auto fixture: de-duplicated VTT words differ from the manual track"
+
+    with open(os.path.join(CAPTIONS_DIR, "auto.en.vtt"), encoding="utf-8") as f:
+        vtt = " ".join(segment["text"] for segment in parse_vtt(f.read()))
+    with open(os.path.join(CAPTIONS_DIR, "auto.en.json3"), encoding="utf-8") as f:
+        json3 = " ".join(segment["text"] for segment in parse_json3(f.read()))
+    assert vtt == json3, "auto fixture: json3 and VTT parse to different text"
+
+
+def bench_captions(runs: int) -> Dict:
+    """Check, then select and parse each caption fixture; fixtures without a usable track fall back to audio."""
+    check_captions()
+    results = {}
+    for name in CAPTION_FIXTURES:
+        captions = load_caption_fixture(name)
+        results[name] = {
+            "source": captions["source"] if captions else "whisper",
+            "segments": len(captions["segments"]) if captions else 0,
+            "words": len(captions["text"].split()) if captions else 0,
+            "parse": _stats([_time_ms(load_caption_fixture, name) for _ in range(runs)]),
+        }
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _flatten(results: Dict) -> Dict[str, float]:
+    """Median timings keyed like 'nodes.decision_maker' or 'transcripts.60min.search'."""
+    flat = {}
+    for name, stats in results["nodes"].items():
+        flat[f"nodes.{name}"] = stats["median_ms"]
+    for size, entry in results["transcripts"].items():
+        for metric, stats in entry.items():
+            if isinstance(stats, dict):
+                flat[f"transcripts.{size}.{metric}"] = stats["median_ms"]
+    for name, entry in results.get("captions", {}).items():
+        flat[f"captions.{name}.parse"] = entry["parse"]["median_ms"]
+    return flat
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Print median changes against a baseline run and return the metrics that got slower than threshold."""
+    current, previous = _flatten(results), _flatten(baseline)
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for key in sorted(current.keys() & previous.keys()):
+        before, after = previous[key], current[key]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold and after - before >= MIN_REGRESSION_MS:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"  {key:<45} {before:>10.1f} -> {after:>10.1f} ms ({change:+.0%}){flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark with local stand-ins for external services.")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/e2e_<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file; exits 1 if a median got slower than the threshold")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--audio-seconds", type=float, default=300, help="Length of the synthetic video audio")
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--whisper-latency", type=float, default=0.5)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    with fake_services(args.embedding_latency, args.whisper_latency, args.llm_latency, EMBEDDING_DIM) as servers, \
+            temp_database():
+        transcripts = bench_transcripts(args.runs)
+        captions = bench_captions(args.runs)
+        # The node benchmarks search the 60-minute video
+        from utils.db_handler import store_video_data, load_video_index
+        index = load_video_index("bench0060min")
+        with redirect_stdout(StringIO()):
+            store_video_data(VIDEO_ID, index.transcript, index.matrix, chunks=index.chunks)
+        nodes = bench_nodes(args.runs, args.audio_seconds)
+        requests = {name: server.requests for name, server in servers.items()}
+
+    results = {
+        "meta": {
+            "timestamp": started.isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "audio_seconds": args.audio_seconds,
+            "latency_seconds": {
+                "embeddings": args.embedding_latency, "whisper": args.whisper_latency, "llm": args.llm_latency
+            },
+            "fake_service_requests": requests,
+        },
+        "nodes": nodes,
+        "transcripts": transcripts,
+        "captions": captions,
+    }
+
+    print(f"{'node':<46} {'median ms':>10} {'p95 ms':>10}")
+    for name, stats in nodes.items():
+        print(f"{name:<46} {stats['median_ms']:>10.1f} {stats['p95_ms']:>10.1f}")
+    print(f"\n{'transcript':>10} {'chunks':>7} {'chunk ms':>9} {'store ms':>9} {'load ms':>8} {'cached':>7} "
+          f"{'search ms':>10} {'lexical':>8}")
+    for size, entry in transcripts.items():
+        print(f"{size:>10} {entry['chunks']:>7} {entry['chunking']['median_ms']:>9.1f} "
+              f"{entry['db_store']['median_ms']:>9.1f} {entry['db_load_cold']['median_ms']:>8.1f} "
+              f"{entry['db_load_cached']['median_ms']:>7.2f} {entry['search']['median_ms']:>10.2f} "
+              f"{entry['lexical_search']['median_ms']:>8.2f}")
+
+    print(f"\n{'captions':>10} {'source':>16} {'segments':>9} {'words':>6} {'parse ms':>9}")
+    for name, entry in captions.items():
+        print(f"{name:>10} {entry['source']:>16} {entry['segments']:>9} {entry['words']:>6} "
+              f"{entry['parse']['median_ms']:>9.2f}")
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"e2e_{started.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"FAIL: {len(regressions)} metric(s) slower than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Sequential vs concurrent create_embeddings against a local fake embedding server.
+
+Run from the Youtube_RAG directory:
+    python -m benchmarks.bench_embeddings
+"""
+import os
+import time
+import numpy as np
+from benchmarks.fake_services import FakeEmbeddingServer, fake_embedding
+from config import settings
+from utils.embeddings import create_embeddings
+
+
+def _run(chunks, workers: int) -> tuple:
+    settings.EMBEDDING_MAX_WORKERS = workers
+    start = time.perf_counter()
+    vectors = create_embeddings(chunks, model="fake-embedding", use_cache=False)
+    return time.perf_counter() - start, vectors
+
+
+def main(num_chunks: int = 2000, latency: float = 0.1, workers: int = 8):
+    chunks = [f"chunk {i}: " + "words " * (20 + i % 40) for i in range(num_chunks)]
+
+    with FakeEmbeddingServer(latency=latency, dim=32, fail_every=7) as server:
+        os.environ["OPENAI_AZURE_ENDPOINT"] = server.url
+        os.environ["OPENAI_AZURE_API_KEY"] = "fake"
+        os.environ["OPENAI_AZURE_API_VERSION"] = "2024-06-01"
+
+        expected = np.asarray([fake_embedding(chunk, 32) for chunk in chunks], dtype=np.float32)
+
+        sequential_time, sequential = _run(chunks, 1)
+        concurrent_time, concurrent = _run(chunks, workers)
+
+        assert np.allclose(np.asarray(sequential), expected), "sequential output out of order"
+        assert np.allclose(np.asarray(concurrent), expected), "concurrent output out of order"
+
+        print(f"chunks:      {num_chunks}")
+        print(f"requests:    {server.requests} (every 7th answered with 429)")
+        print(f"sequential:  {sequential_time:.2f}s")
+        print(f"{workers} workers:   {concurrent_time:.2f}s")
+        print(f"speedup:     {sequential_time / concurrent_time:.1f}x, order preserved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Load test for the HTTP chat service (server.py) with stubbed LLM and embedding backends.
+
+Each simulated user opens a session, loads the same stored video and asks a
+few questions; the number of concurrent sessions grows each round. The app is
+driven in-process through httpx's ASGI transport against a throwaway database,
+so no network, API keys or ASGI server are needed. Reports p50/p99 turn
+latency, throughput and requests rejected by backpressure (503).
+Run from the Youtube_RAG directory:
+    python -m benchmarks.bench_server [max_sessions]
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Stub latencies, roughly a fast hosted model and embedding endpoint
+LLM_SECONDS = float(os.getenv("BENCH_LLM_SECONDS", "0.05"))
+EMBEDDING_SECONDS = float(os.getenv("BENCH_EMBEDDING_SECONDS", "0.02"))
+VIDEO_ID = "dQw4w9WgXcQ"
+CHUNKS = 400
+DIM = 1536
+QUESTIONS = [
+    "what is the main argument of the talk",
+    "how does the speaker explain procrastination",
+    "what advice is given at the end of the video",
+]
+
+
+class StubChatModel:
+    """Answers from retrieved sections, otherwise checks URLs and searches the video like the real agent."""
+
+    def invoke(self, messages):
+        time.sleep(LLM_SECONDS)
+        system, last = messages[0].content, messages[-1]
+        if "Retrieved Sections" in system or "Possibly Relevant Sections" in system:
+            return AIMessage(content="Based on the video, the speaker says the monkey takes the wheel.")
+        if isinstance(last, HumanMessage) and "youtube.com" in last.content:
+            return AIMessage(content="", tool_calls=[{
+                "name": "youtube_video_data_checker", "args": {"youtube_video_url": last.content}, "id": "check"
+            }])
+        if isinstance(last, HumanMessage):
+            return AIMessage(content="", tool_calls=[{
+                "name": "perform_rag_search", "args": {"query": last.content}, "id": "search"
+            }])
+        return AIMessage(content="The video is loaded. What would you like to know?")
+
+
+def _stub_embeddings(texts, model=None, use_cache=True):
+    time.sleep(EMBEDDING_SECONDS)
+    rng = np.random.default_rng(abs(hash(tuple(texts))) % 2**32)
+    return rng.standard_normal((len(texts), DIM)).tolist()
+
+
+def _install_stubs(db_dir: str):
+    import utils.db_handler as db_handler
+    import utils.rag_search as rag_search
+    import nodes.agent as agent
+
+    db_handler.DB_PATH = os.path.join(db_dir, "bench.db")
+    rag_search.create_query_embeddings = _stub_embeddings
+    rag_search.create_single_embedding = lambda text, model=None, use_cache=True: _stub_embeddings([text])[0]
+    agent.llm = StubChatModel()
+
+    rng = np.random.default_rng(0)
+    db_handler.store_video_data(
+        VIDEO_ID,
+        "transcript " * 20000,
+        rng.standard_normal((CHUNKS, DIM)).astype(np.float32),
+        chunks=[f"Section {i} of the talk about procrastination and deadlines." for i in range(CHUNKS)]
+    )
+
+
+def _parse_sse(body: str):
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in lines:
+            yield lines["event"], json.loads(lines.get("data", "{}"))
+
+
+async def _user(client: httpx.AsyncClient, session_id: str, latencies: list, counts: dict):
+    messages = [f"https://www.youtube.com/watch?v={VIDEO_ID}"] + QUESTIONS
+    for message in messages:
+        start = time.perf_counter()
+        response = await client.post(f"/sessions/{session_id}/messages", json={"message": message})
+        if response.status_code == 503:
+            counts["rejected"] += 1
+            continue
+        events = dict(_parse_sse(response.text))
+        if response.status_code != 200 or "done" not in events:
+            counts["errors"] += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def _round(app, sessions: int, round_id: int) -> dict:
+    latencies, counts = [], {"rejected": 0, "errors": 0}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _user(client, f"bench-{round_id}-{i}", latencies, counts) for i in range(sessions)
+        ))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else None,
+        "turns_per_second": len(latencies) / elapsed,
+        **counts,
+    }
+
+
+async def _run(app, max_sessions: int):
+    sessions, round_id = 1, 0
+    while sessions <= max_sessions:
+        # Nodes log every step; keep the table readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = await _round(app, sessions, round_id)
+        print(f"{result['sessions']:>8} {result['turns']:>6} {result['p50_ms'] or 0:>8.0f} "
+              f"{result['p99_ms'] or 0:>8.0f} {result['turns_per_second']:>8.1f} "
+              f"{result['rejected']:>8} {result['errors']:>6}")
+        sessions *= 4
+        round_id += 1
+
+
+def main(max_sessions: int = 64):
+    with tempfile.TemporaryDirectory(prefix="bench_server_") as db_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _install_stubs(db_dir)
+        from server import ChatService, create_app
+        service = ChatService()
+
+        print(f"stub LLM {LLM_SECONDS * 1000:.0f} ms/call, stub embeddings {EMBEDDING_SECONDS * 1000:.0f} ms/call, "
+              f"{service.max_turns} concurrent turns, {service.max_queued} queued")
+        print(f"{'sessions':>8} {'turns':>6} {'p50 ms':>8} {'p99 ms':>8} {'turns/s':>8} {'rejected':>8} {'errors':>6}")
+        asyncio.run(_run(create_app(service), max_sessions))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
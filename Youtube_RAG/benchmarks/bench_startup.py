@@ -0,0 +1,67 @@
+"""
+Startup cost of `import main`, measured with `python -X importtime`.
+
+Fails (exit code 1) when the median import time exceeds the budget or when a
+dependency that should be deferred until first use is imported at startup.
+Run from the Youtube_RAG directory:
+    python -m benchmarks.bench_startup [budget_ms]
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Only needed for ingestion, Whisper/embedding calls or the first LLM call
+DEFERRED_MODULES = ("openai", "yt_dlp", "langchain_google_genai", "sklearn")
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "2000"))
+RUNS = 5
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def _import_profile() -> dict:
+    """Run `import main` in a fresh interpreter and return {module: (self_us, cumulative_us, depth)}."""
+    env = dict(os.environ, GOOGLE_API_KEY=os.getenv("GOOGLE_API_KEY", "startup-benchmark"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, env=env, check=True
+    )
+    profile = {}
+    for match in _LINE.finditer(result.stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        profile[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return profile
+
+
+def main(budget_ms: float = DEFAULT_BUDGET_MS) -> int:
+    profiles = [_import_profile() for _ in range(RUNS)]
+    totals = [profile["main"][1] / 1000 for profile in profiles]
+    median = statistics.median(totals)
+
+    last = profiles[-1]
+    top_level = sorted(
+        ((name, cumulative) for name, (_, cumulative, depth) in last.items() if depth == 1),
+        key=lambda item: item[1], reverse=True
+    )
+    print(f"import main: median {median:.0f} ms over {RUNS} runs (min {min(totals):.0f}, max {max(totals):.0f})")
+    print("heaviest direct imports:")
+    for name, cumulative in top_level[:8]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    eager = [module for module in DEFERRED_MODULES if module in last]
+    if eager:
+        failures.append(f"imported at startup but should be deferred: {', '.join(eager)}")
+    if median > budget_ms:
+        failures.append(f"median {median:.0f} ms exceeds the {budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: within {budget_ms:.0f} ms, no deferred module imported")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS))
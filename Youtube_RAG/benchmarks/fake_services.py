@@ -0,0 +1,223 @@
+"""Local stand-ins for the external APIs, used by the benchmark scripts."""
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+import numpy as np
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic unit vector derived from the text, so callers can verify ordering."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeService:
+    """Base class running a ThreadingHTTPServer on a free localhost port in the background."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeService":
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                with service._lock:
+                    service.requests += 1
+                time.sleep(service.latency)
+                status, payload = service.handle(self.path, self.headers, body)
+                if isinstance(payload, list):
+                    # Streaming endpoints answer with server-sent events, one per item
+                    data = b"".join(f"data: {json.dumps(item)}\r\n\r\n".encode("utf-8") for item in payload)
+                    content_type = "text/event-stream"
+                else:
+                    data = json.dumps(payload).encode("utf-8")
+                    content_type = "application/json"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, path: str, headers, body: bytes):
+        raise NotImplementedError
+
+
+class FakeEmbeddingServer(FakeService):
+    """
+    Azure OpenAI embeddings endpoint.
+
+    fail_every makes every Nth request return 429 to exercise retries.
+    """
+
+    def __init__(self, latency: float = 0.05, dim: int = 64, fail_every: int = 0):
+        super().__init__(latency)
+        self.dim = dim
+        self.fail_every = fail_every
+        self.inputs = 0
+
+    def handle(self, path, headers, body):
+        request = json.loads(body)
+        with self._lock:
+            count = self.requests
+        if self.fail_every and count % self.fail_every == 0:
+            return 429, {"error": {"code": "429", "message": "Rate limit exceeded"}}
+
+        inputs = request["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        with self._lock:
+            self.inputs += len(inputs)
+
+        data = []
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(text, self.dim)
+            if request.get("encoding_format") == "base64":
+                vector = base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+
+        tokens = sum(len(text) // 4 + 1 for text in inputs)
+        return 200, {
+            "object": "list",
+            "data": data,
+            "model": request.get("model", "fake"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+
+_WORDS = ("the mind keeps a plan for every deadline but the present moment usually wins "
+          "when work feels hard we reach for something easy and the task waits another day").split()
+
+
+class FakeWhisperServer(FakeService):
+    """
+    Azure Whisper transcription endpoint.
+
+    The transcript length follows the upload size: bytes_per_second of audio
+    (32000 for the 16 kHz mono WAV from benchmarks.fixtures) at words_per_second
+    of speech, with one timestamped segment per sentence for verbose_json.
+    """
+
+    def __init__(self, latency: float = 0.5, bytes_per_second: int = 32000, words_per_second: float = 2.5):
+        super().__init__(latency)
+        self.bytes_per_second = bytes_per_second
+        self.words_per_second = words_per_second
+        self.bytes_received = 0
+
+    def handle(self, path, headers, body):
+        with self._lock:
+            self.bytes_received += len(body)
+            request_number = self.requests
+        seconds = len(body) / self.bytes_per_second
+        words_total = max(1, int(seconds * self.words_per_second))
+
+        sentences, start, position = [], 0.0, request_number
+        while words_total > 0:
+            length = min(words_total, 12)
+            words = [_WORDS[(position + i) % len(_WORDS)] for i in range(length)]
+            end = min(seconds, start + length / self.words_per_second)
+            sentences.append({"start": round(start, 2), "end": round(end, 2), "text": " " + " ".join(words).capitalize() + "."})
+            start, position, words_total = end, position + length, words_total - length
+
+        return 200, {
+            "text": "".join(sentence["text"] for sentence in sentences).strip(),
+            "duration": seconds,
+            "segments": [{"id": i, **sentence} for i, sentence in enumerate(sentences)],
+        }
+
+
+class FakeGeminiServer(FakeService):
+    """
+    Gemini generateContent / streamGenerateContent endpoint behaving like the agent's model.
+
+    A YouTube URL from the user gets a youtube_video_data_checker call, a
+    question gets a perform_rag_search call, and once retrieved sections are
+    in the system prompt (or after any other tool result) it answers in text.
+    """
+
+    def __init__(self, latency: float = 0.3, answer_words: int = 60):
+        super().__init__(latency)
+        self.answer_words = answer_words
+
+    def _reply(self, request: dict) -> dict:
+        system = " ".join(part.get("text", "") for part in (request.get("systemInstruction") or {}).get("parts", []))
+        contents = request.get("contents") or []
+        last_parts = contents[-1].get("parts", []) if contents else []
+        last_text = " ".join(part.get("text", "") for part in last_parts if "text" in part)
+        tools = {
+            declaration["name"]
+            for tool in request.get("tools") or []
+            for declaration in tool.get("functionDeclarations") or tool.get("function_declarations") or []
+        }
+
+        call = None
+        if "Retrieved Sections" in system or "Possibly Relevant Sections" in system:
+            call = None
+        elif contents and contents[-1].get("role") == "user" and last_text:
+            url = re.search(r"https?://\S*(?:youtube\.com|youtu\.be)\S*", last_text)
+            if url and "youtube_video_data_checker" in tools:
+                call = {"name": "youtube_video_data_checker", "args": {"youtube_video_url": url.group(0)}}
+            elif "perform_rag_search" in tools and "Video data is currently loaded" in system:
+                call = {"name": "perform_rag_search", "args": {"query": last_text}}
+
+        if call:
+            return {"role": "model", "parts": [{"functionCall": call}]}
+        words = " ".join(_WORDS[i % len(_WORDS)] for i in range(self.answer_words))
+        return {"role": "model", "parts": [{"text": words.capitalize() + "."}]}
+
+    def handle(self, path, headers, body):
+        request = json.loads(body)
+        content = self._reply(request)
+        prompt_tokens = len(body) // 4
+        completion_tokens = sum(len(json.dumps(part)) // 4 for part in content["parts"])
+        response = {
+            "candidates": [{"content": content, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": completion_tokens,
+                "totalTokenCount": prompt_tokens + completion_tokens,
+            },
+            "modelVersion": "fake-gemini",
+        }
+        if "streamGenerateContent" in path:
+            return 200, [response]
+        return 200, response
@@ -0,0 +1,165 @@
+"""Fixtures for the benchmark scripts: synthetic audio, sample captions, a throwaway database and local API stand-ins."""
+import json
+import os
+import tempfile
+import wave
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator
+import numpy as np
+from benchmarks.fake_services import FakeEmbeddingServer, FakeGeminiServer, FakeWhisperServer
+
+SAMPLE_RATE = 16000
+# Caption fixtures: <name>.info.json holds the caption fields of a yt-dlp info dict,
+# whose track URLs name the track files next to it
+CAPTIONS_DIR = os.path.join(os.path.dirname(__file__), "captions")
+CAPTION_FIXTURES = ("auto", "manual", "music", "translated")
+
+
+def write_synthetic_audio(path: str, seconds: float, sample_rate: int = SAMPLE_RATE) -> str:
+    """Write a 16-bit mono WAV of a quiet tone with a short pause every few seconds."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.2 * np.sin(2 * np.pi * 220 * t) * ((t % 6) < 5)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((signal * 32767).astype("<i2").tobytes())
+    return path
+
+
+@contextmanager
+def fake_youtube_audio(seconds: float = 300) -> Iterator[str]:
+    """
+    Replace the YouTube download with a synthetic WAV of the given length.
+
+    Patches get_audio_from_youtube and youtube_audio_file wherever the
+    ingestion code imported them; yields the audio path.
+    """
+    import utils.audio_retriver as audio_retriver
+    import services.transcripts as transcripts
+
+    work_dir = tempfile.mkdtemp(prefix="bench_audio_")
+    audio_path = write_synthetic_audio(os.path.join(work_dir, "audio.wav"), seconds)
+
+    @contextmanager
+    def youtube_audio_file(youtube_url: str, profile: str = "asr") -> Iterator[str]:
+        yield audio_path
+
+    def get_audio_from_youtube(youtube_url: str, profile: str = "archive") -> bytes:
+        with open(audio_path, "rb") as f:
+            return f.read()
+
+    patched = [
+        (audio_retriver, "youtube_audio_file", youtube_audio_file),
+        (audio_retriver, "get_audio_from_youtube", get_audio_from_youtube),
+        (transcripts, "youtube_audio_file", youtube_audio_file),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patched]
+    for module, name, replacement in patched:
+        setattr(module, name, replacement)
+    try:
+        yield audio_path
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+        os.unlink(audio_path)
+        os.rmdir(work_dir)
+
+
+def load_caption_fixture(name: str):
+    """
+    Run caption selection and parsing on a fixture, as fetch_captions does on a real video.
+
+    Returns:
+        See utils.captions.captions_from_track; None for videos that fall back to audio
+    """
+    from config import settings
+    from utils.captions import select_caption_track, captions_from_track
+
+    with open(os.path.join(CAPTIONS_DIR, f"{name}.info.json"), encoding="utf-8") as f:
+        info = json.load(f)
+    track = select_caption_track(info, settings.CAPTION_LANGUAGES, settings.CAPTION_ALLOW_AUTO)
+    if track is None:
+        return None
+    with open(os.path.join(CAPTIONS_DIR, track["url"]), encoding="utf-8") as f:
+        return captions_from_track(f.read(), track, info.get("duration"), settings.CAPTION_MIN_WORDS_PER_MINUTE)
+
+
+@contextmanager
+def fake_youtube_captions(name: str = "auto") -> Iterator[None]:
+    """Answer fetch_captions from a caption fixture (see CAPTION_FIXTURES) for every video."""
+    import utils.captions as captions
+    import services.transcripts as transcripts
+
+    def fetch_captions(youtube_url: str, *args, **kwargs):
+        return load_caption_fixture(name)
+
+    modules = (captions, transcripts)
+    originals = [module.fetch_captions for module in modules]
+    for module in modules:
+        module.fetch_captions = fetch_captions
+    try:
+        yield
+    finally:
+        for module, original in zip(modules, originals):
+            module.fetch_captions = original
+
+
+@contextmanager
+def temp_database() -> Iterator[str]:
+    """Point the video store, embedding caches and checkpoints at a throwaway SQLite file."""
+    import utils.db_handler as db_handler
+    from utils.embedding_cache import query_embedding_cache, chunk_embedding_store
+
+    work_dir = tempfile.mkdtemp(prefix="bench_db_")
+    db_path = os.path.join(work_dir, "bench.db")
+    originals = (db_handler.DB_PATH, query_embedding_cache.db_path, chunk_embedding_store.db_path)
+    db_handler.DB_PATH = query_embedding_cache.db_path = chunk_embedding_store.db_path = db_path
+    try:
+        yield db_path
+    finally:
+        db_handler.close_connection()
+        db_handler.DB_PATH, query_embedding_cache.db_path, chunk_embedding_store.db_path = originals
+        for name in os.listdir(work_dir):
+            os.unlink(os.path.join(work_dir, name))
+        os.rmdir(work_dir)
+
+
+@contextmanager
+def fake_services(
+    embedding_latency: float = 0.05,
+    whisper_latency: float = 0.5,
+    llm_latency: float = 0.3,
+    embedding_dim: int = 256
+) -> Iterator[Dict]:
+    """
+    Run local Azure embedding, Whisper and Gemini stand-ins and point the app at them.
+
+    Set before utils.speech_to_text is first imported, since it reads the
+    Whisper endpoint at import time. Yields {"embeddings", "whisper", "gemini"}.
+    """
+    with ExitStack() as stack:
+        servers = {
+            "embeddings": stack.enter_context(FakeEmbeddingServer(latency=embedding_latency, dim=embedding_dim)),
+            "whisper": stack.enter_context(FakeWhisperServer(latency=whisper_latency)),
+            "gemini": stack.enter_context(FakeGeminiServer(latency=llm_latency)),
+        }
+        environment = {
+            "OPENAI_AZURE_ENDPOINT": servers["embeddings"].url,
+            "OPENAI_AZURE_API_KEY": "fake",
+            "OPENAI_AZURE_API_VERSION": "2024-06-01",
+            "OPENAI_AZURE_EMBEDDING_DEPLOYMENT": "fake-embedding",
+            "OPENAI_AZURE_WHISPER_ENDPOINT": f"{servers['whisper'].url}/openai/deployments/whisper/audio/translations",
+            "GOOGLE_API_KEY": "fake",
+            "GOOGLE_API_BASE_URL": servers["gemini"].url,
+        }
+        previous = {name: os.environ.get(name) for name in environment}
+        os.environ.update(environment)
+        try:
+            yield servers
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
@@ -18,6 +18,75 @@ class Settings:
     OPENAI_AZURE_DEPLOYMENT = os.getenv("OPENAI_AZURE_DEPLOYMENT")
     OPENAI_AZURE_EMBEDDING_DEPLOYMENT = os.getenv("OPENAI_AZURE_EMBEDDING_DEPLOYMENT")
     
+    # Ingestion
+    STREAMING_INGESTION = os.getenv("STREAMING_INGESTION", "true").lower() in ("1", "true", "yes")
+    # ... and how long a turn waits for a streamed video's first chunks before answering without them
+    STREAMING_WAIT_SECONDS = float(os.getenv("STREAMING_WAIT_SECONDS", "60"))
+    
+    # Ingestion: audio longer than WHISPER_SEGMENT_SECONDS (or larger than WHISPER_SEGMENT_THRESHOLD_MB;
+    # Whisper rejects uploads over 25 MB) is cut into segments sharing WHISPER_SEGMENT_OVERLAP_SECONDS
+    # of audio, transcribed WHISPER_MAX_WORKERS at a time
+    WHISPER_SEGMENT_SECONDS = float(os.getenv("WHISPER_SEGMENT_SECONDS", "300"))
+    WHISPER_SEGMENT_THRESHOLD_MB = float(os.getenv("WHISPER_SEGMENT_THRESHOLD_MB", "20"))
+    WHISPER_SEGMENT_OVERLAP_SECONDS = float(os.getenv("WHISPER_SEGMENT_OVERLAP_SECONDS", "2"))
+    WHISPER_MAX_WORKERS = int(os.getenv("WHISPER_MAX_WORKERS", "4"))
+    WHISPER_MAX_RETRIES = int(os.getenv("WHISPER_MAX_RETRIES", "3"))
+    
+    # Ingestion: use the video's YouTube captions when it has a usable track, instead of
+    # downloading and transcribing the audio (see utils/captions.py for which tracks qualify)
+    CAPTIONS_FIRST = os.getenv("CAPTIONS_FIRST", "true").lower() in ("1", "true", "yes")
+    # Transcripts are English (Whisper's translations endpoint), so are the captions we take
+    CAPTION_LANGUAGES = [lang.strip() for lang in os.getenv("CAPTION_LANGUAGES", "en").split(",") if lang.strip()]
+    # Accept YouTube's auto-generated captions when there is no manual track
+    CAPTION_ALLOW_AUTO = os.getenv("CAPTION_ALLOW_AUTO", "true").lower() in ("1", "true", "yes")
+    # Tracks with fewer words than this per minute of video (e.g. only "[Music]") are not used
+    CAPTION_MIN_WORDS_PER_MINUTE = float(os.getenv("CAPTION_MIN_WORDS_PER_MINUTE", "20"))
+    
+    # Ingestion queue: new videos are processed by background worker processes
+    # (INGESTION_WORKERS started with the app; 0 if workers run separately)
+    INGESTION_QUEUE = os.getenv("INGESTION_QUEUE", "true").lower() in ("1", "true", "yes")
+    INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "1"))
+    # ... and a running job whose heartbeat is this old is treated as abandoned and picked up again
+    JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "600"))
+    
+    # Retrieval: answer keyword-style queries from the full-text index without embedding them
+    LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "true").lower() in ("1", "true", "yes")
+    
+    # Retrieval: search the user's question while the agent decides, waiting up to this long for it
+    SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() in ("1", "true", "yes")
+    SPECULATIVE_WAIT_SECONDS = float(os.getenv("SPECULATIVE_WAIT_SECONDS", "0.6"))
+    # ... and how long the search node waits for it to finish before searching afresh
+    SPECULATIVE_TAKE_SECONDS = float(os.getenv("SPECULATIVE_TAKE_SECONDS", "5"))
+    
+    # Conversation context: prompt token budget for each agent call; older turns are summarized
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "8000"))
+    
+    # Sessions: conversation checkpoints are stored in the SQLite database under this id
+    SESSION_ID = os.getenv("SESSION_ID", "default")
+    
+    # HTTP service (server.py): graph turns run at once, and how many more may wait for a slot
+    SERVER_MAX_CONCURRENT_TURNS = int(os.getenv("SERVER_MAX_CONCURRENT_TURNS", "8"))
+    SERVER_MAX_QUEUED_TURNS = int(os.getenv("SERVER_MAX_QUEUED_TURNS", "32"))
+    
+    # Logging: node and router progress (INFO), or only problems (WARNING)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    
+    # HTTP clients
+    WARM_UP_CLIENTS = os.getenv("WARM_UP_CLIENTS", "false").lower() in ("1", "true", "yes")
+    # Keep-alive connections per service, and request / connect timeouts in seconds
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE") or 20)
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT") or 120)
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT") or 10)
+    
+    # Embeddings: the deployment's quota, shared by every ingestion in the process (0 = unlimited)
+    EMBEDDING_REQUESTS_PER_MINUTE = int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE") or 0)
+    EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE") or 0)
+    # ... concurrent requests, batch size limits and retries of rate-limited or failed batches
+    EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS") or 4)
+    EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS") or 8000)
+    EMBEDDING_BATCH_ITEMS = int(os.getenv("EMBEDDING_BATCH_ITEMS") or 100)
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES") or 5)
+    
     @classmethod
     def validate(cls):
         """Validate that required environment variables are set"""
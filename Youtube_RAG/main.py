@@ -1,33 +1,48 @@
 from langgraph.graph import StateGraph, START, END
 from dotenv import load_dotenv
+import logging
 import os
+import sys
+import time
 from langchain_core.messages import HumanMessage
 from langgraph.prebuilt import ToolNode
-from langchain_google_genai import ChatGoogleGenerativeAI
 from tools.data_checker import youtube_video_data_checker
 from tools.rag_search import perform_rag_search
+from tools.library_search import search_video_library
 from routers.agent_router import routers
 from models.state import AgentState
 from nodes.agent import decision_maker
 from nodes.existing_video_porcessor import update_state_only
 from nodes.new_video_processor import process_new_video_and_update_state
 from nodes.rag_search import handle_rag_search
+from config import settings
+from utils.clients import clients
+from utils.checkpointer import SQLiteCheckpointer
+from utils.metrics import instrument_node, trace_request
+from services.job_queue import start_workers
 
 load_dotenv()
 
 
-tools = [youtube_video_data_checker, perform_rag_search]
+tools = [youtube_video_data_checker, perform_rag_search, search_video_library]
 
 
-def build_graph():
-    """Build and compile the LangGraph workflow."""
+def build_graph(checkpointer=None):
+    """
+    Build and compile the LangGraph workflow.
+    
+    Args:
+        checkpointer: Optional LangGraph checkpointer; with one, each call needs a
+            config with a thread_id and the graph resumes that session's state
+    """
     graph = StateGraph(AgentState)
     
-    # Add nodes
-    graph.add_node("decision_maker", decision_maker)
-    graph.add_node("update_state_only", update_state_only)
-    graph.add_node("process_new_video_and_update_state", process_new_video_and_update_state)
-    graph.add_node("handle_rag_search", handle_rag_search)
+    # Add nodes (timed in utils.metrics as graph_node_seconds)
+    graph.add_node("decision_maker", instrument_node("decision_maker", decision_maker))
+    graph.add_node("update_state_only", instrument_node("update_state_only", update_state_only))
+    graph.add_node("process_new_video_and_update_state",
+                   instrument_node("process_new_video_and_update_state", process_new_video_and_update_state))
+    graph.add_node("handle_rag_search", instrument_node("handle_rag_search", handle_rag_search))
     
     tool_node = ToolNode(tools)
     graph.add_node("tool_node", tool_node)
@@ -36,9 +51,10 @@ def build_graph():
     graph.set_entry_point("decision_maker")
     
     # Add edges
+    route = instrument_node("routers", routers)
     graph.add_conditional_edges(
         "decision_maker",
-        routers,
+        route,
         {
             "tool_handler": "tool_node",
             "process_new_video": "process_new_video_and_update_state",
@@ -50,7 +66,7 @@ def build_graph():
     
     graph.add_conditional_edges(
         "tool_node",
-        routers,
+        route,
         {
             "tool_handler": "tool_node",
             "process_new_video": "process_new_video_and_update_state",
@@ -64,27 +80,49 @@ def build_graph():
     graph.add_edge("process_new_video_and_update_state", "decision_maker")
     graph.add_edge("handle_rag_search", "decision_maker")
     
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
+
+def _chunk_text(chunk) -> str:
+    """Return the text of a streamed message chunk (Gemini may send a list of content parts)."""
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
 
 def main():
     """Run the interactive chatbot."""
+    # Conversations are saved per session; pass a name to resume or start another one
+    session_id = sys.argv[1] if len(sys.argv) > 1 else settings.SESSION_ID
+    
+    # Nodes report progress through logging; show it like the rest of the console output
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(message)s", stream=sys.stdout)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    
     print("=" * 60)
     print("YouTube RAG Assistant")
     print("=" * 60)
     print("Type 'exit' or 'quit' to end the conversation\n")
     
-    app = build_graph()
+    app = build_graph(SQLiteCheckpointer())
+    config = {"configurable": {"thread_id": session_id}}
     
-    # Initialize state to maintain conversation and video data across turns
-    state = {
-        "messages": [],
-        "youtube_video_id": None,
-        "youtube_transcript": None,
-        "youtube_chunks": None,
-        "vectors": None,
-        "rag_search_results": None,
-    }
+    if settings.WARM_UP_CLIENTS:
+        from utils.speech_to_text import WHISPER_ENDPOINT
+        clients.warm_up(WHISPER_ENDPOINT)
     
+    # New videos are ingested in the background while the chat continues
+    if settings.INGESTION_QUEUE and settings.INGESTION_WORKERS:
+        start_workers(settings.INGESTION_WORKERS)
+    
+    saved = app.get_state(config).values
+    if saved.get("messages"):
+        video = f", video {saved['youtube_video_id']}" if saved.get("youtube_video_id") else ""
+        print(f"Resuming session '{session_id}' ({len(saved['messages'])} messages{video})")
+    else:
+        print(f"Session: {session_id}")
+    
+    turn_number = 0
     while True:
         try:
             # Get user input
@@ -97,33 +135,40 @@ def main():
             if not user_input:
                 continue
             
-            # Add user message to state
-            state["messages"].append(HumanMessage(content=user_input))
-
             print("\n" + "─" * 60)
 
-            # Stream the graph execution and capture final state
-            streamed_response = False
+            # Stream LLM tokens as they are generated ("messages") and model calls'
+            # token usage ("updates"); the checkpointer keeps the session's state
+            turn_start = time.perf_counter()
+            first_token_at = None
+            prompt_tokens = []
 
-            for event in app.stream(state, stream_mode="updates"):
-                # Get node name and state update
-                for node_name, node_state in event.items():
-                    # Check if this is the decision_maker node with a message
-                    if node_name == "decision_maker" and "messages" in node_state:
-                        messages = node_state["messages"]
-                        if messages and hasattr(messages[0], 'content') and messages[0].content:
-                            if not streamed_response:
+            turn_number += 1
+            turn = {"messages": [HumanMessage(content=user_input)]}
+            with trace_request(f"{session_id}/{turn_number}", session_id=session_id):
+                for mode, payload in app.stream(turn, config, stream_mode=["messages", "updates"]):
+                    if mode == "messages":
+                        chunk, metadata = payload
+                        if metadata.get("langgraph_node") != "decision_maker":
+                            continue
+                        text = _chunk_text(chunk)
+                        if text:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
                                 print("\n[Assistant]: ", end="", flush=True)
-                                streamed_response = True
-                            # Stream the content
-                            for char in messages[0].content:
-                                print(char, end="", flush=True)
-
-                    # Update state from final node outputs
-                    state.update(node_state)
+                            print(text, end="", flush=True)
+                    else:
+                        for node_name, node_state in payload.items():
+                            if node_name == "decision_maker" and node_state and node_state.get("messages"):
+                                usage = getattr(node_state["messages"][-1], "usage_metadata", None) or {}
+                                prompt_tokens.append(usage.get("input_tokens"))
 
-            if streamed_response:
+            if first_token_at is not None:
                 print()  # New line after streaming
+                print(f"[Timing] first token {first_token_at - turn_start:.2f}s, "
+                      f"total {time.perf_counter() - turn_start:.2f}s")
+            if any(prompt_tokens):
+                print(f"[Context] prompt tokens per model call: {', '.join(str(t) for t in prompt_tokens)}")
 
             print("─" * 60)
             
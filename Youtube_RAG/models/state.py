@@ -1,4 +1,5 @@
-from typing import TypedDict, Optional, Annotated, Sequence
+from typing import TypedDict, Optional, Annotated, Sequence, Union
+import numpy as np
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
@@ -11,5 +12,8 @@ class AgentState(TypedDict):
     youtube_chunks: Optional[list]
     youtube_video_id: Optional[str]
     youtube_url: Optional[str]
-    vectors: Optional[list]
+    vectors: Optional[Union[list, np.ndarray]]
     rag_search_results: Optional[list]
+    ingestion_status: Optional[str]
+    conversation_summary: Optional[str]
+    summarized_message_count: Optional[int]
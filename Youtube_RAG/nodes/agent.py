@@ -1,23 +1,105 @@
+import logging
 from models.state import AgentState
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import SystemMessage, HumanMessage
 from tools.data_checker import youtube_video_data_checker
 from tools.rag_search import perform_rag_search
-from langchain_google_genai import ChatGoogleGenerativeAI
+from tools.library_search import search_video_library
 from config import settings
+from utils.clients import clients
+from utils.context_window import build_prompt_context
+from utils.metrics import timed, record_llm_usage
+from utils.speculative_retrieval import start_prefetch, prefetch_result, discard_prefetch, current_session_id
+from utils.db_handler import video_exists
+from services.job_queue import get_job
 
-tools = [youtube_video_data_checker, perform_rag_search]
-llm = ChatGoogleGenerativeAI(
-    model='gemini-2.0-flash', 
-    google_api_key=settings.GOOGLE_API_KEY
-).bind_tools(tools)
+logger = logging.getLogger(__name__)
+
+tools = [youtube_video_data_checker, perform_rag_search, search_video_library]
+llm = None
+
+
+def get_llm():
+    """Return the tool-bound Gemini model, creating it on the first agent call."""
+    global llm
+    if llm is None:
+        llm = clients.chat_model(
+            model='gemini-2.0-flash', 
+            google_api_key=settings.GOOGLE_API_KEY
+        ).bind_tools(tools)
+    return llm
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and TubeHelper, an assistant that answers questions about YouTube videos.
+Update the summary with the new messages below. Keep video IDs/URLs, the questions asked and the key facts of the answers. Be concise (under 200 words) and output only the summary."""
+
+
+def _summarize(previous_summary, messages) -> str:
+    """Fold evicted messages into the running conversation summary with the LLM."""
+    transcript = "\n".join(
+        f"{type(message).__name__.replace('Message', '')}: {message.content}"
+        for message in messages if isinstance(message.content, str) and message.content
+    )
+    request = f"CURRENT SUMMARY:\n{previous_summary or '(none)'}\n\nNEW MESSAGES:\n{transcript}"
+    summarizer = clients.chat_model(model='gemini-2.0-flash', google_api_key=settings.GOOGLE_API_KEY)
+    with timed("llm_request_seconds", purpose="summary"):
+        response = summarizer.invoke([SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=request)])
+    record_llm_usage(response, "summary")
+    return response.content
+
+
+RESPONSE_FORMATTING = """RESPONSE FORMATTING INSTRUCTIONS:
+1. Synthesize the information from all relevant sections into a cohesive, well-structured answer
+2. Organize your response with clear paragraphs or bullet points when appropriate
+3. Start with the main answer, then provide supporting details
+4. Be comprehensive but concise - avoid unnecessary repetition
+5. Use natural, conversational language without emojis
+6. If the sections contain multiple key points, organize them logically
+7. Make sure your answer directly addresses the user's specific question"""
+
+
+def _start_speculative_search(state: AgentState):
+    """
+    Start searching the loaded video for the user's latest question in the background.
+
+    Returns the prefetch future, or None when the message is not worth searching
+    (a URL, a greeting). Results that miss the first call stay cached for
+    perform_rag_search to pick up.
+    """
+    messages = state["messages"]
+    last = messages[-1] if messages else None
+    if not isinstance(last, HumanMessage) or not isinstance(last.content, str):
+        return None
+    question = last.content.strip()
+    if len(question.split()) < 3 or "youtube.com" in question or "youtu.be" in question:
+        return None
+
+    return start_prefetch(current_session_id(), state["youtube_video_id"], question,
+                          state.get("vectors"), state.get("youtube_chunks"),
+                          lexical_fast_path=settings.LEXICAL_FAST_PATH)
 
 
 def decision_maker(state: AgentState) -> AgentState:
     """Decides whether to process a new video or retrieve existing data."""
 
-    has_video_data = bool(state.get("youtube_chunks") and state.get("vectors"))
+    vectors = state.get("vectors")
+    has_video_data = bool(state.get("youtube_chunks")) and vectors is not None and len(vectors) > 0
+    if not has_video_data and state.get("youtube_video_id"):
+        # Resumed sessions only checkpoint the video id; its data is loaded when searched
+        has_video_data = video_exists(state["youtube_video_id"], complete_only=False)
     has_rag_results = bool(state.get("rag_search_results"))
 
+    # Videos ingested by a background worker: pick up where the job has got to
+    ingestion_status = state.get("ingestion_status")
+    job = None
+    if ingestion_status == "processing" and state.get("youtube_video_id"):
+        job = get_job(state["youtube_video_id"])
+        if job and job["status"] in ("complete", "failed"):
+            ingestion_status = job["status"]
+
+    prefetch = None
+    if settings.SPECULATIVE_RETRIEVAL and has_video_data and not has_rag_results and state.get("youtube_video_id"):
+        prefetch = _start_speculative_search(state)
+
     system_prompt_base = """You are an intelligent assistant named TubeHelper that helps users ask questions about YouTube videos.
 
 Your role:
@@ -42,6 +124,8 @@ Your role:
 11. Do NOT try to call tools with made-up or test URLs
 12. Always wait for the user to provide a real YouTube URL before using tools
 13. Always provide a text response to the user - never produce empty responses
+14. When the user asks which video(s) cover a topic, or asks about their video library in general rather than the loaded video, call search_video_library. It needs no URL; answer with the matching videos' URLs and what each says about the topic
+15. If one message asks several questions about the loaded video, call perform_rag_search once: put the first question in query and the others in additional_queries
 
 Be conversational, helpful, and always respond with meaningful text."""
 
@@ -51,6 +135,20 @@ Be conversational, helpful, and always respond with meaningful text."""
 IMPORTANT: Video data is currently loaded (ID: {state.get('youtube_video_id')}).
 Check if there are any unanswered questions in the conversation history and use perform_rag_search to answer them."""
 
+    if has_video_data and ingestion_status == "processing":
+        system_prompt_base += """
+NOTE: The video is still being processed. Only its beginning is searchable so far; if an answer seems incomplete, tell the user more content will be available shortly."""
+    elif ingestion_status == "processing" and job:
+        progress = f"{job['stage']}, {job['progress']:.0%} done" + (f", {job['detail']}" if job.get("detail") else "")
+        system_prompt_base += f"""
+
+IMPORTANT: Video {state.get('youtube_video_id')} is being processed in the background ({progress}).
+Nothing is searchable yet, so do NOT call perform_rag_search. Tell the user the video is being processed, how far along it is, and that they can ask their questions once it is ready."""
+    elif ingestion_status == "failed" and job:
+        system_prompt_base += f"""
+
+IMPORTANT: Processing video {state.get('youtube_video_id')} failed ({job.get('error')}). Tell the user, and suggest sending the URL again to retry."""
+
     # Add RAG results to system prompt if available
     if has_rag_results:
         rag_results = state.get("rag_search_results", [])
@@ -63,31 +161,68 @@ Do NOT call perform_rag_search again - the results are already here.
 Retrieved Sections:
 {results_text}
 
-RESPONSE FORMATTING INSTRUCTIONS:
-1. Synthesize the information from all relevant sections into a cohesive, well-structured answer
-2. Organize your response with clear paragraphs or bullet points when appropriate
-3. Start with the main answer, then provide supporting details
-4. Be comprehensive but concise - avoid unnecessary repetition
-5. Use natural, conversational language without emojis
-6. If the sections contain multiple key points, organize them logically
-7. Make sure your answer directly addresses the user's specific question
+{RESPONSE_FORMATTING}
 
 Now provide your answer based on these guidelines and the retrieved sections."""
 
-    system_prompt = SystemMessage(content=system_prompt_base)
+    # Sections searched for the user's message while this call was prepared
+    prefetched = prefetch_result(prefetch, settings.SPECULATIVE_WAIT_SECONDS) if prefetch else None
+    if prefetched and prefetched[0]:
+        sections = prefetched[0]
+        logger.info("   Prefetched %d sections for the latest message", len(sections))
+        results_text = "\n\n".join(f"Section {i+1}:\n{section}" for i, section in enumerate(sections))
+        system_prompt_base += f"""
 
-    print("\n[LLM] Thinking...")
-    response = llm.invoke([system_prompt] + state["messages"])
+The following sections were retrieved from the video for the user's latest message.
+If they are enough to answer it, answer directly from them without calling perform_rag_search.
+If the message is not a question about the video, ignore them. If they do not cover the question, call perform_rag_search as usual.
 
-    # Tool calls are printed for debugging
+Possibly Relevant Sections:
+{results_text}
+
+{RESPONSE_FORMATTING}"""
+
+    # Keep the prompt within budget: recent turns verbatim, older ones summarized
+    context = build_prompt_context(
+        system_prompt_base,
+        state["messages"],
+        max_tokens=settings.CONTEXT_MAX_TOKENS,
+        summary=state.get("conversation_summary"),
+        summarized_count=state.get("summarized_message_count") or 0,
+        summarize=_summarize
+    )
+    logger.info("\n[Context] ~%d prompt tokens, %d messages (%d summarized, %d old tool results dropped)",
+                context.prompt_tokens, len(context.messages) - 1, context.summarized_count,
+                context.dropped_tool_results)
+
+    logger.info("[LLM] Thinking...")
+    with timed("llm_request_seconds", purpose="agent"):
+        response = get_llm().invoke(context.messages)
+    record_llm_usage(response, "agent")
+
+    # Tool calls are logged for debugging
     if hasattr(response, 'tool_calls') and response.tool_calls:
         for tc in response.tool_calls:
-            print(f"[Tool Call]: {tc['name']} with args: {tc['args']}")
+            logger.info("[Tool Call]: %s with args: %s", tc['name'], tc['args'])
+
+    # Only perform_rag_search claims the prefetch; otherwise this turn is done with it
+    tool_names = [tc['name'] for tc in getattr(response, 'tool_calls', None) or []]
+    if prefetch is not None and 'perform_rag_search' not in tool_names:
+        discard_prefetch(current_session_id(), state["youtube_video_id"])
+
+    update = {
+        "messages": [response],
+        "conversation_summary": context.summary,
+        "summarized_message_count": context.summarized_count,
+    }
+
+    if ingestion_status != state.get("ingestion_status"):
+        update["ingestion_status"] = ingestion_status
 
     # Clear RAG results after processing
     if has_rag_results:
-        state["rag_search_results"] = None
+        update["rag_search_results"] = None
 
-    return {"messages": [response]}
+    return update
 
 
@@ -1,10 +1,13 @@
 from models.state import AgentState
 import json
-from utils.db_handler import retrieve_video_data
+import logging
+from utils.db_handler import load_video_index
+
+logger = logging.getLogger(__name__)
 
 def update_state_only(state: AgentState) -> AgentState:
     """Load existing video data from database."""
-    print("\n[State Update] Loading existing video data...")
+    logger.info("\n[State Update] Loading existing video data...")
     messages = state["messages"]
 
     for i in range(len(messages) - 1, -1, -1):
@@ -14,18 +17,20 @@ def update_state_only(state: AgentState) -> AgentState:
                 video_id = content.get("video_id")
                 if video_id:
                     state["youtube_video_id"] = video_id
-                    print(f"   Video ID: {video_id}")
+                    logger.info("   Video ID: %s", video_id)
                     break
             except (json.JSONDecodeError, TypeError) as e:
-                print(f"   Error parsing tool message: {e}")
+                logger.error("   Error parsing tool message: %s", e)
 
     youtube_video_id = state.get("youtube_video_id")
     if youtube_video_id:
-        response = retrieve_video_data(youtube_video_id)
-        if response:
-            state["youtube_transcript"] = response["full_transcription"]
-            state["youtube_chunks"] = response["chunks"]
-            state["vectors"] = response["vectors"]
-            print(f"   Loaded {len(state['youtube_chunks'])} chunks and {len(state['vectors'])} vectors")
+        index = load_video_index(youtube_video_id)
+        if index:
+            matrix, chunks = index.snapshot()
+            state["youtube_transcript"] = index.transcript
+            state["youtube_chunks"] = chunks
+            state["vectors"] = matrix
+            state["ingestion_status"] = "complete" if index.complete else "processing"
+            logger.info("   Loaded %d chunks and %d vectors", len(state['youtube_chunks']), len(state['vectors']))
 
     return state
@@ -1,10 +1,19 @@
 from models.state import AgentState
 import json
-from services.db_data_saver import save_new_video_to_db
+import logging
+from config import settings
+from services.job_queue import enqueue_ingestion
+from utils.db_handler import load_video_index
+
+logger = logging.getLogger(__name__)
 
 def process_new_video_and_update_state(state: AgentState) -> AgentState:
     """Process a new video and update state."""
-    print("\n🎬 [New Video] Processing video from scratch...")
+    # Ingestion pulls in yt-dlp, Whisper and embedding clients; load them only when needed
+    from services.db_data_saver import save_new_video_to_db
+    from services.streaming_ingestion import start_streaming_ingestion
+
+    logger.info("\n🎬 [New Video] Processing video from scratch...")
     messages = state["messages"]
     
     for i in range(len(messages) - 1, -1, -1):
@@ -19,10 +28,39 @@ def process_new_video_and_update_state(state: AgentState) -> AgentState:
                 pass
     
     youtube_video_id = state.get("youtube_video_id")
-    if youtube_video_id:
+    if youtube_video_id and settings.INGESTION_QUEUE:
+        # A background worker ingests it; the turn ends right away and later turns pick it up
+        job = enqueue_ingestion(youtube_video_id)
+        logger.info("   Ingestion job for %s: %s (%s)", youtube_video_id, job['status'], job['stage'])
+        index = load_video_index(youtube_video_id) if job["status"] == "complete" else None
+        if index is not None:
+            matrix, chunks = index.snapshot()
+            state["youtube_transcript"] = index.transcript
+            state["youtube_chunks"] = chunks
+            state["vectors"] = matrix
+            state["ingestion_status"] = "complete"
+        else:
+            state["ingestion_status"] = "processing"
+    elif youtube_video_id and settings.STREAMING_INGESTION:
+        # Return as soon as the first chunks are searchable; the index keeps growing
+        job = start_streaming_ingestion(youtube_video_id)
+        if not job.wait_until_searchable(settings.STREAMING_WAIT_SECONDS):
+            # Still downloading or transcribing; later turns load what has been indexed by then
+            logger.info("   Nothing searchable after %.0fs; continuing in the background", settings.STREAMING_WAIT_SECONDS)
+            state["ingestion_status"] = "processing"
+            return state
+        if job.error:
+            raise job.error
+        matrix, chunks = job.index.snapshot()
+        state["youtube_transcript"] = job.index.transcript
+        state["youtube_chunks"] = chunks
+        state["vectors"] = matrix
+        state["ingestion_status"] = "complete" if job.index.complete else "processing"
+    elif youtube_video_id:
         response = save_new_video_to_db(youtube_video_id)
         state["youtube_transcript"] = response["transcript"]
         state["youtube_chunks"] = response["chunks"]
         state["vectors"] = response["vectors"]
+        state["ingestion_status"] = "complete"
     
     return state
\ No newline at end of file
@@ -1,10 +1,15 @@
 from models.state import AgentState
 import json
-from utils.rag_search import semantic_search
+import logging
+from utils.rag_search import retrieve_sections
+from utils.speculative_retrieval import take_prefetched, current_session_id
+from config import settings
+
+logger = logging.getLogger(__name__)
 
 def handle_rag_search(state: AgentState) -> AgentState:
     """Perform actual RAG search on the video."""
-    print("\n[RAG Search] Searching video content...")
+    logger.info("\n[RAG Search] Searching video content...")
     messages = state["messages"]
 
     for i in range(len(messages) - 1, -1, -1):
@@ -12,19 +17,43 @@ def handle_rag_search(state: AgentState) -> AgentState:
             try:
                 tool_result = json.loads(messages[i].content)
                 query = tool_result.get("query")
-                print(f"   Query: {query}")
+                additional_queries = [q for q in tool_result.get("additional_queries") or [] if q and q != query]
+                logger.info("   Query: %s", query)
+                if additional_queries:
+                    logger.info("   Additional queries: %s", additional_queries)
+
+                vectors = state.get("vectors")
+                has_vectors = vectors is not None and len(vectors) > 0
+                chunks = state.get("youtube_chunks")
+                video_id = state.get("youtube_video_id")
 
-                if query and state.get("youtube_chunks") and state.get("vectors"):
-                    search_results = semantic_search(query, state["vectors"], state["youtube_chunks"])
-                    print(f"   Found {len(search_results)} relevant sections")
+                # Reuse the search started speculatively on the user's message, if it asked the same thing
+                prefetched = None
+                if query and video_id and not additional_queries:
+                    prefetched = take_prefetched(current_session_id(), video_id, query,
+                                                 timeout=settings.SPECULATIVE_TAKE_SECONDS)
 
-                    # Store results in state for agent processing
-                    state["rag_search_results"] = search_results
+                if prefetched is not None:
+                    search_results, index = prefetched
+                    logger.info("   Using %d prefetched sections", len(search_results))
+                elif query and (video_id or (chunks and has_vectors)):
+                    search_results, index = retrieve_sections(
+                        query, video_id, vectors, chunks,
+                        additional_queries=additional_queries,
+                        lexical_fast_path=settings.LEXICAL_FAST_PATH
+                    )
+                    logger.info("   Found %d relevant sections", len(search_results))
                 else:
-                    print(f"   Missing data - query: {bool(query)}, chunks: {bool(state.get('youtube_chunks'))}, vectors: {bool(state.get('vectors'))}")
-                    state["rag_search_results"] = []
+                    logger.info("   Missing data - query: %s, chunks: %s, vectors: %s", bool(query), bool(chunks), has_vectors)
+                    search_results, index = [], None
+
+                if index is not None:
+                    state["ingestion_status"] = "complete" if index.complete else "processing"
+
+                # Store results in state for agent processing
+                state["rag_search_results"] = search_results
             except (json.JSONDecodeError, TypeError, AttributeError) as e:
-                print(f"   Error: {e}")
+                logger.error("   Error: %s", e)
                 state["rag_search_results"] = []
             break
 
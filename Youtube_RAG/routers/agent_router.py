@@ -1,6 +1,19 @@
 from models.state import AgentState
 import json
+import logging
 from langgraph.graph import END
+from utils.metrics import count
+
+logger = logging.getLogger(__name__)
+
+
+def _route(route: str, reason: str = ""):
+    """Log and count a routing decision."""
+    name = "END" if route == END else route
+    logger.info("[Router] Routing to %s", f"{name} ({reason})" if reason else name)
+    count("graph_route_total", route=name)
+    return route
+
 
 def routers(state: AgentState):
     """Route to appropriate node based on current state."""
@@ -8,13 +21,11 @@ def routers(state: AgentState):
     ai_message = messages[-1] if messages else None
 
     if ai_message and hasattr(ai_message, 'tool_calls') and ai_message.tool_calls:
-        print("[Router] Routing to tool_handler")
-        return "tool_handler"
+        return _route("tool_handler")
 
     if ai_message and hasattr(ai_message, 'content'):
         if not ai_message.content or ai_message.content.strip() == "":
-            print("[Router] Routing to END (empty response)")
-            return END
+            return _route(END, "empty response")
 
     tool_message = None
     for i in range(len(messages) - 1, -1, -1):
@@ -23,8 +34,7 @@ def routers(state: AgentState):
             break
 
     if not tool_message:
-        print("[Router] Routing to END (no tool message)")
-        return END
+        return _route(END, "no tool message")
 
     tool_name = tool_message.name
 
@@ -37,22 +47,17 @@ def routers(state: AgentState):
         else:
             content = tool_message.content
     except (TypeError, AttributeError):
-        print("[Router] Routing to END (parse error)")
-        return END
+        return _route(END, "parse error")
 
     if tool_name == "youtube_video_data_checker":
         if isinstance(content, dict):
             status = content.get("status")
             if status == "not_found":
-                print("[Router] Routing to process_new_video")
-                return "process_new_video"
+                return _route("process_new_video")
             elif status == "found":
-                print("[Router] Routing to process_existing_video")
-                return "process_existing_video"
+                return _route("process_existing_video")
 
     elif tool_name == "perform_rag_search":
-        print("[Router] Routing to handle_rag_search")
-        return "handle_rag_search"
+        return _route("handle_rag_search")
 
-    print("[Router] Routing to END (default)")
-    return END
+    return _route(END, "default")
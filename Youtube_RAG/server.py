@@ -0,0 +1,264 @@
+"""
+HTTP chat service: the same graph as main.py, one conversation per session id.
+
+A plain ASGI application (no web framework needed); serve it with any ASGI
+server, e.g.:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+
+Endpoints:
+    POST /sessions/{session_id}/messages   {"message": "..."} -> SSE stream
+    GET  /sessions/{session_id}            saved history and loaded video
+    GET  /health                           running and queued turns
+    GET  /metrics                          Prometheus metrics (?format=json for JSON)
+
+Answers stream as server-sent events: "token" events carry text as it is
+generated, then one "done" event with the full answer (or an "error" event).
+"""
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import parse_qs
+from typing import Dict, Optional
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from config import settings
+from main import build_graph, _chunk_text
+from utils.checkpointer import SQLiteCheckpointer
+from utils.metrics import count, metrics, trace_request
+from services.job_queue import start_workers
+
+logger = logging.getLogger(__name__)
+
+
+class ChatService:
+    """
+    Runs graph turns for many sessions in one process.
+
+    All sessions share the compiled graph, so they also share the video index
+    cache and API clients. Each session runs one turn at a time (a second
+    message while one is in flight gets 409), and at most max_turns turns run
+    at once; up to max_queued more wait for a slot, beyond that requests get
+    503 so a burst can't pile up unbounded work.
+    """
+
+    def __init__(self, graph=None, max_turns: Optional[int] = None, max_queued: Optional[int] = None):
+        self.graph = graph or build_graph(SQLiteCheckpointer())
+        self.max_turns = max_turns or settings.SERVER_MAX_CONCURRENT_TURNS
+        self.max_queued = settings.SERVER_MAX_QUEUED_TURNS if max_queued is None else max_queued
+        self._slots = None
+        self._busy_sessions = set()
+        self.running = 0
+        self.queued = 0
+
+    def _config(self, session_id: str) -> Dict:
+        return {"configurable": {"thread_id": session_id}}
+
+    def session_busy(self, session_id: str) -> bool:
+        return session_id in self._busy_sessions
+
+    def overloaded(self) -> bool:
+        return self.running >= self.max_turns and self.queued >= self.max_queued
+
+    async def history(self, session_id: str) -> Dict:
+        """Return a session's messages and loaded video from its latest checkpoint."""
+        snapshot = await self.graph.aget_state(self._config(session_id))
+        values = snapshot.values
+        messages = []
+        for message in values.get("messages", []):
+            # Tool calls and results are internal to the agent
+            if isinstance(message, ToolMessage) or not message.content:
+                continue
+            role = "user" if isinstance(message, HumanMessage) else "assistant"
+            messages.append({"role": role, "content": _chunk_text(message)})
+        return {
+            "session_id": session_id,
+            "youtube_video_id": values.get("youtube_video_id"),
+            "ingestion_status": values.get("ingestion_status"),
+            "messages": messages,
+        }
+
+    async def run_turn(self, session_id: str, message: str):
+        """
+        Run one user turn and yield (event, data) pairs as the answer streams.
+
+        Callers check session_busy() and overloaded() first; this claims the
+        session, then waits for a free slot.
+        """
+        if self._slots is None:
+            # Created lazily so it binds to the server's event loop
+            self._slots = asyncio.Semaphore(self.max_turns)
+
+        self._busy_sessions.add(session_id)
+        self.queued += 1
+        waiting = True
+        try:
+            async with self._slots:
+                self.queued -= 1
+                waiting = False
+                self.running += 1
+                try:
+                    async for event in self._stream_turn(session_id, message):
+                        yield event
+                finally:
+                    self.running -= 1
+        finally:
+            if waiting:
+                self.queued -= 1
+            self._busy_sessions.discard(session_id)
+
+    async def _stream_turn(self, session_id: str, message: str):
+        start = time.perf_counter()
+        first_token_at = None
+        answer = ""
+        turn = {"messages": [HumanMessage(content=message)]}
+
+        # Sync nodes run in the event loop's thread pool, so other sessions keep streaming
+        with trace_request(f"{session_id}/{time.time():.3f}", session_id=session_id):
+            async for mode, payload in self.graph.astream(
+                turn, self._config(session_id), stream_mode=["messages", "updates"]
+            ):
+                if mode == "messages":
+                    chunk, metadata = payload
+                    if metadata.get("langgraph_node") != "decision_maker":
+                        continue
+                    text = _chunk_text(chunk)
+                    if text:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        yield "token", {"text": text}
+                else:
+                    for node_name, node_state in payload.items():
+                        if node_name != "decision_maker" or not node_state or not node_state.get("messages"):
+                            continue
+                        response = node_state["messages"][-1]
+                        if isinstance(response, AIMessage) and not response.tool_calls and response.content:
+                            answer = _chunk_text(response)
+                            # Models that don't stream still produce one token event
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                yield "token", {"text": answer}
+
+        total = time.perf_counter() - start
+        yield "done", {
+            "answer": answer,
+            "first_token_seconds": round(first_token_at - start, 3) if first_token_at else None,
+            "total_seconds": round(total, 3),
+        }
+
+
+def _sse(event: str, data: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status: int, payload: Dict, headers=()) -> None:
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_text(send, status: int, text: str, content_type: bytes) -> None:
+    body = text.encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _stream_answer(service: ChatService, session_id: str, message: str, send) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+    })
+    try:
+        async for event, data in service.run_turn(session_id, message):
+            await send({"type": "http.response.body", "body": _sse(event, data), "more_body": True})
+    except Exception as e:
+        count("server_turn_errors_total")
+        logger.exception("Turn failed for session %s", session_id)
+        await send({"type": "http.response.body", "body": _sse("error", {"error": str(e)}), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def create_app(service: Optional[ChatService] = None):
+    """
+    Build the ASGI application.
+
+    Args:
+        service: ChatService to use (default: one created on the first request)
+    """
+    state = {"service": service}
+
+    def get_service() -> ChatService:
+        if state["service"] is None:
+            state["service"] = ChatService()
+        return state["service"]
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    logging.basicConfig(level=settings.LOG_LEVEL, format="%(message)s")
+                    logging.getLogger("httpx").setLevel(logging.WARNING)
+                    get_service()
+                    if settings.INGESTION_QUEUE and settings.INGESTION_WORKERS:
+                        start_workers(settings.INGESTION_WORKERS)
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        method = scope["method"]
+        parts = [part for part in scope["path"].split("/") if part]
+        service = get_service()
+
+        if parts == ["health"] and method == "GET":
+            await _send_json(send, 200, {"status": "ok", "running": service.running, "queued": service.queued})
+        elif parts == ["metrics"] and method == "GET":
+            query = parse_qs(scope.get("query_string", b"").decode())
+            if query.get("format") == ["json"]:
+                await _send_text(send, 200, metrics.to_json(), b"application/json")
+            else:
+                await _send_text(send, 200, metrics.to_prometheus(), b"text/plain; version=0.0.4")
+        elif len(parts) == 2 and parts[0] == "sessions" and method == "GET":
+            await _send_json(send, 200, await service.history(parts[1]))
+        elif len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages" and method == "POST":
+            session_id = parts[1]
+            try:
+                message = str(json.loads(await _read_body(receive) or b"{}").get("message", "")).strip()
+            except (json.JSONDecodeError, AttributeError):
+                message = ""
+            if not message:
+                await _send_json(send, 400, {"error": "Request body must be JSON with a non-empty 'message'"})
+            elif service.session_busy(session_id):
+                await _send_json(send, 409, {"error": f"Session '{session_id}' is already answering a message"})
+            elif service.overloaded():
+                await _send_json(send, 503, {"error": "Too many requests in flight, retry shortly"},
+                                 headers=[(b"retry-after", b"1")])
+            else:
+                await _stream_answer(service, session_id, message, send)
+        else:
+            await _send_json(send, 404, {"error": "Not found"})
+
+    return app
+
+
+app = create_app()
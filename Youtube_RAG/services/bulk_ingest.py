@@ -0,0 +1,288 @@
+"""
+Pre-load the database from a list of videos.
+
+The input file has one YouTube URL, video ID or playlist URL per line (blank
+lines and lines starting with # are ignored). Videos already stored are
+skipped. The rest are processed by a pool of worker processes, through the
+same ingestion_jobs rows and pipeline as the background ingestion queue, so
+a video a chat session's worker is already ingesting is skipped too.
+Downloads, transcriptions and embedding calls each have their own concurrency
+limit, so e.g. many videos can download while only a few upload to Whisper
+at once. With CAPTIONS_FIRST, videos with usable
+captions skip the audio download and transcription (fetching the captions
+counts as their download).
+
+Every finished video is appended to a progress file (<input>.progress.jsonl),
+so running the same command again after an interruption picks up where it
+stopped. Run from the Youtube_RAG directory:
+    python -m services.bulk_ingest videos.txt [--workers 4] [--download 4] [--transcribe 2] [--embed 2]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set
+
+from utils.db_handler import video_exists
+from utils.video_id_retriever import youtube_video_id_retreiver
+
+
+STAGES = ("download", "transcribe", "embed")
+_VIDEO_ID = re.compile(r"[0-9A-Za-z_-]{11}")
+
+# Set in each pool process by _init_worker
+_stage_limits: Dict[str, object] = {}
+
+
+def _expand_playlist(url: str) -> List[str]:
+    """Return the video IDs of a playlist without downloading anything."""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL({"extract_flat": True, "quiet": True, "no_warnings": True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return [entry["id"] for entry in info.get("entries") or [] if entry and entry.get("id")]
+
+
+def read_video_ids(path: str) -> List[str]:
+    """
+    Read video IDs from a file of URLs, IDs and playlist URLs, keeping the first occurrence of each.
+
+    Lines that can't be parsed are reported and skipped.
+    """
+    video_ids = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                if "list=" in line and "v=" not in line:
+                    video_ids.extend(_expand_playlist(line))
+                elif _VIDEO_ID.fullmatch(line):
+                    video_ids.append(line)
+                else:
+                    video_ids.append(youtube_video_id_retreiver(line))
+            except Exception as e:
+                print(f"   Skipping line {line_number}: {e}")
+    return list(dict.fromkeys(video_ids))
+
+
+def load_progress(path: str) -> Dict[str, Dict]:
+    """Return the last recorded result per video from a progress file."""
+    results = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                    results[result["video_id"]] = result
+                except (json.JSONDecodeError, KeyError):
+                    # A line cut short by an interruption
+                    continue
+    return results
+
+
+def _init_worker(limits: Dict[str, object]) -> None:
+    _stage_limits.update(limits)
+
+
+# Progress stages reported by save_new_video_to_db, and the concurrency limit each one counts against
+_STAGE_OF_PROGRESS = {
+    "fetching captions": "download",
+    "downloading": "download",
+    "transcribing": "transcribe",
+    "embedding": "embed",
+}
+
+
+class _StageLimiter:
+    """
+    Progress callback for save_new_video_to_db that moves the video between stage limits.
+
+    Each reported stage waits for a slot in its limit (releasing the previous
+    one) and is timed; stages that repeat, like fetching captions and then
+    downloading audio, add up.
+    """
+
+    def __init__(self, video_id: str, timings: Dict[str, float]):
+        self.video_id = video_id
+        self.timings = timings
+        self.stage: Optional[str] = None
+        self.started = 0.0
+
+    def __call__(self, stage: str, fraction: float, detail: str = "") -> None:
+        from services.job_queue import report_progress
+
+        report_progress(self.video_id, stage, fraction, detail)
+        limited = _STAGE_OF_PROGRESS.get(stage)
+        if limited == self.stage:
+            return
+        self.release()
+        if limited:
+            _stage_limits[limited].acquire()
+            self.stage, self.started = limited, time.perf_counter()
+
+    def release(self) -> None:
+        """Leave the current stage's limit, if in one."""
+        if self.stage:
+            seconds = time.perf_counter() - self.started
+            self.timings[self.stage] = round(self.timings.get(self.stage, 0.0) + seconds, 2)
+            _stage_limits[self.stage].release()
+            self.stage = None
+
+
+def ingest_video(video_id: str) -> Dict:
+    """
+    Ingest one video through the ingestion job queue (runs in a pool process).
+
+    The video's ingestion_jobs row is claimed first, so a video a chat session's
+    worker is already ingesting is skipped rather than processed twice.
+
+    Returns:
+        Dict with video_id, status ('done', 'failed' or 'skipped'), source
+        (transcript_source), audio_seconds, stage timings in seconds and error
+    """
+    # Only pool processes need the ingestion dependencies
+    from services.db_data_saver import save_new_video_to_db
+    from services.job_queue import claim_video, finish_job, job_heartbeat
+
+    timings: Dict[str, float] = {}
+    result = {"video_id": video_id, "status": "skipped", "source": None, "audio_seconds": 0.0,
+              "timings": timings, "error": None}
+    if video_exists(video_id) or not claim_video(video_id, f"bulk-{os.getpid()}"):
+        return result
+
+    limiter = _StageLimiter(video_id, timings)
+    try:
+        with job_heartbeat(video_id):
+            response = save_new_video_to_db(video_id, limiter)
+        limiter.release()
+        finish_job(video_id)
+        result.update(status="done", source=response["transcript_source"],
+                      audio_seconds=response["audio_seconds"] or 0.0)
+
+    except Exception as e:
+        limiter.release()
+        result.update(status="failed", error=str(e) or type(e).__name__)
+        finish_job(video_id, error=result["error"])
+    return result
+
+
+def run_bulk_ingest(
+    input_path: str,
+    workers: int = 4,
+    stage_limits: Optional[Dict[str, int]] = None,
+    retry_failed: bool = False,
+    progress_path: Optional[str] = None
+) -> Dict:
+    """
+    Ingest every new video listed in input_path and print a throughput summary.
+
+    Args:
+        input_path: File of URLs, video IDs or playlist URLs
+        workers: Pool processes (videos in flight)
+        stage_limits: Max concurrent videos per stage ("download", "transcribe", "embed")
+        retry_failed: Also retry videos recorded as failed by an earlier run
+        progress_path: Progress file (default: <input_path>.progress.jsonl)
+
+    Returns:
+        Summary dict (counts, elapsed seconds, videos/hour, audio minutes/second)
+    """
+    progress_path = progress_path or f"{input_path}.progress.jsonl"
+    stage_limits = {stage: workers for stage in STAGES} | (stage_limits or {})
+
+    video_ids = read_video_ids(input_path)
+    previous = load_progress(progress_path)
+    skip: Set[str] = set()
+    for video_id in video_ids:
+        recorded = previous.get(video_id, {}).get("status")
+        if recorded == "done" or (recorded == "failed" and not retry_failed):
+            skip.add(video_id)
+        elif video_exists(video_id):
+            skip.add(video_id)
+    todo = [video_id for video_id in video_ids if video_id not in skip]
+
+    print(f"{len(video_ids)} videos listed, {len(skip)} already stored or recorded, {len(todo)} to ingest")
+    print(f"   {workers} workers; concurrent per stage: "
+          + ", ".join(f"{stage} {limit}" for stage, limit in stage_limits.items()))
+
+    context = multiprocessing.get_context("spawn")
+    limits = {stage: context.BoundedSemaphore(limit) for stage, limit in stage_limits.items()}
+    counts = {"done": 0, "failed": 0, "skipped": 0}
+    audio_seconds = 0.0
+    stage_seconds = {stage: 0.0 for stage in STAGES}
+    sources: Dict[str, int] = {}
+    start = time.perf_counter()
+
+    with open(progress_path, "a", encoding="utf-8") as progress, ProcessPoolExecutor(
+        max_workers=max(1, workers), mp_context=context, initializer=_init_worker, initargs=(limits,)
+    ) as pool:
+        futures = {pool.submit(ingest_video, video_id): video_id for video_id in todo}
+        try:
+            for i, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                progress.write(json.dumps(result) + "\n")
+                progress.flush()
+
+                counts[result["status"]] += 1
+                if result["status"] == "done":
+                    audio_seconds += result["audio_seconds"]
+                    sources[result["source"]] = sources.get(result["source"], 0) + 1
+                    for stage, seconds in result["timings"].items():
+                        stage_seconds[stage] += seconds
+                    print(f"   [{i}/{len(todo)}] {result['video_id']}: {result['audio_seconds'] / 60:.1f} min audio "
+                          f"from {result['source']}, "
+                          + ", ".join(f"{stage} {seconds:.0f}s" for stage, seconds in result["timings"].items()))
+                elif result["status"] == "skipped":
+                    print(f"   [{i}/{len(todo)}] {result['video_id']}: being ingested by another worker, skipped")
+                else:
+                    print(f"   [{i}/{len(todo)}] {result['video_id']} failed: {result['error']}")
+        except KeyboardInterrupt:
+            print("\nInterrupted; finished videos are recorded, run the same command to resume")
+            for future in futures:
+                future.cancel()
+            raise
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "listed": len(video_ids),
+        **counts,
+        "skipped": len(skip) + counts["skipped"],
+        "elapsed_seconds": round(elapsed, 1),
+        "videos_per_hour": round(counts["done"] / elapsed * 3600, 1) if elapsed else 0.0,
+        "audio_minutes_per_second": round(audio_seconds / 60 / elapsed, 3) if elapsed else 0.0,
+        "stage_seconds": {stage: round(seconds, 1) for stage, seconds in stage_seconds.items()},
+        "sources": sources,
+    }
+    print(f"\nDone: {counts['done']} ingested, {counts['failed']} failed, {summary['skipped']} skipped in {elapsed:.0f}s")
+    print(f"   {summary['videos_per_hour']} videos/hour, {summary['audio_minutes_per_second']} audio-minutes/second "
+          f"({audio_seconds / 60:.1f} min of audio)")
+    print("   Time spent per stage (summed over videos): "
+          + ", ".join(f"{stage} {seconds:.0f}s" for stage, seconds in summary["stage_seconds"].items()))
+    if sources:
+        print("   Transcripts from: " + ", ".join(f"{source} {n}" for source, n in sources.items()))
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest a list of YouTube videos into the database.")
+    parser.add_argument("input", help="File with one YouTube URL, video ID or playlist URL per line")
+    parser.add_argument("--workers", type=int, default=4, help="Videos processed at once")
+    for stage in STAGES:
+        parser.add_argument(f"--{stage}", type=int, help=f"Max videos in the {stage} stage at once (default: workers)")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry videos that failed in an earlier run")
+    parser.add_argument("--progress", help="Progress file (default: <input>.progress.jsonl)")
+    args = parser.parse_args()
+
+    limits = {stage: getattr(args, stage) for stage in STAGES if getattr(args, stage)}
+    try:
+        run_bulk_ingest(args.input, args.workers, limits, args.retry_failed, args.progress)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
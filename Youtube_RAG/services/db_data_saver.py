@@ -1,31 +1,44 @@
-from utils.audio_retriver import get_audio_from_youtube
-from utils.speech_to_text import audio_to_text
+from services.transcripts import fetch_transcript
 from utils.embeddings import create_embeddings
-from utils.chunking import semantic_chunking
+from utils.chunking import token_chunking
 from utils.db_handler import store_video_data
 
-def save_new_video_to_db(youtube_video_id: str) -> dict:
-    """Process a new YouTube video: retrieve audio, transcribe, chunk, embed, and store in DB."""
-    print("Downloading audio from YouTube...")
-    youtube_url = f"https://www.youtube.com/watch?v={youtube_video_id}"
-    audio_bytes = get_audio_from_youtube(youtube_url)
+def save_new_video_to_db(youtube_video_id: str, progress=None) -> dict:
+    """
+    Process a new YouTube video: retrieve audio, transcribe, chunk, embed, and store in DB.
+
+    With CAPTIONS_FIRST, a usable caption track replaces the audio download and
+    transcription; the result says which was used. With progress, the
+    result's audio_seconds also holds the length of transcribed audio.
 
-    print("Transcribing audio to text...")
-    transcript = audio_to_text(audio_bytes)
+    Args:
+        youtube_video_id: The video to ingest
+        progress: Optional callable(stage, fraction, detail) told as each stage starts
+    """
+    report = progress or (lambda stage, fraction, detail="": None)
+    youtube_url = f"https://www.youtube.com/watch?v={youtube_video_id}"
+    transcript = fetch_transcript(youtube_url, progress)
 
-    print("Creating semantic chunks...")
-    chunks = semantic_chunking(transcript)
+    print("Creating token-sized chunks...")
+    chunks = [chunk.text for chunk in token_chunking(transcript.text)]
 
     print("Generating embeddings...")
+    report("embedding", 0.8, f"{len(chunks)} chunks")
     vectors = create_embeddings(chunks)
 
     print("Storing in database...")
-    store_video_data(youtube_video_id, transcript, vectors, summary=None, chunks=chunks)
+    report("storing", 0.95, "")
+    if not store_video_data(youtube_video_id, transcript.text, vectors, summary=None, chunks=chunks,
+                            transcript_source=transcript.source, transcript_segments=transcript.segments):
+        raise RuntimeError(f"Could not store video data for {youtube_video_id}")
 
     print("Video processed successfully!")
     return {
         "youtube_video_id": youtube_video_id,
-        "transcript": transcript,
+        "transcript": transcript.text,
+        "transcript_source": transcript.source,
+        "segments": transcript.segments,
+        "audio_seconds": transcript.duration,
         "vectors": vectors,
         "chunks": chunks,
         "summary": None,
@@ -0,0 +1,262 @@
+"""
+Persistent background ingestion queue.
+
+Jobs live in the ingestion_jobs table, one row per video, so a video is only
+ever ingested once no matter how many sessions (or processes) ask for it.
+Worker processes claim queued jobs, run the ingestion pipeline and record
+each stage's progress in the row. Jobs left 'running' by a worker that died
+are picked up again once their heartbeat is JOB_STALE_SECONDS old.
+
+Workers are started by main.py / server.py (INGESTION_WORKERS), or on their own:
+    python -m services.job_queue [workers]
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from config import settings
+from utils.db_handler import get_connection, video_exists
+
+
+HEARTBEAT_SECONDS = 30.0
+POLL_SECONDS = 1.0
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+_COLUMNS = ("video_id", "status", "stage", "progress", "detail", "error", "attempts", "worker",
+            "created_at", "updated_at")
+
+
+def _connection():
+    global _schema_ready
+    conn = get_connection()
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                with conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                            video_id TEXT PRIMARY KEY,
+                            status TEXT NOT NULL,
+                            stage TEXT,
+                            progress REAL NOT NULL DEFAULT 0,
+                            detail TEXT,
+                            error TEXT,
+                            attempts INTEGER NOT NULL DEFAULT 0,
+                            worker TEXT,
+                            created_at REAL NOT NULL,
+                            updated_at REAL NOT NULL,
+                            heartbeat_at REAL
+                        )
+                    """)
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs (status, created_at)")
+                _schema_ready = True
+    return conn
+
+
+def get_job(video_id: str) -> Optional[Dict]:
+    """
+    Return a video's ingestion job.
+
+    Returns:
+        Dict with video_id, status (queued/running/complete/failed), stage,
+        progress (0-1), detail, error, attempts, worker, created_at, updated_at;
+        None if the video was never queued
+    """
+    row = _connection().execute(
+        f"SELECT {', '.join(_COLUMNS)} FROM ingestion_jobs WHERE video_id = ?", (video_id,)
+    ).fetchone()
+    return dict(zip(_COLUMNS, row)) if row else None
+
+
+def enqueue_ingestion(video_id: str) -> Dict:
+    """
+    Queue a video for ingestion unless it is stored, queued or running already.
+
+    Concurrent requests for the same video share one job; failed jobs are queued again.
+
+    Returns:
+        The video's job (see get_job); status 'complete' if the video is already stored
+    """
+    now = time.time()
+    if video_exists(video_id):
+        job = get_job(video_id)
+        return job if job and job["status"] == "complete" else {
+            "video_id": video_id, "status": "complete", "stage": "complete", "progress": 1.0,
+            "detail": None, "error": None, "attempts": 0, "worker": None, "created_at": now, "updated_at": now,
+        }
+
+    with _connection() as conn:
+        # The primary key makes this single-flight: only a finished job is reset
+        conn.execute("""
+            INSERT INTO ingestion_jobs (video_id, status, stage, progress, created_at, updated_at)
+            VALUES (?, 'queued', 'queued', 0, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                status = 'queued', stage = 'queued', progress = 0, detail = NULL, error = NULL,
+                worker = NULL, created_at = excluded.created_at, updated_at = excluded.updated_at
+            WHERE ingestion_jobs.status IN ('failed', 'complete')
+        """, (video_id, now, now))
+    return get_job(video_id)
+
+
+def claim_job(worker: str) -> Optional[str]:
+    """Atomically take the oldest queued (or abandoned) job for a worker and return its video_id."""
+    now = time.time()
+    with _connection() as conn:
+        row = conn.execute("""
+            UPDATE ingestion_jobs
+            SET status = 'running', worker = ?, attempts = attempts + 1, updated_at = ?, heartbeat_at = ?
+            WHERE video_id = (
+                SELECT video_id FROM ingestion_jobs
+                WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?)
+                ORDER BY created_at LIMIT 1
+            )
+            RETURNING video_id
+        """, (worker, now, now, now - settings.JOB_STALE_SECONDS)).fetchone()
+    return row[0] if row else None
+
+
+def claim_video(video_id: str, worker: str) -> bool:
+    """
+    Atomically take a specific video's job for a worker outside the queue (e.g. bulk ingestion).
+
+    A queued job is taken over; one another worker is running is left alone
+    unless it was abandoned.
+
+    Returns:
+        True if the caller now runs the job and must finish_job it
+    """
+    now = time.time()
+    with _connection() as conn:
+        row = conn.execute("""
+            INSERT INTO ingestion_jobs (video_id, status, stage, progress, attempts, worker, created_at, updated_at, heartbeat_at)
+            VALUES (?, 'running', 'queued', 0, 1, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                status = 'running', stage = 'queued', progress = 0, detail = NULL, error = NULL,
+                worker = excluded.worker, attempts = ingestion_jobs.attempts + 1,
+                updated_at = excluded.updated_at, heartbeat_at = excluded.heartbeat_at
+            WHERE ingestion_jobs.status != 'running' OR ingestion_jobs.heartbeat_at < ?
+            RETURNING video_id
+        """, (video_id, worker, now, now, now, now - settings.JOB_STALE_SECONDS)).fetchone()
+    return row is not None
+
+
+def report_progress(video_id: str, stage: str, progress: float, detail: str = "") -> None:
+    """Record the stage a running job has reached (also refreshes its heartbeat)."""
+    now = time.time()
+    with _connection() as conn:
+        conn.execute("""
+            UPDATE ingestion_jobs SET stage = ?, progress = ?, detail = ?, updated_at = ?, heartbeat_at = ?
+            WHERE video_id = ? AND status = 'running'
+        """, (stage, progress, detail or None, now, now, video_id))
+
+
+def finish_job(video_id: str, error: Optional[str] = None) -> None:
+    """Mark a job complete, or failed with an error message."""
+    now = time.time()
+    with _connection() as conn:
+        if error:
+            conn.execute("""
+                UPDATE ingestion_jobs SET status = 'failed', error = ?, updated_at = ? WHERE video_id = ?
+            """, (error, now, video_id))
+        else:
+            conn.execute("""
+                UPDATE ingestion_jobs SET status = 'complete', stage = 'complete', progress = 1, detail = NULL,
+                    error = NULL, updated_at = ? WHERE video_id = ?
+            """, (now, video_id))
+
+
+def _heartbeat(video_id: str, stop: threading.Event) -> None:
+    while not stop.wait(HEARTBEAT_SECONDS):
+        with _connection() as conn:
+            conn.execute("UPDATE ingestion_jobs SET heartbeat_at = ? WHERE video_id = ? AND status = 'running'",
+                         (time.time(), video_id))
+
+
+@contextmanager
+def job_heartbeat(video_id: str) -> Iterator[None]:
+    """Keep a claimed job's heartbeat fresh while the block runs, through stages that report no progress for a while."""
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(video_id, stop), daemon=True).start()
+    try:
+        yield
+    finally:
+        stop.set()
+
+
+def run_job(video_id: str) -> None:
+    """Ingest one claimed video, reporting progress; raises if ingestion fails."""
+    # Ingestion pulls in yt-dlp, Whisper and embedding clients; only workers need them
+    from services.db_data_saver import save_new_video_to_db
+    from services.streaming_ingestion import start_streaming_ingestion
+
+    def progress(stage: str, fraction: float, detail: str = "") -> None:
+        report_progress(video_id, stage, fraction, detail)
+
+    if settings.STREAMING_INGESTION:
+        # Rows become searchable segment by segment while the job runs
+        job = start_streaming_ingestion(video_id, progress)
+        job.wait()
+        if job.error:
+            raise job.error
+    else:
+        save_new_video_to_db(video_id, progress)
+
+
+def run_worker(name: Optional[str] = None, poll_seconds: float = POLL_SECONDS, max_jobs: Optional[int] = None) -> int:
+    """
+    Process queued jobs until stopped (or until max_jobs have run).
+
+    Returns:
+        Number of jobs processed
+    """
+    name = name or f"worker-{os.getpid()}"
+    processed = 0
+    print(f"[Ingestion] {name} waiting for jobs")
+    while max_jobs is None or processed < max_jobs:
+        try:
+            video_id = claim_job(name)
+        except Exception as e:
+            print(f"Error: {e}")
+            video_id = None
+        if video_id is None:
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"[Ingestion] {name} processing {video_id}")
+        try:
+            with job_heartbeat(video_id):
+                run_job(video_id)
+            finish_job(video_id)
+            print(f"[Ingestion] {video_id} complete")
+        except Exception as e:
+            finish_job(video_id, error=str(e) or type(e).__name__)
+            print(f"Error: {e}")
+        processed += 1
+    return processed
+
+
+def start_workers(count: int) -> List[multiprocessing.Process]:
+    """Start worker processes in the background; they exit with the parent process."""
+    # Spawned rather than forked: the parent may already be running threads
+    context = multiprocessing.get_context("spawn")
+    workers = []
+    for i in range(count):
+        process = context.Process(target=run_worker, args=(f"worker-{os.getpid()}-{i}",), daemon=True)
+        process.start()
+        workers.append(process)
+    return workers
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else max(settings.INGESTION_WORKERS, 1)
+    processes = start_workers(count)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
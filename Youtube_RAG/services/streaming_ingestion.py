@@ -0,0 +1,132 @@
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from services.transcripts import ProgressCallback, fetch_transcript
+from utils.embeddings import create_embeddings
+from utils.chunking import StreamingChunker
+from utils.db_handler import begin_video_ingest, append_video_data, finish_video_ingest
+from utils.index_cache import VideoIndex, build_video_index, video_index_cache
+
+
+class StreamingIngestion:
+    """
+    Ingest a video in the background, making it searchable segment by segment.
+
+    Each transcribed segment is chunked, embedded, appended to the stored row
+    and appended to a growing VideoIndex in the shared cache, so questions about
+    the start of a video can be answered while the rest is still processing.
+    With CAPTIONS_FIRST, a usable caption track is indexed the same way in
+    place of the transcribed audio.
+
+    Pass progress to be told each stage and how much of the video is indexed.
+    """
+
+    def __init__(self, youtube_video_id: str, progress: Optional[ProgressCallback] = None):
+        self.youtube_video_id = youtube_video_id
+        self.progress = progress
+        self.index: VideoIndex = build_video_index(
+            youtube_video_id, np.zeros((0, 0), dtype=np.float32), [], complete=False
+        )
+        self.status = "pending"
+        self.error: Optional[Exception] = None
+        self.segments_done = 0
+        self.transcript_source: Optional[str] = None
+        self._searchable = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"ingest-{youtube_video_id}", daemon=True
+        )
+
+    def start(self) -> "StreamingIngestion":
+        self.status = "processing"
+        self._thread.start()
+        return self
+
+    def wait_until_searchable(self, timeout: Optional[float] = None) -> bool:
+        """Block until the first chunks are indexed or ingestion ended. Returns False on timeout."""
+        return self._searchable.wait(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until ingestion finished. Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def _report(self, stage: str, fraction: float, detail: str = "") -> None:
+        if self.progress is not None:
+            self.progress(stage, fraction, detail)
+
+    def _run(self) -> None:
+        try:
+            youtube_url = f"https://www.youtube.com/watch?v={self.youtube_video_id}"
+            chunker = StreamingChunker()
+
+            def index_segment(segment: Dict, transcript_source: str) -> None:
+                if self.transcript_source is None:
+                    self._begin(transcript_source)
+                self._add(segment["text"], chunker.feed(segment["text"]))
+                self.segments_done += 1
+                print(f"   Segment {self.segments_done} indexed ({len(self.index.chunks)} chunks so far)")
+
+            transcript = fetch_transcript(youtube_url, self.progress, on_segment=index_segment)
+            if self.transcript_source is None:
+                self._begin(transcript.source)
+
+            self._report("storing", 1.0)
+            self._add("", chunker.flush())
+            finish_video_ingest(self.youtube_video_id, transcript_segments=transcript.segments)
+            self.index.complete = True
+            self.status = "complete"
+            print("Video processed successfully!")
+
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+            video_index_cache.invalidate(self.youtube_video_id)
+            print(f"Error: {e}")
+
+        finally:
+            with _active_lock:
+                if _active.get(self.youtube_video_id) is self:
+                    del _active[self.youtube_video_id]
+            self._searchable.set()
+            self._done.set()
+
+    def _begin(self, transcript_source: str) -> None:
+        if not begin_video_ingest(self.youtube_video_id, transcript_source):
+            raise RuntimeError(f"Could not start ingest for {self.youtube_video_id}")
+        self.transcript_source = transcript_source
+        video_index_cache.put(self.index)
+
+    def _add(self, transcript_text: str, chunks: List[str]) -> None:
+        vectors = create_embeddings(chunks) if chunks else []
+        if not append_video_data(self.youtube_video_id, transcript_text, chunks, vectors):
+            raise RuntimeError(f"Could not append data for {self.youtube_video_id}")
+        self.index.append(vectors, chunks, transcript_text)
+        # Re-put so the cache accounts for the grown index
+        video_index_cache.put(self.index)
+        if chunks:
+            self._searchable.set()
+
+
+_active: Dict[str, StreamingIngestion] = {}
+_active_lock = threading.Lock()
+
+
+def start_streaming_ingestion(youtube_video_id: str, progress: Optional[ProgressCallback] = None) -> StreamingIngestion:
+    """Start ingesting a video, or return the ingestion already running for it in this process."""
+    with _active_lock:
+        job = _active.get(youtube_video_id)
+        if job is None:
+            job = StreamingIngestion(youtube_video_id, progress)
+            _active[youtube_video_id] = job
+            job.start()
+        return job
+
+
+def get_active_ingestion(youtube_video_id: str) -> Optional[StreamingIngestion]:
+    """Return the in-progress ingestion for a video, if any."""
+    with _active_lock:
+        return _active.get(youtube_video_id)
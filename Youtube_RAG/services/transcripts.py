@@ -0,0 +1,94 @@
+from typing import Callable, Dict, List, NamedTuple, Optional
+from config import settings
+from utils.audio_retriver import youtube_audio_file
+from utils.audio_segmenter import probe_duration
+from utils.captions import fetch_captions, group_segments
+from utils.speech_to_text import audio_to_text, iter_transcribed_segments, iter_stitched_segments, SEGMENT_SECONDS
+
+# Called with (stage, fraction of the video done, detail)
+ProgressCallback = Callable[[str, float, str], None]
+# Called with each timed {start, end, text} segment and the transcript source
+SegmentCallback = Callable[[Dict, str], None]
+
+
+class Transcript(NamedTuple):
+    text: str
+    # 'manual_captions', 'auto_captions' or 'whisper'
+    source: str
+    # Timed {start, end, text} lines; None when the audio was transcribed in one piece
+    segments: Optional[List[Dict]]
+    # Length of the video in seconds; None when it wasn't measured
+    duration: Optional[float]
+
+
+def fetch_transcript(
+    youtube_url: str,
+    progress: Optional[ProgressCallback] = None,
+    on_segment: Optional[SegmentCallback] = None
+) -> Transcript:
+    """
+    Get a video's transcript from its YouTube captions, or by transcribing its audio with Whisper.
+
+    With CAPTIONS_FIRST, a usable caption track (see utils/captions.py) is used
+    and the audio is never downloaded.
+
+    Args:
+        youtube_url: The YouTube video URL
+        progress: Optional callable(stage, fraction, detail) told as each stage starts
+        on_segment: Optional callable(segment, source) given the transcript piece
+            by piece as it becomes available: caption lines in windows of about
+            SEGMENT_SECONDS, or each transcribed audio segment. progress is told
+            how much of the video is done after each one.
+
+    Returns:
+        Transcript (text, source, segments, duration); the duration of
+        transcribed audio is only measured when progress is given
+    """
+    report = progress or (lambda stage, fraction, detail="": None)
+    captions = None
+    if settings.CAPTIONS_FIRST:
+        print("Fetching captions from YouTube...")
+        report("fetching captions", 0.0, "")
+        captions = fetch_captions(
+            youtube_url,
+            languages=settings.CAPTION_LANGUAGES,
+            allow_auto=settings.CAPTION_ALLOW_AUTO,
+            min_words_per_minute=settings.CAPTION_MIN_WORDS_PER_MINUTE
+        )
+
+    if captions:
+        source = captions["source"]
+        print(f"   Using {source.replace('_', ' ')} ({captions['language']})")
+        if on_segment is not None:
+            # Caption lines come in seconds-long pieces; hand them on in transcription-sized windows
+            windows = group_segments(captions["segments"], SEGMENT_SECONDS)
+            _feed(windows, source, on_segment, report, "embedding", windows[-1]["end"] if windows else 0.0)
+        return Transcript(captions["text"], source, captions["segments"], captions["segments"][-1]["end"])
+
+    print("Downloading audio from YouTube...")
+    report("downloading", 0.0, "")
+    # The audio stays on disk (ASR profile) and is removed once transcribed
+    with youtube_audio_file(youtube_url) as audio_path:
+        print("Transcribing audio to text...")
+        duration = probe_duration(audio_path) if progress else None
+        report("transcribing", 0.1 if on_segment is None else 0.0, "")
+        if on_segment is None:
+            return Transcript(audio_to_text(audio_path), "whisper", None, duration)
+
+        segments = _feed(iter_stitched_segments(iter_transcribed_segments(audio_path)),
+                         "whisper", on_segment, report, "transcribing", duration)
+    return Transcript(" ".join(segment["text"] for segment in segments if segment["text"]), "whisper",
+                      segments, duration)
+
+
+def _feed(segments, source: str, on_segment: SegmentCallback, report: ProgressCallback,
+          stage: str, duration: Optional[float]) -> List[Dict]:
+    """Pass segments to on_segment in order, reporting progress after each; returns them."""
+    done = []
+    for segment in segments:
+        on_segment(segment, source)
+        done.append(segment)
+        if duration:
+            report(stage, min(segment["end"] / duration, 1.0),
+                   f"{segment['end'] / 60:.1f} of {duration / 60:.1f} min searchable")
+    return done
@@ -1,7 +1,8 @@
 from langchain.tools import tool
 import json
 from utils.video_id_retriever import youtube_video_id_retreiver
-from utils.db_handler import retrieve_video_data
+from utils.db_handler import video_exists
+from services.streaming_ingestion import get_active_ingestion
 
 @tool
 def youtube_video_data_checker(youtube_video_url: str) -> dict:
@@ -11,8 +12,9 @@ def youtube_video_data_checker(youtube_video_url: str) -> dict:
         youtube_video_url (str): The URL of the YouTube video.
     """
     youtube_video_id = youtube_video_id_retreiver(youtube_video_url)
-    video_data = retrieve_video_data(youtube_video_id)
-    if video_data is not None:
+    # A partially streamed row only counts while its ingestion is still running here;
+    # rows left behind by an interrupted ingestion are processed again
+    if video_exists(youtube_video_id) or get_active_ingestion(youtube_video_id):
         return {"status": "found", "video_id": youtube_video_id}
     return {"status": "not_found", "video_id": youtube_video_id}
 
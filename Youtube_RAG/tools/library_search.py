@@ -0,0 +1,19 @@
+import json
+from typing import List, Optional
+from langchain.tools import tool
+from utils.rag_search import search_library
+
+@tool
+def search_video_library(query: str, video_ids: Optional[List[str]] = None) -> str:
+    """Search across ALL processed videos to find which videos talk about a topic.
+    
+    Args:
+        query(str): The topic or question to look for across the video library.
+        video_ids(list[str], optional): Only search these YouTube video IDs.
+    """
+    results = search_library(query, video_ids=video_ids)
+    return json.dumps({
+        "query": query,
+        "status": "found" if results else "no_results",
+        "results": results
+    })
@@ -1,14 +1,18 @@
 import json
+from typing import List, Optional
 from langchain.tools import tool
 
 @tool
-def perform_rag_search(query: str) -> str:
+def perform_rag_search(query: str, additional_queries: Optional[List[str]] = None) -> str:
     """Perform RAG search on the loaded video.
     
     Args:
         query(str): Query given by the user to that is to be used in RAG Search.
+        additional_queries(list[str], optional): Other questions asked in the same message,
+            or alternative phrasings of the query. All queries are searched together.
     """
     return json.dumps({
         "query": query,
+        "additional_queries": additional_queries or [],
         "status": "search_requested"
     })
@@ -0,0 +1,369 @@
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .vector_codec import normalize_rows
+
+
+# Below this many vectors a single exhaustive list beats probing clusters
+MIN_TRAIN_ROWS = 1024
+MAX_LISTS = 4096
+SAMPLE_PER_LIST = 64
+ASSIGN_BATCH = 4096
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k highest scores along the last axis, best first.
+
+    Uses argpartition, so only the k winners are sorted. Works on a single
+    score vector or on a (num_queries, n) score matrix.
+    """
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(scores, -k, axis=-1)[..., -k:]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    order = np.argsort(np.take_along_axis(scores, candidates, axis=-1), axis=-1)[..., ::-1]
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the nearest centroid (by dot product) for each unit-length row."""
+    assignments = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), ASSIGN_BATCH):
+        batch = matrix[start:start + ASSIGN_BATCH]
+        assignments[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(
+    data: np.ndarray,
+    num_clusters: int,
+    iterations: int = 10,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Cluster unit-length vectors by cosine similarity.
+
+    Args:
+        data: (n, dim) L2-normalized float32 rows
+        num_clusters: Number of centroids (at most n)
+        iterations: Lloyd iterations to run
+        seed: Seed for the initial centroids and for reseeding empty clusters
+
+    Returns:
+        (num_clusters, dim) L2-normalized centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), num_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = _assign(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        counts = np.bincount(assignments, minlength=num_clusters)
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        centroids = normalize_rows(sums).astype(np.float32, copy=False)
+
+    return centroids
+
+
+class _InvertedList:
+    """Vectors assigned to one centroid, stored in amortized-growth buffers."""
+
+    __slots__ = ("vectors", "video_idx", "chunk_idx", "size")
+
+    def __init__(self, dim: int):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.video_idx = np.empty(0, dtype=np.int32)
+        self.chunk_idx = np.empty(0, dtype=np.int32)
+        self.size = 0
+
+    def add(self, vectors: np.ndarray, video_idx: np.ndarray, chunk_idx: np.ndarray) -> None:
+        needed = self.size + len(vectors)
+        if needed > len(self.vectors):
+            capacity = max(needed, 2 * len(self.vectors), 16)
+            for name in self.__slots__[:3]:
+                old = getattr(self, name)
+                grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+                grown[:self.size] = old[:self.size]
+                setattr(self, name, grown)
+
+        self.vectors[self.size:needed] = vectors
+        self.video_idx[self.size:needed] = video_idx
+        self.chunk_idx[self.size:needed] = chunk_idx
+        self.size = needed
+
+    def remove_video(self, video_idx: int) -> None:
+        keep = self.video_idx[:self.size] != video_idx
+        if keep.all():
+            return
+        kept = int(keep.sum())
+        for name in self.__slots__[:3]:
+            buffer = getattr(self, name)
+            buffer[:kept] = buffer[:self.size][keep]
+        self.size = kept
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self.vectors[:self.size], self.video_idx[:self.size], self.chunk_idx[:self.size]
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over chunk vectors of many videos.
+
+    Vectors are clustered with spherical k-means; a search scores the query
+    against the centroids and scans only the `nprobe` closest lists. Until
+    MIN_TRAIN_ROWS vectors are stored the index is a single exhaustive list.
+    It retrains itself once it has grown 4x past the size it was trained on.
+    """
+
+    def __init__(self, nprobe: int = 8):
+        self.nprobe = nprobe
+        self.dim = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_rows = 0
+        self.lists: List[_InvertedList] = []
+        self.video_keys: List[str] = []
+        self.versions: Dict[str, str] = {}
+        self._video_lookup: Dict[str, int] = {}
+        self._row_counts: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return sum(self._row_counts.values())
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._row_counts
+
+    def add(self, video_id: str, vectors, version: Optional[str] = None) -> None:
+        """
+        Insert (or replace) the chunk vectors of one video.
+
+        Args:
+            video_id: YouTube video ID
+            vectors: (num_chunks, dim) vectors; row i is chunk i of the video
+            version: Opaque marker (e.g. the row's revision) used to detect stale entries
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self.remove(video_id)
+            if matrix.size == 0:
+                return
+            if matrix.ndim != 2:
+                raise ValueError("Vectors must be a 2-D sequence")
+            if not self.dim:
+                self.dim = matrix.shape[1]
+                self.lists = [_InvertedList(self.dim)]
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Dimension mismatch: index {self.dim}, video {matrix.shape[1]}")
+
+            matrix = normalize_rows(matrix).astype(np.float32, copy=False)
+            video_idx = self._video_lookup.get(video_id)
+            if video_idx is None:
+                video_idx = self._video_lookup[video_id] = len(self.video_keys)
+                self.video_keys.append(video_id)
+
+            self._insert(matrix, np.full(len(matrix), video_idx, dtype=np.int32),
+                         np.arange(len(matrix), dtype=np.int32))
+            self._row_counts[video_id] = len(matrix)
+            self.versions[video_id] = version
+
+            total = len(self)
+            if total >= MIN_TRAIN_ROWS and total > 4 * self.trained_rows:
+                self.train()
+
+    def remove(self, video_id: str) -> None:
+        """Drop every vector of a video."""
+        with self._lock:
+            if self._row_counts.pop(video_id, None) is None:
+                return
+            self.versions.pop(video_id, None)
+            video_idx = self._video_lookup[video_id]
+            for inverted_list in self.lists:
+                inverted_list.remove_video(video_idx)
+
+    def train(self, num_lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Re-cluster every stored vector and rebuild the inverted lists.
+
+        Args:
+            num_lists: Number of clusters (default: about sqrt of the vector count)
+            iterations: k-means iterations
+            seed: Random seed for reproducible clustering
+        """
+        with self._lock:
+            vectors, video_idx, chunk_idx = self._all_rows()
+            total = len(vectors)
+            if total == 0:
+                return
+            num_lists = min(num_lists or int(np.sqrt(total)), MAX_LISTS, total)
+
+            rng = np.random.default_rng(seed)
+            sample_size = min(total, num_lists * SAMPLE_PER_LIST)
+            sample = vectors[rng.choice(total, sample_size, replace=False)]
+
+            self.centroids = spherical_kmeans(sample, num_lists, iterations, seed)
+            self.trained_rows = total
+            self.lists = [_InvertedList(self.dim) for _ in range(num_lists)]
+            self._insert(vectors, video_idx, chunk_idx)
+
+    def search(
+        self,
+        query,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        video_ids: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, int, float]]:
+        """
+        Find the chunks most similar to a query vector.
+
+        Args:
+            query: Query embedding
+            top_k: Number of results
+            nprobe: Lists to scan (default: self.nprobe); more is slower but more accurate
+            video_ids: Restrict results to these videos. Filtered searches scan
+                every list, so they are exact.
+
+        Returns:
+            List of (video_id, chunk_id, cosine similarity), best first
+        """
+        query_vector = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector = query_vector / norm
+
+        with self._lock:
+            if not self._row_counts:
+                return []
+
+            allowed = None
+            if video_ids is not None:
+                allowed = np.zeros(len(self.video_keys), dtype=bool)
+                allowed[[self._video_lookup[v] for v in set(video_ids) if v in self._row_counts]] = True
+                if not allowed.any():
+                    return []
+                probe = range(len(self.lists))
+            elif self.centroids is None:
+                probe = range(len(self.lists))
+            else:
+                probe = top_k_indices(self.centroids @ query_vector, nprobe or self.nprobe)
+
+            scores, video_idx, chunk_idx = [], [], []
+            for list_id in probe:
+                vectors, list_videos, list_chunks = self.lists[list_id].view()
+                if allowed is not None:
+                    mask = allowed[list_videos]
+                    if not mask.any():
+                        continue
+                    vectors, list_videos, list_chunks = vectors[mask], list_videos[mask], list_chunks[mask]
+                if len(vectors):
+                    scores.append(vectors @ query_vector)
+                    video_idx.append(list_videos)
+                    chunk_idx.append(list_chunks)
+
+            if not scores:
+                return []
+            scores = np.concatenate(scores)
+            video_idx = np.concatenate(video_idx)
+            chunk_idx = np.concatenate(chunk_idx)
+
+            return [
+                (self.video_keys[video_idx[i]], int(chunk_idx[i]), float(scores[i]))
+                for i in top_k_indices(scores, top_k)
+            ]
+
+    def save(self, path: str) -> None:
+        """Write the index to an .npz file, replacing any previous copy atomically."""
+        with self._lock:
+            vectors, video_idx, chunk_idx = self._all_rows()
+            list_sizes = np.array([inverted_list.size for inverted_list in self.lists], dtype=np.int64)
+            videos = sorted(self._row_counts)
+            arrays = {
+                "vectors": vectors,
+                "video_idx": video_idx,
+                "chunk_idx": chunk_idx,
+                "list_sizes": list_sizes,
+                "centroids": self.centroids if self.centroids is not None else np.empty((0, self.dim), np.float32),
+                "video_keys": np.array(self.video_keys, dtype=str),
+                "videos": np.array(videos, dtype=str),
+                "row_counts": np.array([self._row_counts[v] for v in videos], dtype=np.int64),
+                "versions": np.array([self.versions.get(v) or "" for v in videos], dtype=str),
+                "meta": np.array([self.dim, self.trained_rows, self.nprobe], dtype=np.int64),
+            }
+
+        # Each save writes its own temp file, so concurrent saves (from several processes) can't interleave
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                        dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """Read an index written by save()."""
+        with np.load(path) as data:
+            dim, trained_rows, nprobe = (int(v) for v in data["meta"])
+            index = cls(nprobe=nprobe)
+            index.dim = dim
+            index.trained_rows = trained_rows
+            index.centroids = data["centroids"] if len(data["centroids"]) else None
+            index.video_keys = [str(v) for v in data["video_keys"]]
+            index._video_lookup = {v: i for i, v in enumerate(index.video_keys)}
+            for video, count, version in zip(data["videos"], data["row_counts"], data["versions"]):
+                index._row_counts[str(video)] = int(count)
+                index.versions[str(video)] = str(version) or None
+
+            vectors, video_idx, chunk_idx = data["vectors"], data["video_idx"], data["chunk_idx"]
+            offset = 0
+            for size in data["list_sizes"]:
+                inverted_list = _InvertedList(dim)
+                end = offset + int(size)
+                inverted_list.add(vectors[offset:end], video_idx[offset:end], chunk_idx[offset:end])
+                index.lists.append(inverted_list)
+                offset = end
+        return index
+
+    def stats(self) -> Dict:
+        """Return index size and layout."""
+        with self._lock:
+            sizes = [inverted_list.size for inverted_list in self.lists]
+            return {
+                "videos": len(self._row_counts),
+                "vectors": sum(sizes),
+                "dim": self.dim,
+                "lists": len(self.lists),
+                "largest_list": max(sizes) if sizes else 0,
+                "trained": self.centroids is not None,
+                "nprobe": self.nprobe,
+            }
+
+    def _insert(self, vectors: np.ndarray, video_idx: np.ndarray, chunk_idx: np.ndarray) -> None:
+        if self.centroids is None:
+            self.lists[0].add(vectors, video_idx, chunk_idx)
+            return
+        assignments = _assign(vectors, self.centroids)
+        order = np.argsort(assignments, kind="stable")
+        boundaries = np.searchsorted(assignments[order], np.arange(len(self.lists) + 1))
+        for list_id in range(len(self.lists)):
+            rows = order[boundaries[list_id]:boundaries[list_id + 1]]
+            if len(rows):
+                self.lists[list_id].add(vectors[rows], video_idx[rows], chunk_idx[rows])
+
+    def _all_rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        views = [inverted_list.view() for inverted_list in self.lists]
+        if not views:
+            return (np.empty((0, self.dim), np.float32), np.empty(0, np.int32), np.empty(0, np.int32))
+        return tuple(np.concatenate([view[i] for view in views]) for i in range(3))
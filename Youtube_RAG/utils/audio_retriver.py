@@ -1,37 +1,65 @@
-import yt_dlp
 import tempfile
 import os
+import shutil
+from contextlib import contextmanager
+from typing import Iterator
 
 
-def get_audio_from_youtube(youtube_url: str) -> bytes:
-    """Downloads audio from YouTube URL and returns it as bytes."""
+# Speech recognition only needs mono 16 kHz audio; 32 kbps MP3 keeps an hour
+# of speech around 14 MB instead of ~85 MB at 192 kbps stereo.
+AUDIO_PROFILES = {
+    "asr": {"codec": "mp3", "quality": "32", "args": ["-ac", "1", "-ar", "16000"]},
+    "archive": {"codec": "mp3", "quality": "192", "args": []},
+}
+
+
+@contextmanager
+def youtube_audio_file(youtube_url: str, profile: str = "asr") -> Iterator[str]:
+    """
+    Download audio from a YouTube URL to a temporary file and yield its path.
+    
+    The audio is never read into memory here; the temporary directory (including
+    any partial downloads) is removed when the block exits, even on failure.
+    
+    Args:
+        youtube_url: The YouTube video URL
+        profile: Key of AUDIO_PROFILES ("asr" for transcription, "archive" for 192 kbps)
+        
+    Yields:
+        Path to the extracted audio file
+    """
+    # yt-dlp takes a noticeable time to import; only ingestion needs it
+    import yt_dlp
+    
+    settings = AUDIO_PROFILES[profile]
+    work_dir = tempfile.mkdtemp(prefix="yt_audio_")
     
     # Configure yt-dlp options
     ydl_opts = {
         'format': 'bestaudio/best',
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
+            'preferredcodec': settings["codec"],
+            'preferredquality': settings["quality"],
         }],
+        'postprocessor_args': {'extractaudio': settings["args"]},
+        'outtmpl': os.path.join(work_dir, 'audio.%(ext)s'),
         'quiet': True,
         'no_warnings': True,
     }
     
-    # Download audio to temporary file then read as bytes
-    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-        temp_path = tmp_file.name
-    
-    ydl_opts['outtmpl'] = temp_path.replace('.mp3', '')
-    
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([youtube_url])
-    
-    # Read audio bytes
-    with open(temp_path, 'rb') as f:
-        audio_bytes = f.read()
-    
-    # Clean up
-    os.unlink(temp_path)
-    
-    return audio_bytes
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.download([youtube_url])
+        
+        yield os.path.join(work_dir, f"audio.{settings['codec']}")
+    finally:
+        # Clean up
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def get_audio_from_youtube(youtube_url: str, profile: str = "archive") -> bytes:
+    """Downloads audio from YouTube URL and returns it as bytes."""
+    with youtube_audio_file(youtube_url, profile) as audio_path:
+        with open(audio_path, 'rb') as f:
+            return f.read()
@@ -0,0 +1,107 @@
+import os
+import re
+import subprocess
+from typing import List, Tuple
+
+
+# ffmpeg/ffprobe are already required by yt-dlp's audio extraction
+FFMPEG = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE = os.getenv("FFPROBE_BINARY", "ffprobe")
+
+
+def probe_duration(audio_path: str) -> float:
+    """Return the duration of an audio file in seconds."""
+    result = subprocess.run(
+        [FFPROBE, "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=noprint_wrappers=1:nokey=1", audio_path],
+        capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip())
+
+
+def detect_silences(
+    audio_path: str,
+    noise_db: int = -30,
+    min_silence: float = 0.4
+) -> List[Tuple[float, float]]:
+    """
+    Find silent stretches with ffmpeg's silencedetect filter.
+
+    Args:
+        audio_path: Path to the audio file
+        noise_db: Level below which audio counts as silence
+        min_silence: Minimum silence length in seconds
+
+    Returns:
+        List of (start, end) times in seconds
+    """
+    result = subprocess.run(
+        [FFMPEG, "-hide_banner", "-nostats", "-i", audio_path,
+         "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}", "-f", "null", "-"],
+        capture_output=True, text=True
+    )
+    starts = [float(v) for v in re.findall(r"silence_start: (-?[\d.]+)", result.stderr)]
+    ends = [float(v) for v in re.findall(r"silence_end: ([\d.]+)", result.stderr)]
+    return list(zip(starts, ends))
+
+
+def plan_segments(
+    duration: float,
+    window: float,
+    overlap: float,
+    silences: List[Tuple[float, float]] = None,
+    search: float = 30.0,
+    min_segment: float = 10.0
+) -> List[Tuple[float, float]]:
+    """
+    Plan (start, end) windows covering the audio with a small overlap.
+
+    Each cut is moved to the middle of the nearest silence within `search`
+    seconds of the nominal boundary, so words are rarely split.
+
+    Args:
+        duration: Total audio length in seconds
+        window: Target segment length in seconds
+        overlap: Seconds shared by neighbouring segments
+        silences: Optional (start, end) silences from detect_silences
+        search: How far from the nominal boundary to look for silence
+        min_segment: A remainder shorter than this (or than the overlap) is
+            added to the segment before it rather than sent on its own
+
+    Returns:
+        Ordered list of (start, end) times in seconds
+    """
+    if duration <= window:
+        return [(0.0, duration)]
+
+    midpoints = [(start + end) / 2 for start, end in (silences or [])]
+    # A last segment shorter than this would repeat audio already sent and may come back as filler
+    last_cut = duration - max(overlap, min_segment)
+    segments = []
+    start = 0.0
+
+    while start < duration:
+        cut = start + window
+        if cut >= last_cut:
+            segments.append((start, duration))
+            break
+
+        candidates = [m for m in midpoints if abs(m - cut) <= search and start + overlap < m < last_cut]
+        if candidates:
+            cut = min(candidates, key=lambda m: abs(m - cut))
+
+        segments.append((start, min(duration, cut + overlap / 2)))
+        start = max(0.0, cut - overlap / 2)
+
+    return segments
+
+
+def cut_segment(audio_path: str, start: float, end: float, output_path: str) -> str:
+    """Copy [start, end) of an audio file into output_path without re-encoding."""
+    subprocess.run(
+        [FFMPEG, "-hide_banner", "-loglevel", "error", "-y",
+         "-ss", f"{start:.3f}", "-i", audio_path, "-t", f"{end - start:.3f}",
+         "-c", "copy", output_path],
+        check=True
+    )
+    return output_path
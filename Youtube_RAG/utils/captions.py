@@ -0,0 +1,193 @@
+import html
+import json
+import re
+from typing import Dict, List, Optional, Sequence
+
+# Formats we can parse, most preferred first (json3 has no rolling duplicates)
+CAPTION_FORMATS = ("json3", "vtt", "srt")
+
+_TIMESTAMP = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})")
+_CUE_TIMING = re.compile(rf"({_TIMESTAMP.pattern})\s*-->\s*({_TIMESTAMP.pattern})")
+_INLINE_TAG = re.compile(r"<[^>]*>")
+_ANNOTATION = re.compile(r"\[[^\]]*\]|♪+")
+
+
+def _seconds(timestamp: str) -> float:
+    hours, minutes, seconds, millis = _TIMESTAMP.fullmatch(timestamp).groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def _clean(text: str) -> str:
+    """Strip markup, speaker-change markers and non-speech annotations like [Music]."""
+    text = html.unescape(_INLINE_TAG.sub("", text))
+    text = _ANNOTATION.sub(" ", text.replace(">>", " "))
+    return " ".join(text.split())
+
+
+def parse_vtt(data: str) -> List[Dict]:
+    """
+    Parse WebVTT (or SRT) captions into timed lines.
+
+    YouTube's auto-generated VTT repeats each line in the next cue as it scrolls
+    up; lines already shown by the previous cue are skipped.
+
+    Returns:
+        List of {start, end, text} dicts in seconds
+    """
+    segments = []
+    previous_lines: Sequence[str] = ()
+    for block in re.split(r"\r?\n\s*\r?\n", data):
+        lines = block.strip().splitlines()
+        timing_at = next((i for i, line in enumerate(lines) if _CUE_TIMING.search(line)), None)
+        if timing_at is None:
+            continue
+        timing = _CUE_TIMING.search(lines[timing_at])
+        start, end = _seconds(timing.group(1)), _seconds(timing.group(6))
+
+        cue_lines = [_clean(line) for line in lines[timing_at + 1:]]
+        cue_lines = [line for line in cue_lines if line]
+        new_lines = [line for line in cue_lines if line not in previous_lines]
+        if cue_lines:
+            previous_lines = cue_lines
+        if new_lines:
+            segments.append({"start": start, "end": end, "text": " ".join(new_lines)})
+    return segments
+
+
+def parse_json3(data: str) -> List[Dict]:
+    """
+    Parse YouTube's json3 caption format into timed lines.
+
+    Returns:
+        List of {start, end, text} dicts in seconds
+    """
+    segments = []
+    for event in json.loads(data).get("events", []):
+        text = _clean("".join(seg.get("utf8", "") for seg in event.get("segs") or []))
+        if not text:
+            continue
+        start = event.get("tStartMs", 0) / 1000
+        segments.append({"start": start, "end": start + event.get("dDurationMs", 0) / 1000, "text": text})
+    return segments
+
+
+def parse_caption_track(data: str, ext: str) -> List[Dict]:
+    """Parse a downloaded caption track by its yt-dlp format name (json3, vtt or srt)."""
+    if ext == "json3":
+        return parse_json3(data)
+    if ext in ("vtt", "srt"):
+        return parse_vtt(data)
+    raise ValueError(f"Unsupported caption format: {ext}")
+
+
+def _language_matches(lang: str, languages: Sequence[str]) -> bool:
+    return any(lang == wanted or lang.startswith(f"{wanted}-") for wanted in languages)
+
+
+def select_caption_track(info: Dict, languages: Sequence[str], allow_auto: bool = True) -> Optional[Dict]:
+    """
+    Pick the best caption track from a yt-dlp info dict.
+
+    Manual subtitles win over auto-generated captions. Auto-generated tracks
+    machine-translated from another language (tlang= in the URL) are skipped;
+    Whisper does better from the audio.
+
+    Args:
+        info: yt-dlp info dict (extract_info with download=False)
+        languages: Acceptable language codes, most preferred first (e.g. settings.CAPTION_LANGUAGES)
+        allow_auto: Consider auto-generated captions
+
+    Returns:
+        The track's format dict plus "language" and "source" ('manual_captions'
+        or 'auto_captions'), or None if no acceptable track exists
+    """
+    candidates = [("manual_captions", info.get("subtitles") or {})]
+    if allow_auto:
+        candidates.append(("auto_captions", info.get("automatic_captions") or {}))
+
+    for source, tracks in candidates:
+        for wanted in languages:
+            for lang, formats in tracks.items():
+                if not _language_matches(lang, [wanted]):
+                    continue
+                usable = [f for f in formats or [] if f.get("ext") in CAPTION_FORMATS and "tlang=" not in f.get("url", "")]
+                if usable:
+                    best = min(usable, key=lambda f: CAPTION_FORMATS.index(f["ext"]))
+                    return {**best, "language": lang, "source": source}
+    return None
+
+
+def captions_from_track(
+    data: str,
+    track: Dict,
+    duration: Optional[float] = None,
+    min_words_per_minute: float = 0.0
+) -> Optional[Dict]:
+    """
+    Turn a downloaded caption track into a timed transcript, if it is usable.
+
+    Args:
+        data: The track's contents
+        track: Track chosen by select_caption_track
+        duration: Video length in seconds, to reject near-empty tracks
+        min_words_per_minute: Tracks with less speech than this (e.g. only
+            "[Music]") are rejected
+
+    Returns:
+        Dict with source, language, segments ({start, end, text}) and text;
+        None if the track holds too little speech
+    """
+    segments = parse_caption_track(data, track["ext"])
+    text = " ".join(segment["text"] for segment in segments)
+    words = len(text.split())
+    minutes = (duration or (segments[-1]["end"] if segments else 0)) / 60
+    if not words or words < min_words_per_minute * minutes:
+        return None
+    return {"source": track["source"], "language": track["language"], "segments": segments, "text": text}
+
+
+def group_segments(segments: Sequence[Dict], seconds: float) -> List[Dict]:
+    """Merge timed caption lines into consecutive windows of about `seconds` each."""
+    windows: List[Dict] = []
+    for segment in segments:
+        if windows and segment["start"] - windows[-1]["start"] < seconds:
+            windows[-1]["end"] = segment["end"]
+            windows[-1]["text"] += " " + segment["text"]
+        else:
+            windows.append(dict(segment))
+    return windows
+
+
+def fetch_captions(
+    youtube_url: str,
+    languages: Sequence[str],
+    allow_auto: bool = True,
+    min_words_per_minute: float = 0.0
+) -> Optional[Dict]:
+    """
+    Download a video's captions as a timed transcript, without downloading any media.
+
+    Args:
+        youtube_url: The YouTube video URL
+        languages, allow_auto: See select_caption_track
+        min_words_per_minute: See captions_from_track
+
+    Returns:
+        See captions_from_track; None if the video has no acceptable track or
+        the captions could not be fetched
+    """
+    # yt-dlp takes a noticeable time to import; only ingestion needs it
+    import yt_dlp
+
+    try:
+        with yt_dlp.YoutubeDL({"skip_download": True, "quiet": True, "no_warnings": True}) as ydl:
+            info = ydl.extract_info(youtube_url, download=False)
+            track = select_caption_track(info, languages, allow_auto)
+            if track is None:
+                return None
+            data = ydl.urlopen(track["url"]).read().decode("utf-8")
+        return captions_from_track(data, track, info.get("duration"), min_words_per_minute)
+
+    except Exception as e:
+        print(f"   Could not fetch captions: {e}")
+        return None
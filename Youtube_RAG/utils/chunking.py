@@ -1,5 +1,18 @@
-from typing import List
+from typing import Callable, List, NamedTuple, Optional, Tuple
+import os
 import re
+from .embedding_scheduler import estimate_tokens
+
+
+# Defaults for token_chunking
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+TokenCounter = Callable[[str], int]
+
+# A sentence runs to terminal punctuation followed by whitespace, or to the end of the line
+_SENTENCE = re.compile(r"[^\n]*?(?:[.!?]+(?=\s|$)|$)", re.MULTILINE)
+_WORD = re.compile(r"\S+")
 
 
 def _split_into_sentences(text: str) -> List[str]:
@@ -99,3 +112,192 @@ def semantic_chunking(
     _add_chunk_if_not_empty(chunks, current_chunk)
     
     return chunks
+
+
+class Chunk(NamedTuple):
+    """A chunk of text and where it came from in the source transcript."""
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+
+def tiktoken_counter(encoding_name: str = "cl100k_base") -> TokenCounter:
+    """
+    Return an exact token counter for OpenAI embedding models.
+    
+    Requires the optional tiktoken package.
+    """
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise ImportError("tiktoken is required for exact token counts: pip install tiktoken") from e
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode_ordinary(text))
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Return (start, end) offsets of the sentences in text, trimmed of surrounding whitespace."""
+    spans = []
+    for match in _SENTENCE.finditer(text):
+        start, end = match.span()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
+    return spans
+
+
+def _word_units(text: str, start: int, end: int, count_tokens: TokenCounter) -> List[Tuple[int, int, int]]:
+    """Return (start, end, tokens) for each word in text[start:end]."""
+    return [
+        (match.start(), match.end(), count_tokens(match.group()))
+        for match in _WORD.finditer(text, start, end)
+    ]
+
+
+def token_chunking(
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    count_tokens: Optional[TokenCounter] = None
+) -> List[Chunk]:
+    """
+    Chunk text by token count, in a single linear pass.
+    
+    Chunks are built from whole sentences; a sentence longer than max_tokens is
+    split at word boundaries. Each chunk repeats the trailing sentences (or, if
+    the last sentence is too long, the trailing words) of the previous chunk
+    that fit in overlap_tokens.
+    
+    Args:
+        text: The input text to chunk (e.g., YouTube transcript)
+        max_tokens: Maximum tokens per chunk (default: CHUNK_MAX_TOKENS)
+        overlap_tokens: Maximum tokens shared with the previous chunk (default: CHUNK_OVERLAP_TOKENS)
+        count_tokens: Token counter (default: the ~4 characters per token estimate)
+        
+    Returns:
+        List of Chunk(text, start, end, tokens); text == transcript[start:end]
+    """
+    if not text:
+        return []
+    count_tokens = count_tokens or estimate_tokens
+    
+    # Units are sentences, or word groups of sentences that are too long; groups
+    # leave room for the overlap so consecutive groups still share words
+    group_max = max(1, max_tokens - overlap_tokens)
+    units = []
+    for start, end in _sentence_spans(text):
+        tokens = count_tokens(text[start:end])
+        if tokens <= max_tokens:
+            units.append((start, end, tokens))
+            continue
+        group_start, group_end, group_tokens = None, None, 0
+        for word_start, word_end, word_tokens in _word_units(text, start, end, count_tokens):
+            if group_start is not None and group_tokens + word_tokens > group_max:
+                units.append((group_start, group_end, group_tokens))
+                group_start, group_tokens = None, 0
+            if group_start is None:
+                group_start = word_start
+            group_end = word_end
+            group_tokens += word_tokens
+        if group_start is not None:
+            units.append((group_start, group_end, group_tokens))
+    
+    chunks = []
+    chunk_start, chunk_tokens = None, 0
+    first = 0  # first unit (whole or partial) in the current chunk
+    
+    for i, (start, end, tokens) in enumerate(units):
+        if chunk_start is not None and chunk_tokens + tokens > max_tokens:
+            chunk_end = units[i - 1][1]
+            chunks.append(Chunk(text[chunk_start:chunk_end], chunk_start, chunk_end, chunk_tokens))
+            chunk_start, chunk_tokens, first = _overlap(text, units, first, i, overlap_tokens, count_tokens)
+            if chunk_start is not None and chunk_tokens + tokens > max_tokens:
+                chunk_start, chunk_tokens = None, 0
+        
+        if chunk_start is None:
+            chunk_start = start
+            first = i
+        chunk_tokens += tokens
+    
+    if chunk_start is not None:
+        chunk_end = units[-1][1]
+        chunks.append(Chunk(text[chunk_start:chunk_end], chunk_start, chunk_end, chunk_tokens))
+    
+    return chunks
+
+
+def _overlap(
+    text: str,
+    units: List[Tuple[int, int, int]],
+    first: int,
+    stop: int,
+    overlap_tokens: int,
+    count_tokens: TokenCounter
+) -> Tuple[Optional[int], int, int]:
+    """
+    Find where the next chunk starts so it repeats at most overlap_tokens of units[first:stop].
+    
+    The first unit of the current chunk is never repeated, so chunks always advance.
+    
+    Returns:
+        (start offset, tokens carried over, first unit of the next chunk);
+        start is None when nothing is repeated
+    """
+    if overlap_tokens <= 0:
+        return None, 0, stop
+    
+    start, carried = None, 0
+    k = stop - 1
+    while k > first and carried + units[k][2] <= overlap_tokens:
+        start = units[k][0]
+        carried += units[k][2]
+        k -= 1
+    if start is not None:
+        return start, carried, k + 1
+    
+    # The last unit alone is too long: carry its trailing words instead
+    for word_start, _, word_tokens in reversed(_word_units(text, units[stop - 1][0], units[stop - 1][1], count_tokens)):
+        if carried + word_tokens > overlap_tokens:
+            break
+        start = word_start
+        carried += word_tokens
+    if start is None or start == units[first][0]:
+        return None, 0, stop
+    return start, carried, stop - 1
+
+
+class StreamingChunker:
+    """
+    Chunk text that arrives in pieces (e.g. transcript segments).
+    
+    The last, possibly incomplete chunk is held back and re-chunked together
+    with the next piece, so chunk boundaries closely match a one-shot token_chunking run.
+    """
+    
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self._pending = ""
+    
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the chunks that are now final."""
+        if not text:
+            return []
+        
+        self._pending = f"{self._pending} {text}".strip()
+        chunks = token_chunking(self._pending, self.max_tokens, self.overlap_tokens)
+        if len(chunks) <= 1:
+            return []
+        
+        self._pending = self._pending[chunks[-1].start:]
+        return [chunk.text for chunk in chunks[:-1]]
+    
+    def flush(self) -> List[str]:
+        """Return whatever is still held back."""
+        chunks = [self._pending] if self._pending else []
+        self._pending = ""
+        return chunks
@@ -0,0 +1,189 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from config import settings
+
+if TYPE_CHECKING:
+    import requests
+    from openai import AzureOpenAI
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of long-lived API clients.
+
+    Every caller shares one keep-alive connection pool per service instead of
+    paying TCP/TLS setup on each request. Pool size and timeouts come from
+    HTTP_POOL_SIZE, HTTP_TIMEOUT and HTTP_CONNECT_TIMEOUT.
+
+    Client SDKs are imported on first use, so importing this module is cheap
+    for sessions that only query already-ingested videos.
+    """
+
+    def __init__(self):
+        self.pool_size = settings.HTTP_POOL_SIZE
+        self.timeout = settings.HTTP_TIMEOUT
+        self.connect_timeout = settings.HTTP_CONNECT_TIMEOUT
+        self._lock = threading.Lock()
+        self._azure: Dict[Tuple, "AzureOpenAI"] = {}
+        self._azure_http: Dict[Tuple, object] = {}
+        self._http_session: Optional["requests.Session"] = None
+        self._chat_models: Dict[Tuple, object] = {}
+        self._azure_requests = 0
+        self._azure_connections = 0
+
+    def azure_openai(self) -> "AzureOpenAI":
+        """Return the shared AzureOpenAI client for the current endpoint settings."""
+        import httpx
+        from openai import AzureOpenAI, DefaultHttpxClient
+
+        key = _azure_settings()
+        with self._lock:
+            client = self._azure.get(key)
+            if client is None:
+                http_client = DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size
+                    ),
+                    timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                    event_hooks={"request": [self._trace_azure_request]}
+                )
+                # Retries are owned by callers (see embedding_scheduler)
+                client = AzureOpenAI(
+                    azure_endpoint=key[0],
+                    api_key=key[1],
+                    api_version=key[2],
+                    http_client=http_client,
+                    max_retries=0
+                )
+                self._azure[key] = client
+                self._azure_http[key] = http_client
+            return client
+
+    def http_session(self) -> "requests.Session":
+        """Return the shared keep-alive requests session used for raw REST calls."""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        with self._lock:
+            if self._http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._http_session = session
+            return self._http_session
+
+    @property
+    def request_timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout for requests-based calls."""
+        return (self.connect_timeout, self.timeout)
+
+    def chat_model(self, model: str, google_api_key: str):
+        """Return the shared Gemini chat model for (model, key)."""
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        key = (model, google_api_key)
+        with self._lock:
+            llm = self._chat_models.get(key)
+            if llm is None:
+                # GOOGLE_API_BASE_URL points the model at a proxy or a local stand-in
+                base_url = os.getenv("GOOGLE_API_BASE_URL")
+                extra = {"base_url": base_url} if base_url else {}
+                llm = ChatGoogleGenerativeAI(model=model, google_api_key=google_api_key, **extra)
+                self._chat_models[key] = llm
+            return llm
+
+    def warm_up(self, *urls: str) -> None:
+        """
+        Open pooled connections ahead of the first real request.
+
+        Args:
+            urls: Extra URLs whose hosts the requests session should connect to
+        """
+        endpoint = os.getenv("OPENAI_AZURE_ENDPOINT")
+        if endpoint:
+            self.azure_openai()
+            http_client = self._azure_http[_azure_settings()]
+            try:
+                http_client.head(_origin(endpoint))
+            except Exception as e:
+                print(f"   Warm-up failed for {endpoint}: {e}")
+
+        session = self.http_session()
+        for url in urls:
+            try:
+                session.head(_origin(url), timeout=self.request_timeout)
+            except Exception as e:
+                print(f"   Warm-up failed for {url}: {e}")
+
+    def stats(self) -> Dict:
+        """Return request and new-connection counters per pool."""
+        with self._lock:
+            session = self._http_session
+            azure_requests = self._azure_requests
+            azure_connections = self._azure_connections
+
+        session_requests = 0
+        session_connections = 0
+        if session is not None:
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for pool in [pools[key] for key in pools.keys()]:
+                    session_requests += pool.num_requests
+                    session_connections += pool.num_connections
+
+        return {
+            "azure_openai": _reuse_stats(azure_requests, azure_connections),
+            "http_session": _reuse_stats(session_requests, session_connections),
+        }
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            for client in self._azure.values():
+                client.close()
+            self._azure.clear()
+            self._azure_http.clear()
+            if self._http_session is not None:
+                self._http_session.close()
+                self._http_session = None
+
+    def _trace_azure_request(self, request) -> None:
+        with self._lock:
+            self._azure_requests += 1
+        request.extensions["trace"] = self._trace_azure_event
+
+    def _trace_azure_event(self, event_name: str, info: Dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._azure_connections += 1
+
+
+def _azure_settings() -> Tuple:
+    return (
+        os.getenv("OPENAI_AZURE_ENDPOINT"),
+        os.getenv("OPENAI_AZURE_API_KEY"),
+        os.getenv("OPENAI_AZURE_API_VERSION"),
+    )
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _reuse_stats(requests_sent: int, connections_opened: int) -> Dict:
+    reused = max(0, requests_sent - connections_opened)
+    return {
+        "requests": requests_sent,
+        "connections_opened": connections_opened,
+        "reused": reused,
+        "reuse_rate": reused / requests_sent if requests_sent else 0.0,
+    }
+
+
+# Process-wide registry shared by embeddings, speech-to-text and the agent
+clients = ClientRegistry()
@@ -0,0 +1,149 @@
+import logging
+from typing import Callable, List, NamedTuple, Optional, Sequence
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from .embedding_scheduler import estimate_tokens
+from .metrics import count
+
+logger = logging.getLogger(__name__)
+
+
+# Tool results from earlier turns longer than this are replaced with a stub
+STALE_TOOL_RESULT_CHARS = 200
+# Fraction of the budget left after an eviction
+EVICT_TO = 0.75
+# Rough per-message overhead for role and formatting
+MESSAGE_OVERHEAD_TOKENS = 4
+
+Summarizer = Callable[[Optional[str], Sequence[BaseMessage]], str]
+
+
+class PromptContext(NamedTuple):
+    """Messages to send to the model plus the updated summary bookkeeping."""
+    messages: List[BaseMessage]
+    summary: Optional[str]
+    summarized_count: int
+    prompt_tokens: int
+    dropped_tool_results: int
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Estimate the prompt tokens of one message, including any tool calls."""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(f"{tool_call.get('name')}{tool_call.get('args')}")
+    return tokens
+
+
+def _turn_starts(messages: Sequence[BaseMessage]) -> List[int]:
+    """Indices where a user turn starts; anything before the first HumanMessage joins the first turn."""
+    starts = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return starts
+
+
+def _drop_stale_tool_result(message: BaseMessage) -> BaseMessage:
+    """Replace a large, old tool result with a stub, keeping its tool_call_id so calls stay paired."""
+    if not isinstance(message, ToolMessage) or len(str(message.content)) <= STALE_TOOL_RESULT_CHARS:
+        return message
+    return ToolMessage(
+        content=f"[{message.name or 'tool'} result from an earlier turn omitted]",
+        tool_call_id=message.tool_call_id,
+        name=message.name,
+    )
+
+
+def extractive_summary(previous: Optional[str], messages: Sequence[BaseMessage], max_chars: int = 2000) -> str:
+    """
+    Summarize without a model call: keep the user's questions and the start of each answer.
+
+    Used when no summarizer is given or the summarizer fails.
+    """
+    lines = [previous] if previous else []
+    for message in messages:
+        if isinstance(message, ToolMessage) or not isinstance(message.content, str) or not message.content:
+            continue
+        role = "User" if isinstance(message, HumanMessage) else "Assistant"
+        lines.append(f"{role}: {message.content[:200]}")
+    return "\n".join(lines)[-max_chars:]
+
+
+def build_prompt_context(
+    system_prompt: str,
+    messages: Sequence[BaseMessage],
+    max_tokens: int,
+    summary: Optional[str] = None,
+    summarized_count: int = 0,
+    summarize: Optional[Summarizer] = None
+) -> PromptContext:
+    """
+    Fit the conversation into a token budget for the next model call.
+
+    Messages before summarized_count are already folded into summary. Of the
+    rest, the newest whole turns are sent as-is, except that tool results from
+    earlier turns are stubbed out. When they exceed max_tokens, the oldest turns
+    are folded into the summary until EVICT_TO of the budget is used, so each
+    summary call only covers newly evicted turns. The latest turn is always kept.
+
+    Args:
+        system_prompt: System prompt text for this call
+        messages: Full conversation history
+        max_tokens: Prompt token budget
+        summary: Summary of messages[:summarized_count] from earlier calls
+        summarized_count: Number of leading messages covered by summary
+        summarize: Callable(previous_summary, messages) -> new summary
+            (default: extractive_summary)
+
+    Returns:
+        PromptContext with the messages to send (system prompt first)
+    """
+    summarize = summarize or extractive_summary
+    pending = list(messages[summarized_count:])
+    starts = _turn_starts(pending) if pending else [0]
+    last_turn = starts[-1]
+
+    dropped = 0
+    window = []
+    for i, message in enumerate(pending):
+        if i < last_turn:
+            compact = _drop_stale_tool_result(message)
+            dropped += compact is not message
+            message = compact
+        window.append(message)
+
+    def total_tokens(first: int, current_summary: Optional[str]) -> int:
+        summary_tokens = estimate_tokens(current_summary) if current_summary else 0
+        return (estimate_tokens(system_prompt) + summary_tokens
+                + sum(message_tokens(message) for message in window[first:]))
+
+    # Once over budget, evict whole turns (oldest first) down to EVICT_TO of the
+    # budget, so the summary is only rewritten every few turns
+    keep_from = 0
+    if total_tokens(0, summary) > max_tokens:
+        for start in starts[1:]:
+            if total_tokens(keep_from, summary) <= max_tokens * EVICT_TO:
+                break
+            keep_from = start
+
+    if keep_from:
+        evicted = pending[:keep_from]
+        try:
+            summary = summarize(summary, evicted)
+        except Exception as e:
+            count("summary_errors_total")
+            logger.warning("Summary failed, keeping an extractive one: %s", e)
+            summary = extractive_summary(summary, evicted)
+        summarized_count += keep_from
+
+    system_text = system_prompt
+    if summary:
+        system_text += f"\n\nSUMMARY OF THE EARLIER CONVERSATION:\n{summary}"
+
+    return PromptContext(
+        messages=[SystemMessage(content=system_text)] + window[keep_from:],
+        summary=summary,
+        summarized_count=summarized_count,
+        prompt_tokens=total_tokens(keep_from, summary),
+        dropped_tool_results=dropped,
+    )
@@ -1,17 +1,260 @@
 import sqlite3
+import atexit
 import json
-from typing import List, Dict, Optional
+import re
+import threading
+from typing import List, Dict, Optional, Sequence, Tuple, Union
 import os
+import numpy as np
+from .vector_codec import (
+    HEADER_SIZE, encode_vectors, decode_vectors,
+    read_header, is_encoded, is_normalized
+)
+from .index_cache import VideoIndex, build_video_index, video_index_cache
+from .ann_index import IVFIndex
+from .metrics import timed
 
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "youtube_rag.db")
+LIBRARY_INDEX_PATH = os.getenv(
+    "LIBRARY_INDEX_PATH", os.path.join(os.path.dirname(DB_PATH), "library_index.npz")
+)
+LIBRARY_INDEX_NPROBE = int(os.getenv("LIBRARY_INDEX_NPROBE", "8"))
+# Changes to the library index are written to LIBRARY_INDEX_PATH at most this often (and at exit)
+LIBRARY_INDEX_SAVE_SECONDS = float(os.getenv("LIBRARY_INDEX_SAVE_SECONDS", "30"))
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = set()
+_fts_enabled = True
+_library_index: Optional[IVFIndex] = None
+_library_lock = threading.Lock()
+_library_save_timer: Optional[threading.Timer] = None
+
+
+def get_connection(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Return this thread's connection to the database, opening it on first use.
+    
+    Connections are reused for the life of the thread, and the schema is
+    initialized once per database file per process.
+    
+    Args:
+        db_path: Database file (default: DB_PATH)
+    """
+    db_path = db_path or DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.Connection(db_path)
+        # WAL lets searches read while an ingestion is writing
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        connections[db_path] = conn
+    
+    if db_path not in _schema_ready:
+        with _schema_lock:
+            if db_path not in _schema_ready:
+                with conn:
+                    _create_table(conn.cursor())
+                _schema_ready.add(db_path)
+    
+    return conn
+
+
+def close_connection() -> None:
+    """Close every connection opened by the current thread."""
+    for conn in getattr(_local, "connections", {}).values():
+        conn.close()
+    _local.connections = {}
+
+
+def _create_table(cursor: sqlite3.Cursor) -> None:
+    """Create the youtube_videos table if it doesn't exist."""
+    # Older databases declare vectors as TEXT; SQLite keeps BLOBs as-is in that
+    # column, so both layouts hold the packed float32 encoding.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS youtube_videos (
+            primary_key TEXT PRIMARY KEY,
+            full_transcription TEXT NOT NULL,
+            summary TEXT,
+            chunks TEXT,
+            vectors BLOB NOT NULL,
+            ingest_status TEXT NOT NULL DEFAULT 'complete',
+            transcript_source TEXT,
+            transcript_segments TEXT,
+            revision INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Databases created before streaming ingestion lack ingest_status
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(youtube_videos)")}
+    if "ingest_status" not in columns:
+        cursor.execute("ALTER TABLE youtube_videos ADD COLUMN ingest_status TEXT NOT NULL DEFAULT 'complete'")
+    # ... and transcript_source (NULL for those rows: they were all transcribed by Whisper)
+    if "transcript_source" not in columns:
+        cursor.execute("ALTER TABLE youtube_videos ADD COLUMN transcript_source TEXT")
+    # ... and transcript_segments (timestamps are only kept for videos ingested since)
+    if "transcript_segments" not in columns:
+        cursor.execute("ALTER TABLE youtube_videos ADD COLUMN transcript_segments TEXT")
+    # ... and revision, which the library index uses to spot rewritten rows
+    if "revision" not in columns:
+        cursor.execute("ALTER TABLE youtube_videos ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+    
+    # Streaming ingestion appends one row per segment here; finish_video_ingest
+    # moves them into the video's youtube_videos row in a single write
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS video_segments (
+            video_id TEXT NOT NULL,
+            segment_id INTEGER NOT NULL,
+            first_chunk INTEGER NOT NULL,
+            num_chunks INTEGER NOT NULL,
+            transcript TEXT NOT NULL,
+            chunks TEXT NOT NULL,
+            vectors BLOB NOT NULL,
+            PRIMARY KEY (video_id, segment_id)
+        )
+    """)
+    
+    # Embedding caches (utils/embedding_cache.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS query_embeddings (
+            query_text TEXT NOT NULL,
+            model TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (query_text, model)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chunk_embeddings (
+            content_hash TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    _create_fts_table(cursor)
+
+
+def _create_fts_table(cursor: sqlite3.Cursor) -> None:
+    """Create the chunk_fts full-text index, filling it from existing rows the first time."""
+    global _fts_enabled
+    row = cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'chunk_fts'").fetchone()
+    if row and "video_id UNINDEXED" not in row[0]:
+        return
+    if row:
+        # Older versions left video_id unindexed, so per-video queries scanned every video's rows
+        cursor.execute("DROP TABLE chunk_fts")
+    try:
+        # video_id is indexed so a video's rows are found through the index (see _fts_video_filter)
+        cursor.execute("""
+            CREATE VIRTUAL TABLE chunk_fts USING fts5(
+                video_id, chunk_id UNINDEXED, text, tokenize = 'porter unicode61'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        if "already exists" in str(e):
+            # Another process (e.g. an ingestion worker) created it first
+            return
+        # SQLite built without FTS5; searches fall back to vectors only
+        print(f"Full-text search unavailable: {e}")
+        _fts_enabled = False
+        return
+    
+    cursor.execute("""
+        INSERT INTO chunk_fts (video_id, chunk_id, text)
+        SELECT youtube_videos.primary_key, chunk.key, chunk.value
+        FROM youtube_videos, json_each(youtube_videos.chunks) AS chunk
+        WHERE youtube_videos.chunks IS NOT NULL
+    """)
+
+
+def _index_chunks(conn: sqlite3.Connection, primary_key: str, chunks: Sequence[str], first_id: int = 0) -> None:
+    """Add chunks to the full-text index; first_id is the position of chunks[0] in the video."""
+    if _fts_enabled and chunks:
+        conn.executemany(
+            "INSERT INTO chunk_fts (video_id, chunk_id, text) VALUES (?, ?, ?)",
+            [(primary_key, first_id + i, chunk) for i, chunk in enumerate(chunks)]
+        )
+
+
+def _fts_video_filter(primary_key: str) -> str:
+    """FTS5 query matching a video's rows through the video_id column's index."""
+    return 'video_id : "{}"'.format(primary_key.replace('"', '""'))
+
+
+def _unindex_chunks(conn: sqlite3.Connection, primary_key: str) -> None:
+    """Remove a video's chunks from the full-text index."""
+    if _fts_enabled:
+        conn.execute("""
+            DELETE FROM chunk_fts WHERE rowid IN (
+                SELECT rowid FROM chunk_fts WHERE chunk_fts MATCH ? AND video_id = ?
+            )
+        """, (_fts_video_filter(primary_key), primary_key))
+
+
+# Every write to a youtube_videos row bumps its revision (updated_at only has second precision)
+_NEXT_REVISION = "COALESCE((SELECT revision FROM youtube_videos WHERE primary_key = ?), 0) + 1"
+
+
+def _decode_vectors_column(value) -> np.ndarray:
+    """Decode a vectors column stored either as a packed blob or legacy JSON text."""
+    if is_encoded(value):
+        return decode_vectors(bytes(value))
+    return np.asarray(json.loads(value), dtype=np.float32)
+
+
+def _last_segment(conn: sqlite3.Connection, primary_key: str) -> Optional[Tuple[int, int, bytes]]:
+    """Return (segment_id, chunk count so far, vectors header) of a video's newest appended segment."""
+    return conn.execute(f"""
+        SELECT segment_id, first_chunk + num_chunks, substr(vectors, 1, {HEADER_SIZE})
+        FROM video_segments WHERE video_id = ? ORDER BY segment_id DESC LIMIT 1
+    """, (primary_key,)).fetchone()
+
+
+def _merge_segments(
+    conn: sqlite3.Connection,
+    primary_key: str,
+    transcript: str,
+    chunks: List[str],
+    vectors: np.ndarray,
+    normalized: bool
+) -> Tuple[str, List[str], np.ndarray, bool]:
+    """Extend a row's transcript, chunks and vectors with its appended segments, in order."""
+    texts = [transcript] if transcript else []
+    chunks = list(chunks)
+    matrices = [vectors] if len(vectors) else []
+    rows = conn.execute("""
+        SELECT transcript, chunks, vectors FROM video_segments WHERE video_id = ? ORDER BY segment_id
+    """, (primary_key,)).fetchall()
+    for segment_text, segment_chunks, segment_vectors in rows:
+        if segment_text:
+            texts.append(segment_text)
+        chunks.extend(json.loads(segment_chunks))
+        matrix = decode_vectors(bytes(segment_vectors))
+        if len(matrix):
+            matrices.append(matrix)
+            normalized = (normalized or len(matrices) == 1) and is_normalized(bytes(segment_vectors))
+    matrix = np.concatenate(matrices) if matrices else np.zeros((0, 0), dtype=np.float32)
+    return " ".join(texts), chunks, matrix, normalized
+
 
 def store_video_data(
     primary_key: str,
     full_transcription: str,
-    vectors: List[List[float]],
+    vectors: Union[List[List[float]], np.ndarray],
     summary: Optional[str] = None,
-    chunks: Optional[List[str]] = None
+    chunks: Optional[List[str]] = None,
+    normalize_vectors: bool = True,
+    transcript_source: Optional[str] = None,
+    transcript_segments: Optional[List[Dict]] = None
 ) -> bool:
     """
     Store YouTube video data with embeddings in SQLite database.
@@ -22,44 +265,38 @@ def store_video_data(
         vectors: List of embedding vectors for the chunks
         summary: Optional summary of the video
         chunks: Optional list of text chunks corresponding to vectors
-        
+        normalize_vectors: Store vectors L2-normalized so cosine is a dot product
+        transcript_source: Where the transcript came from ('whisper', 'manual_captions', 'auto_captions')
+        transcript_segments: Optional timed {start, end, text} transcript lines
+    
     Returns:
         True if successful, False otherwise
     """
     try:
-        conn = sqlite3.Connection(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Create table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS youtube_videos (
-                primary_key TEXT PRIMARY KEY,
-                full_transcription TEXT NOT NULL,
-                summary TEXT,
-                chunks TEXT,
-                vectors TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        conn = get_connection()
         
-        # Convert to JSON for storage
-        vectors_json = json.dumps(vectors)
+        # Vectors are packed as float32, chunks stay JSON
+        vectors_blob = encode_vectors(vectors, normalize=normalize_vectors)
         chunks_json = json.dumps(chunks) if chunks else None
         
         # Insert or replace
-        cursor.execute("""
-            INSERT OR REPLACE INTO youtube_videos 
-            (primary_key, full_transcription, summary, chunks, vectors, updated_at)
-            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (primary_key, full_transcription, summary, chunks_json, vectors_json))
+        with conn:
+            conn.execute(f"""
+                INSERT OR REPLACE INTO youtube_videos
+                (primary_key, full_transcription, summary, chunks, vectors, ingest_status, transcript_source,
+                 transcript_segments, revision, updated_at)
+                VALUES (?, ?, ?, ?, ?, 'complete', ?, ?, {_NEXT_REVISION}, CURRENT_TIMESTAMP)
+            """, (primary_key, full_transcription, summary, chunks_json, sqlite3.Binary(vectors_blob),
+                  transcript_source, json.dumps(transcript_segments) if transcript_segments else None, primary_key))
+            conn.execute("DELETE FROM video_segments WHERE video_id = ?", (primary_key,))
+            _unindex_chunks(conn, primary_key)
+            _index_chunks(conn, primary_key, chunks or [])
         
-        conn.commit()
-        conn.close()
-
+        video_index_cache.invalidate(primary_key)
+        _refresh_library_index(primary_key)
         print(f"Stored: {primary_key}")
         return True
-
+    
     except Exception as e:
         print(f"Error: {e}")
         return False
@@ -69,38 +306,589 @@ def retrieve_video_data(primary_key: str) -> Optional[Dict]:
     """
     Retrieve YouTube video data by primary key.
     
+    Loads every column; prefer video_exists, get_video_metadata or the
+    column-selective loaders when only part of the row is needed.
+    
     Args:
         primary_key: Unique identifier for the video
-        
+    
     Returns:
-        Dict with: primary_key, full_transcription, summary, chunks, vectors, timestamps
+        Dict with: primary_key, full_transcription, summary, chunks, vectors,
+        ingest_status, transcript_source, transcript_segments, timestamps.
+        vectors is a (num_chunks, dim) float32 NumPy array.
     """
     try:
-        conn = sqlite3.Connection(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        row = get_connection().execute("""
+            SELECT primary_key, full_transcription, summary, chunks, vectors,
+                   ingest_status, created_at, updated_at, transcript_source, transcript_segments
+            FROM youtube_videos WHERE primary_key = ?
+        """, (primary_key,)).fetchone()
         
-        cursor.execute("""
-            SELECT * FROM youtube_videos WHERE primary_key = ?
-        """, (primary_key,))
+        if not row:
+            print(f"Not found: {primary_key}")
+            return None
         
-        row = cursor.fetchone()
-        conn.close()
+        return {
+            'primary_key': row[0],
+            'full_transcription': row[1],
+            'summary': row[2],
+            'chunks': json.loads(row[3]) if row[3] else None,
+            'vectors': _decode_vectors_column(row[4]),
+            'ingest_status': row[5],
+            'transcript_source': row[8],
+            'transcript_segments': json.loads(row[9]) if row[9] else None,
+            'created_at': row[6],
+            'updated_at': row[7]
+        }
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
 
+
+def video_exists(primary_key: str, complete_only: bool = True) -> bool:
+    """
+    Check whether a video is stored without reading any of its data.
+    
+    Args:
+        primary_key: Unique identifier for the video
+        complete_only: Ignore rows that are still being (or were partially) ingested
+    """
+    query = "SELECT 1 FROM youtube_videos WHERE primary_key = ?"
+    if complete_only:
+        query += " AND ingest_status = 'complete'"
+    try:
+        return get_connection().execute(query, (primary_key,)).fetchone() is not None
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def get_video_metadata(primary_key: str) -> Optional[Dict]:
+    """
+    Return lightweight facts about a stored video.
+    
+    Only the vector header is read, never the transcript, chunks or vectors.
+    
+    Returns:
+        Dict with: primary_key, ingest_status, num_chunks, dim, normalized,
+        has_summary, transcript_chars, transcript_source, timestamps; None if not stored.
+        num_chunks/dim/normalized are None for legacy JSON-encoded rows.
+    """
+    try:
+        row = get_connection().execute(f"""
+            SELECT primary_key, ingest_status, typeof(vectors), substr(vectors, 1, {HEADER_SIZE}),
+                   summary IS NOT NULL, length(full_transcription), created_at, updated_at, transcript_source
+            FROM youtube_videos WHERE primary_key = ?
+        """, (primary_key,)).fetchone()
         if not row:
-            print(f"Not found: {primary_key}")
             return None
         
+        normalized = dim = num_chunks = None
+        if row[2] == 'blob' and is_encoded(row[3]):
+            normalized, dim, num_chunks = read_header(bytes(row[3]))
+        if row[1] != 'complete':
+            # Streamed so far: chunks appended as segments are not in the row yet
+            last = _last_segment(get_connection(), primary_key)
+            if last:
+                num_chunks = (num_chunks or 0) + last[1]
+                if not dim and is_encoded(last[2]):
+                    normalized, dim, _ = read_header(bytes(last[2]))
+        
         return {
-            'primary_key': row['primary_key'],
-            'full_transcription': row['full_transcription'],
-            'summary': row['summary'],
-            'chunks': json.loads(row['chunks']) if row['chunks'] else None,
-            'vectors': json.loads(row['vectors']),
-            'created_at': row['created_at'],
-            'updated_at': row['updated_at']
+            'primary_key': row[0],
+            'ingest_status': row[1],
+            'num_chunks': num_chunks,
+            'dim': dim,
+            'normalized': normalized,
+            'has_summary': bool(row[4]),
+            'transcript_chars': row[5],
+            'transcript_source': row[8],
+            'created_at': row[6],
+            'updated_at': row[7]
         }
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def load_video_transcript(primary_key: str) -> Optional[str]:
+    """Load only the full transcript of a video."""
+    try:
+        row = get_connection().execute(
+            "SELECT full_transcription FROM youtube_videos WHERE primary_key = ?", (primary_key,)
+        ).fetchone()
+        return row[0] if row else None
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def load_video_chunks(primary_key: str, chunk_ids: Optional[Sequence[int]] = None) -> Optional[List[str]]:
+    """
+    Load chunk texts for a video.
+    
+    Args:
+        primary_key: Unique identifier for the video
+        chunk_ids: Positions to load, in the order wanted (default: all chunks).
+            Selected chunks are extracted by SQLite's JSON functions, so the full
+            list is never parsed in Python.
+    
+    Returns:
+        List of chunks, or None if the video is not stored
+    """
+    try:
+        conn = get_connection()
+        if chunk_ids is None:
+            row = conn.execute("SELECT chunks FROM youtube_videos WHERE primary_key = ?", (primary_key,)).fetchone()
+            if not row:
+                return None
+            return json.loads(row[0]) if row[0] else []
+        
+        if not video_exists(primary_key, complete_only=False):
+            return None
+        ids = [int(i) for i in chunk_ids]
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        rows = conn.execute(f"""
+            SELECT chunk.key, chunk.value
+            FROM youtube_videos, json_each(youtube_videos.chunks) AS chunk
+            WHERE youtube_videos.primary_key = ? AND chunk.key IN ({placeholders})
+        """, [primary_key] + ids).fetchall()
+        found = dict(rows)
+        return [found[i] for i in ids if i in found]
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def _fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query: quoted phrases are kept, other words are OR-ed."""
+    phrases = re.findall(r'"([^"]+)"', query)
+    words = re.findall(r"\w[\w'.\-]*\w|\w", re.sub(r'"[^"]*"', " ", query))
+    terms = [term.replace('"', '""') for term in phrases + words]
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def search_chunks_fulltext(primary_key: str, query: str, limit: int = 20) -> List[Tuple[int, str]]:
+    """
+    Rank a video's chunks against a query with SQLite's BM25 full-text index.
+    
+    Needs no embedding, so it answers without any network call.
+    
+    Args:
+        primary_key: Unique identifier for the video
+        query: Free text; "quoted phrases" must match exactly
+        limit: Maximum number of chunks to return
+    
+    Returns:
+        List of (chunk_id, chunk text), best match first; empty if nothing
+        matches or full-text search is unavailable
+    """
+    match = _fts_query(query)
+    if not match:
+        return []
+    try:
+        conn = get_connection()
+        if not _fts_enabled:
+            return []
+        # The video_id filter narrows the match to this video's rows; tokenizing folds case,
+        # so the exact comparison still applies. Only the text column counts towards the rank.
+        rows = conn.execute("""
+            SELECT chunk_id, text FROM chunk_fts
+            WHERE chunk_fts MATCH ? AND video_id = ?
+            ORDER BY bm25(chunk_fts, 0.0, 0.0, 1.0)
+            LIMIT ?
+        """, (f"{_fts_video_filter(primary_key)} AND text : ({match})", primary_key, limit)).fetchall()
+        return [(int(chunk_id), text) for chunk_id, text in rows]
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        return []
+
 
+def begin_video_ingest(primary_key: str, transcript_source: Optional[str] = None) -> bool:
+    """
+    Create an empty 'processing' row that streaming ingestion appends to.
+    
+    Args:
+        primary_key: Unique identifier for the video
+        transcript_source: Where the transcript comes from (see store_video_data)
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        with get_connection() as conn:
+            conn.execute(f"""
+                INSERT OR REPLACE INTO youtube_videos
+                (primary_key, full_transcription, summary, chunks, vectors, ingest_status, transcript_source,
+                 revision, updated_at)
+                VALUES (?, '', NULL, '[]', ?, 'processing', ?, {_NEXT_REVISION}, CURRENT_TIMESTAMP)
+            """, (primary_key, sqlite3.Binary(encode_vectors([])), transcript_source, primary_key))
+            conn.execute("DELETE FROM video_segments WHERE video_id = ?", (primary_key,))
+            _unindex_chunks(conn, primary_key)
+        
+        video_index_cache.invalidate(primary_key)
+        _refresh_library_index(primary_key)
+        return True
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def append_video_data(
+    primary_key: str,
+    transcript_text: str,
+    chunks: List[str],
+    vectors: Union[List[List[float]], np.ndarray],
+    normalize_vectors: bool = True
+) -> bool:
+    """
+    Append transcript text, chunks and vectors to a row started by begin_video_ingest.
+    
+    Each call inserts one video_segments row, so the cost of an append does not
+    grow with what is already stored; finish_video_ingest merges them into the
+    video's row. Until then load_video_index includes them.
+    
+    Args:
+        primary_key: Unique identifier for the video
+        transcript_text: Newly transcribed text
+        chunks: New text chunks
+        vectors: Embedding vectors for the new chunks
+        normalize_vectors: Store vectors L2-normalized (must match earlier appends)
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        with get_connection() as conn:
+            if not video_exists(primary_key, complete_only=False):
+                print(f"Not found: {primary_key}")
+                return False
+            
+            last = _last_segment(conn, primary_key)
+            segment_id, first_chunk = (last[0] + 1, last[1]) if last else (0, 0)
+            vectors_blob = encode_vectors(vectors, normalize=normalize_vectors)
+            if last and is_encoded(last[2]):
+                _, dim, count = read_header(bytes(last[2]))
+                new_dim = read_header(vectors_blob)[1]
+                if count and new_dim and new_dim != dim:
+                    raise ValueError(f"Dimension mismatch: stored {dim}, appending {new_dim}")
+            
+            conn.execute("""
+                INSERT INTO video_segments
+                (video_id, segment_id, first_chunk, num_chunks, transcript, chunks, vectors)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (primary_key, segment_id, first_chunk, len(chunks), transcript_text,
+                  json.dumps(list(chunks)), sqlite3.Binary(vectors_blob)))
+            _index_chunks(conn, primary_key, chunks, first_id=first_chunk)
+        return True
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def finish_video_ingest(primary_key: str, transcript_segments: Optional[List[Dict]] = None) -> bool:
+    """
+    Merge a streamed video's appended segments into its row and mark it complete.
+    
+    Args:
+        primary_key: Unique identifier for the video
+        transcript_segments: Optional timed {start, end, text} transcript lines
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        with get_connection() as conn:
+            row = conn.execute("""
+                SELECT full_transcription, chunks, vectors FROM youtube_videos WHERE primary_key = ?
+            """, (primary_key,)).fetchone()
+            if not row:
+                print(f"Not found: {primary_key}")
+                return False
+            
+            transcript, chunks_json, vectors_value = row
+            normalized = is_encoded(vectors_value) and is_normalized(bytes(vectors_value))
+            transcript, chunks, matrix, normalized = _merge_segments(
+                conn, primary_key, transcript, json.loads(chunks_json) if chunks_json else [],
+                _decode_vectors_column(vectors_value), normalized
+            )
+            conn.execute("""
+                UPDATE youtube_videos
+                SET full_transcription = ?, chunks = ?, vectors = ?, transcript_segments = ?,
+                    ingest_status = 'complete', revision = revision + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE primary_key = ?
+            """, (transcript, json.dumps(chunks), sqlite3.Binary(encode_vectors(matrix, normalize=normalized)),
+                  json.dumps(transcript_segments) if transcript_segments else None, primary_key))
+            conn.execute("DELETE FROM video_segments WHERE video_id = ?", (primary_key,))
+        _refresh_library_index(primary_key)
+        return True
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def load_video_vectors(primary_key: str, chunk_ids: Optional[Sequence[int]] = None) -> Optional[np.ndarray]:
+    """
+    Load only the embedding matrix for a video.
+    
+    Args:
+        primary_key: Unique identifier for the video
+        chunk_ids: Rows to load, in the order wanted (default: all rows). For
+            packed vectors only those rows are read, through incremental blob I/O.
+    
+    Returns:
+        (num_rows, dim) float32 array, or None if the video is not stored
+    """
+    try:
+        conn = get_connection()
+        if chunk_ids is None:
+            row = conn.execute("SELECT vectors FROM youtube_videos WHERE primary_key = ?", (primary_key,)).fetchone()
+            return _decode_vectors_column(row[0]) if row else None
+        
+        row = conn.execute(
+            "SELECT rowid, typeof(vectors) FROM youtube_videos WHERE primary_key = ?", (primary_key,)
+        ).fetchone()
+        if not row:
+            return None
+        rowid, value_type = row
+        ids = [int(i) for i in chunk_ids]
+        
+        if value_type != 'blob' or not hasattr(conn, "blobopen"):
+            return load_video_vectors(primary_key)[ids]
+        
+        with conn.blobopen("youtube_videos", "vectors", rowid, readonly=True) as blob:
+            _, dim, count = read_header(blob.read(HEADER_SIZE))
+            row_bytes = dim * 4
+            matrix = np.empty((len(ids), dim), dtype=np.float32)
+            for out_row, i in enumerate(ids):
+                if not 0 <= i < count:
+                    raise IndexError(f"Chunk {i} out of range for {primary_key} ({count} chunks)")
+                blob.seek(HEADER_SIZE + i * row_bytes)
+                matrix[out_row] = np.frombuffer(blob.read(row_bytes), dtype="<f4")
+        return matrix
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def load_video_index(primary_key: str) -> Optional[VideoIndex]:
+    """
+    Return the search-ready index for a video, loading it from the database on a cache miss.
+    
+    Args:
+        primary_key: Unique identifier for the video
+    
+    Returns:
+        VideoIndex shared through the process-wide cache, or None if the video is not stored
+    """
+    index = video_index_cache.get(primary_key)
+    if index is not None and (index.complete or not _index_is_stale(index)):
+        return index
+    
+    try:
+        with timed("db_video_load_seconds"):
+            row = get_connection().execute("""
+                SELECT full_transcription, chunks, vectors, ingest_status FROM youtube_videos WHERE primary_key = ?
+            """, (primary_key,)).fetchone()
+            
+            if not row:
+                print(f"Not found: {primary_key}")
+                return None
+            
+            transcript, chunks_json, vectors_value, ingest_status = row
+            chunks = json.loads(chunks_json) if chunks_json else []
+            normalized = is_encoded(vectors_value) and is_normalized(bytes(vectors_value))
+            matrix = _decode_vectors_column(vectors_value)
+            if ingest_status != 'complete':
+                transcript, chunks, matrix, normalized = _merge_segments(
+                    get_connection(), primary_key, transcript, chunks, matrix, normalized
+                )
+            index = build_video_index(
+                primary_key,
+                matrix,
+                chunks,
+                transcript=transcript,
+                normalized=normalized,
+                complete=ingest_status == 'complete'
+            )
+        video_index_cache.put(index)
+        return index
+    
     except Exception as e:
         print(f"Error: {e}")
         return None
+
+
+def _index_is_stale(index: VideoIndex) -> bool:
+    """
+    Whether a cached, still-growing index is behind its stored row.
+    
+    Indexes grown by an ingestion in this process stay in step with the row;
+    ones loaded while another process was ingesting have to be re-read.
+    """
+    metadata = get_video_metadata(index.video_id)
+    if metadata is None:
+        return False
+    return metadata['ingest_status'] == 'complete' or (metadata['num_chunks'] or 0) > len(index.chunks)
+
+
+def load_library_index() -> Optional[IVFIndex]:
+    """
+    Return the approximate nearest-neighbour index over every complete video.
+    
+    The index is read from LIBRARY_INDEX_PATH (or built from the database) on
+    first use. Each call brings it up to date with rows added, replaced or
+    deleted since, including by other processes. Changes are saved by
+    save_library_index, within LIBRARY_INDEX_SAVE_SECONDS.
+    
+    Returns:
+        IVFIndex shared by the process, or None on error
+    """
+    global _library_index
+    with _library_lock:
+        try:
+            if _library_index is None:
+                if os.path.exists(LIBRARY_INDEX_PATH):
+                    _library_index = IVFIndex.load(LIBRARY_INDEX_PATH)
+                    _library_index.nprobe = LIBRARY_INDEX_NPROBE
+                else:
+                    _library_index = IVFIndex(nprobe=LIBRARY_INDEX_NPROBE)
+            
+            rows = get_connection().execute(
+                "SELECT primary_key, revision FROM youtube_videos WHERE ingest_status = 'complete'"
+            ).fetchall()
+            current = {video_id: str(revision) for video_id, revision in rows}
+            
+            changed = False
+            for video_id in [v for v in _library_index.versions if v not in current]:
+                _library_index.remove(video_id)
+                changed = True
+            for video_id, version in current.items():
+                if video_id not in _library_index or _library_index.versions.get(video_id) != version:
+                    _add_to_library_index(video_id, version)
+                    changed = True
+            
+            if changed:
+                _schedule_library_save()
+            return _library_index
+        
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+
+
+def _add_to_library_index(primary_key: str, version: str) -> bool:
+    """
+    Insert (or replace) one video in the loaded library index.
+    
+    A video whose vectors can't be loaded or don't fit the index is left out,
+    so one bad row doesn't stop library search.
+    
+    Returns:
+        True if the video was added
+    """
+    vectors = load_video_vectors(primary_key)
+    try:
+        if vectors is None:
+            raise ValueError("its vectors could not be loaded")
+        _library_index.add(primary_key, vectors, version=version)
+        return True
+    except ValueError as e:
+        print(f"Library index: skipping {primary_key}: {e}")
+        _library_index.remove(primary_key)
+        return False
+
+
+def _refresh_library_index(primary_key: str) -> None:
+    """Apply a write to the library index, if this process has it loaded."""
+    if _library_index is None:
+        return
+    with _library_lock:
+        try:
+            row = get_connection().execute(
+                "SELECT revision, ingest_status FROM youtube_videos WHERE primary_key = ?", (primary_key,)
+            ).fetchone()
+            if row and row[1] == 'complete':
+                _add_to_library_index(primary_key, str(row[0]))
+            else:
+                _library_index.remove(primary_key)
+            _schedule_library_save()
+        except Exception as e:
+            print(f"Error: {e}")
+
+
+def _schedule_library_save() -> None:
+    """Save the library index once LIBRARY_INDEX_SAVE_SECONDS have passed, batching the writes until then."""
+    global _library_save_timer
+    if _library_save_timer is None:
+        _library_save_timer = threading.Timer(LIBRARY_INDEX_SAVE_SECONDS, save_library_index)
+        _library_save_timer.daemon = True
+        _library_save_timer.start()
+
+
+def save_library_index() -> None:
+    """Write pending library index changes to LIBRARY_INDEX_PATH now."""
+    global _library_save_timer
+    with _library_lock:
+        if _library_save_timer is None:
+            return
+        _library_save_timer.cancel()
+        _library_save_timer = None
+        try:
+            _library_index.save(LIBRARY_INDEX_PATH)
+        except Exception as e:
+            print(f"Error: {e}")
+
+
+atexit.register(save_library_index)
+
+
+def migrate_vectors_to_blob(normalize_vectors: bool = True) -> int:
+    """
+    Rewrite legacy JSON-encoded vector rows as packed float32 blobs.
+    
+    Safe to run repeatedly; rows that are already packed are skipped.
+    
+    Args:
+        normalize_vectors: L2-normalize vectors while converting
+    
+    Returns:
+        Number of rows converted
+    """
+    conn = get_connection()
+    
+    keys = [
+        row[0] for row in
+        conn.execute("SELECT primary_key FROM youtube_videos WHERE typeof(vectors) = 'text'").fetchall()
+    ]
+    
+    migrated = 0
+    for key in keys:
+        with conn:
+            vectors = json.loads(
+                conn.execute("SELECT vectors FROM youtube_videos WHERE primary_key = ?", (key,)).fetchone()[0]
+            )
+            blob = encode_vectors(vectors, normalize=normalize_vectors)
+            conn.execute(
+                "UPDATE youtube_videos SET vectors = ? WHERE primary_key = ?",
+                (sqlite3.Binary(blob), key)
+            )
+        video_index_cache.invalidate(key)
+        migrated += 1
+    
+    print(f"Migrated {migrated} video(s) to packed vectors")
+    return migrated
+
+
+if __name__ == "__main__":
+    migrate_vectors_to_blob()
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from .db_handler import DB_PATH, get_connection
+from .vector_codec import encode_vectors, decode_vectors
+
+
+def normalize_query_text(text: str) -> str:
+    """Normalize a query for cache lookups: casefold and collapse whitespace."""
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache of query embeddings.
+
+    Tier one is an in-process LRU; tier two is a SQLite table keyed by
+    (normalized text, embedding deployment) so hits survive restarts.
+    """
+
+    def __init__(self, max_entries: int, db_path: str = DB_PATH):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._memory: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        """Return a cached embedding for (text, model), checking memory then disk."""
+        key = (normalize_query_text(text), model)
+
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return list(vector)
+
+        vector = self._load(key)
+
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, vector)
+            return list(vector)
+
+    def put(self, text: str, model: str, vector: List[float]) -> None:
+        """Store an embedding in both tiers."""
+        key = (normalize_query_text(text), model)
+        with self._lock:
+            self._remember(key, list(vector))
+        self._save(key, vector)
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory tier; the SQLite tier is kept."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters for both tiers."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: Tuple[str, str], vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        try:
+            row = get_connection(self.db_path).execute(
+                "SELECT vector FROM query_embeddings WHERE query_text = ? AND model = ?", key
+            ).fetchone()
+            return decode_vectors(row[0])[0].tolist() if row else None
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+
+    def _save(self, key: Tuple[str, str], vector: List[float]) -> None:
+        try:
+            with get_connection(self.db_path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (query_text, model, vector) VALUES (?, ?, ?)",
+                    (key[0], key[1], sqlite3.Binary(encode_vectors([vector])))
+                )
+        except Exception as e:
+            print(f"Error: {e}")
+
+
+# Process-wide cache used by create_single_embedding
+query_embedding_cache = QueryEmbeddingCache(int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")))
+
+
+def chunk_content_hash(text: str, model: str) -> str:
+    """Content address of a chunk embedding: sha256 over model and exact chunk text."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class ChunkEmbeddingStore:
+    """
+    Content-addressed store of chunk embeddings in SQLite.
+
+    Keys are chunk_content_hash(text, model), so identical text embedded with the
+    same deployment is only ever sent to the API once, across videos and retries.
+    """
+
+    # Stay well below SQLite's bound-parameter limit
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Return stored embeddings for the given content hashes; missing keys are omitted."""
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        try:
+            conn = get_connection(self.db_path)
+            for i in range(0, len(hashes), self._LOOKUP_BATCH):
+                batch = hashes[i:i + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT content_hash, vector FROM chunk_embeddings WHERE content_hash IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for content_hash, blob in rows:
+                    found[content_hash] = decode_vectors(blob)[0].tolist()
+        except Exception as e:
+            print(f"Error: {e}")
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]], model: str) -> None:
+        """Store embeddings keyed by content hash."""
+        if not items:
+            return
+        try:
+            with get_connection(self.db_path) as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO chunk_embeddings (content_hash, model, vector) VALUES (?, ?, ?)",
+                    [
+                        (content_hash, model, sqlite3.Binary(encode_vectors([vector])))
+                        for content_hash, vector in items.items()
+                    ]
+                )
+        except Exception as e:
+            print(f"Error: {e}")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Process-wide store used by create_embeddings
+chunk_embedding_store = ChunkEmbeddingStore()
@@ -0,0 +1,231 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from config import settings
+from .metrics import count
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute.
+
+    Shared by all worker threads (and all concurrent ingestions) so the combined
+    request rate stays inside the deployment quota. A limit of None is unlimited.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Block until one request carrying `tokens` tokens fits in the budget.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                need_tokens = min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+                request_ok = not self.requests_per_minute or self._requests >= 1
+                tokens_ok = not self.tokens_per_minute or self._tokens >= need_tokens
+                if request_ok and tokens_ok:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= need_tokens
+                    return waited
+
+                delay = 0.0
+                if not request_ok:
+                    delay = max(delay, (1 - self._requests) * 60.0 / self.requests_per_minute)
+                if not tokens_ok:
+                    delay = max(delay, (need_tokens - self._tokens) * 60.0 / self.tokens_per_minute)
+
+            time.sleep(delay)
+            waited += delay
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(
+                float(self.requests_per_minute),
+                self._requests + elapsed * self.requests_per_minute / 60.0
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                float(self.tokens_per_minute),
+                self._tokens + elapsed * self.tokens_per_minute / 60.0
+            )
+
+
+def make_token_batches(
+    texts: List[str],
+    max_batch_tokens: int,
+    max_batch_items: int
+) -> List[List[int]]:
+    """
+    Group text indices into batches bounded by estimated tokens and item count.
+
+    Args:
+        texts: Texts to embed
+        max_batch_tokens: Upper bound on estimated tokens per request
+        max_batch_items: Upper bound on inputs per request
+
+    Returns:
+        List of batches, each a list of indices into texts, in order
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_batch_tokens or len(current) >= max_batch_items):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """True for 429s, 5xx responses, timeouts and dropped connections."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectionError", "Timeout")
+
+
+def retry_delay(error: Exception, attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff, never shorter than a server Retry-After."""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        if retry_after is not None:
+            delay = max(delay, float(retry_after))
+    except ValueError:
+        pass
+    return delay
+
+
+class EmbeddingScheduler:
+    """Runs embedding batches concurrently under a shared rate limit, with retries."""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_batch_tokens: int = 8000,
+        max_batch_items: int = 100,
+        max_retries: int = 5,
+        limiter: Optional[RateLimiter] = None
+    ):
+        self.max_workers = max_workers
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+        self.max_retries = max_retries
+        self.limiter = limiter or RateLimiter()
+
+    def run(
+        self,
+        texts: List[str],
+        embed_batch: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """
+        Embed texts through embed_batch, returning vectors in input order.
+
+        Args:
+            texts: Texts to embed
+            embed_batch: Callable sending one batch to the API and returning its vectors in order
+
+        Returns:
+            One vector per input text
+        """
+        if not texts:
+            return []
+
+        batches = make_token_batches(texts, self.max_batch_tokens, self.max_batch_items)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        def run_batch(indices: List[int]) -> None:
+            batch = [texts[i] for i in indices]
+            vectors = self._call_with_retry(batch, embed_batch)
+            if len(vectors) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+            for i, vector in zip(indices, vectors):
+                results[i] = vector
+
+        workers = max(1, min(self.max_workers, len(batches)))
+        if workers == 1:
+            for indices in batches:
+                run_batch(indices)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # list() re-raises the first failure
+                list(executor.map(run_batch, batches))
+
+        return results
+
+    def _call_with_retry(
+        self,
+        batch: List[str],
+        embed_batch: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        tokens = sum(estimate_tokens(text) for text in batch)
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens)
+            try:
+                return embed_batch(batch)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                delay = retry_delay(e, attempt)
+                count("embedding_retries_total")
+                logger.warning("Embedding batch failed (%s); retrying in %.1fs", e, delay)
+                time.sleep(delay)
+                attempt += 1
+
+
+# Process-wide limiter so concurrent ingestions share one quota
+embedding_rate_limiter = RateLimiter(
+    requests_per_minute=settings.EMBEDDING_REQUESTS_PER_MINUTE or None,
+    tokens_per_minute=settings.EMBEDDING_TOKENS_PER_MINUTE or None
+)
+
+
+def default_scheduler() -> EmbeddingScheduler:
+    """Build a scheduler from the EMBEDDING_* settings sharing the process-wide limiter."""
+    return EmbeddingScheduler(
+        max_workers=settings.EMBEDDING_MAX_WORKERS,
+        max_batch_tokens=settings.EMBEDDING_BATCH_TOKENS,
+        max_batch_items=settings.EMBEDDING_BATCH_ITEMS,
+        max_retries=settings.EMBEDDING_MAX_RETRIES,
+        limiter=embedding_rate_limiter
+    )
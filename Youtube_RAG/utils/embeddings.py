@@ -1,15 +1,22 @@
 from typing import List
 import os
-from openai import AzureOpenAI
+from .clients import clients
+from .embedding_cache import query_embedding_cache, chunk_embedding_store, chunk_content_hash
+from .embedding_scheduler import default_scheduler
+from .metrics import count, timed
 
 
-def create_embeddings(chunks: List[str], model: str = None) -> List[List[float]]:
+def create_embeddings(chunks: List[str], model: str = None, use_cache: bool = True) -> List[List[float]]:
     """
     Create vector embeddings for text chunks using OpenAI's embedding model.
     
+    Chunks already in the content-addressed chunk embedding store are not sent to
+    the API; only new text is embedded.
+    
     Args:
         chunks: List of text chunks to embed
         model: The embedding deployment name (default: uses OPENAI_AZURE_EMBEDDING_DEPLOYMENT from env)
+        use_cache: Reuse and record embeddings in the chunk embedding store
         
     Returns:
         List of embedding vectors (each vector is a list of floats)
@@ -22,56 +29,104 @@ def create_embeddings(chunks: List[str], model: str = None) -> List[List[float]]
         if not model:
             raise ValueError("OPENAI_AZURE_EMBEDDING_DEPLOYMENT environment variable is not set")
     
-    client = AzureOpenAI(
-        azure_endpoint=os.getenv("OPENAI_AZURE_ENDPOINT"),
-        api_key=os.getenv("OPENAI_AZURE_API_KEY"),
-        api_version=os.getenv("OPENAI_AZURE_API_VERSION")
-    )
+    if not use_cache:
+        return _embed_batches(chunks, model)
     
-    embeddings = []
+    hashes = [chunk_content_hash(chunk, model) for chunk in chunks]
+    known = chunk_embedding_store.get_many(hashes)
     
-    # Process chunks in batches to avoid rate limits
-    batch_size = 100
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i:i + batch_size]
-        
-        response = client.embeddings.create(
-            input=batch,
-            model=model
-        )
-        
-        # Extract embeddings from response
-        batch_embeddings = [item.embedding for item in response.data]
-        embeddings.extend(batch_embeddings)
+    # Embed each distinct missing text once
+    missing = {}
+    for content_hash, chunk in zip(hashes, chunks):
+        if content_hash not in known and content_hash not in missing:
+            missing[content_hash] = chunk
+    
+    count("embedding_chunks_reused_total", len(chunks) - len(missing))
+    if missing:
+        print(f"   Embedding {len(missing)} new chunk(s), {len(chunks) - len(missing)} reused")
+        new_embeddings = dict(zip(missing.keys(), _embed_batches(list(missing.values()), model)))
+        chunk_embedding_store.put_many(new_embeddings, model)
+        known.update(new_embeddings)
+    
+    return [known[content_hash] for content_hash in hashes]
+
+
+def _embed_batches(chunks: List[str], model: str) -> List[List[float]]:
+    """Send chunks to the embedding API in token-sized batches concurrently, preserving order."""
+    # The shared client has retries disabled; the scheduler owns backoff
+    client = clients.azure_openai()
     
-    return embeddings
+    def embed_batch(batch: List[str]) -> List[List[float]]:
+        with timed("embedding_request_seconds", kind="chunks"):
+            response = client.embeddings.create(
+                input=batch,
+                model=model
+            )
+        count("embedding_chunks_total", len(batch))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    
+    return default_scheduler().run(chunks, embed_batch)
 
 
-def create_single_embedding(text: str, model: str = None) -> List[float]:
+def create_query_embeddings(texts: List[str], model: str = None, use_cache: bool = True) -> List[List[float]]:
     """
-    Create a vector embedding for a single text string.
+    Create vector embeddings for several queries in a single API request.
+    
+    Queries found in the query embedding cache are not sent; the rest are
+    embedded together, so N queries cost at most one round trip.
     
     Args:
-        text: Text to embed
+        texts: Queries to embed
         model: The embedding deployment name (default: uses OPENAI_AZURE_EMBEDDING_DEPLOYMENT from env)
+        use_cache: Look up and store the embeddings in the query embedding cache
         
     Returns:
-        Embedding vector as a list of floats
+        Embedding vectors in the same order as texts
     """
+    if not texts:
+        return []
+    
     if model is None:
         model = os.getenv("OPENAI_AZURE_EMBEDDING_DEPLOYMENT")
         if not model:
             raise ValueError("OPENAI_AZURE_EMBEDDING_DEPLOYMENT environment variable is not set")
     
-    client = AzureOpenAI(
-        azure_endpoint=os.getenv("OPENAI_AZURE_ENDPOINT"),
-        api_key=os.getenv("OPENAI_AZURE_API_KEY"),
-        api_version=os.getenv("OPENAI_AZURE_API_VERSION")
-    )
+    embeddings = {}
+    if use_cache:
+        for text in texts:
+            cached = query_embedding_cache.get(text, model)
+            if cached is not None:
+                embeddings[text] = cached
     
-    response = client.embeddings.create(
-        input=[text],
-        model=model
-    )
+    missing = list(dict.fromkeys(text for text in texts if text not in embeddings))
+    if missing:
+        with timed("embedding_request_seconds", kind="query"):
+            response = clients.azure_openai().with_options(max_retries=2).embeddings.create(
+                input=missing,
+                model=model
+            )
+        count("embedding_queries_total", len(missing))
+        for item in response.data:
+            embeddings[missing[item.index]] = item.embedding
+            if use_cache:
+                query_embedding_cache.put(missing[item.index], model, item.embedding)
     
-    return response.data[0].embedding
+    return [embeddings[text] for text in texts]
+
+
+def create_single_embedding(text: str, model: str = None, use_cache: bool = True) -> List[float]:
+    """
+    Create a vector embedding for a single text string.
+    
+    Repeated queries are served from the query embedding cache (memory, then SQLite)
+    without a network call.
+    
+    Args:
+        text: Text to embed
+        model: The embedding deployment name (default: uses OPENAI_AZURE_EMBEDDING_DEPLOYMENT from env)
+        use_cache: Look up and store the embedding in the query embedding cache
+        
+    Returns:
+        Embedding vector as a list of floats
+    """
+    return create_query_embeddings([text], model=model, use_cache=use_cache)[0]
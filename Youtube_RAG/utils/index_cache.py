@@ -0,0 +1,181 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .vector_codec import normalize_rows
+
+
+class VideoIndex:
+    """
+    Search-ready data for one video: L2-normalized float32 matrix plus its chunks.
+
+    An index built during streaming ingestion starts with complete=False and
+    grows through append(); readers should use snapshot() for a consistent view.
+    """
+
+    __slots__ = ("video_id", "matrix", "chunks", "transcript", "nbytes", "complete", "_lock")
+
+    def __init__(
+        self,
+        video_id: str,
+        matrix: np.ndarray,
+        chunks: List[str],
+        transcript: Optional[str] = None,
+        complete: bool = True
+    ):
+        if len(matrix) != len(chunks):
+            raise ValueError("Number of vectors must match number of chunks")
+        self.video_id = video_id
+        self.matrix = matrix
+        self.chunks = chunks
+        self.transcript = transcript
+        self.complete = complete
+        self._lock = threading.Lock()
+        self.nbytes = (
+            matrix.nbytes
+            + sum(sys.getsizeof(chunk) for chunk in chunks)
+            + (sys.getsizeof(transcript) if transcript else 0)
+        )
+
+    def snapshot(self) -> Tuple[np.ndarray, List[str]]:
+        """Return matching (matrix, chunks) even while the index is growing."""
+        with self._lock:
+            return self.matrix, self.chunks
+
+    def append(self, vectors, chunks: List[str], transcript_text: Optional[str] = None) -> None:
+        """
+        Add newly embedded chunks to a growing index.
+
+        Args:
+            vectors: Raw (un-normalized) vectors for the new chunks
+            chunks: New text chunks
+            transcript_text: Transcript text covered by the new chunks
+        """
+        if len(vectors) != len(chunks):
+            raise ValueError("Number of vectors must match number of chunks")
+
+        with self._lock:
+            matrix = self.matrix
+            if len(chunks):
+                new_rows = normalize_rows(np.asarray(vectors, dtype=np.float32)).astype(np.float32, copy=False)
+                matrix = np.vstack([matrix, new_rows]) if len(matrix) else np.ascontiguousarray(new_rows)
+            # Swap in new objects so earlier snapshots stay valid
+            self.chunks = self.chunks + list(chunks)
+            self.matrix = matrix
+            if transcript_text:
+                self.transcript = f"{self.transcript} {transcript_text}".strip() if self.transcript else transcript_text
+            self.nbytes = (
+                matrix.nbytes
+                + sum(sys.getsizeof(chunk) for chunk in self.chunks)
+                + (sys.getsizeof(self.transcript) if self.transcript else 0)
+            )
+
+
+def build_video_index(
+    video_id: str,
+    vectors,
+    chunks: List[str],
+    transcript: Optional[str] = None,
+    normalized: bool = False,
+    complete: bool = True
+) -> VideoIndex:
+    """
+    Build a VideoIndex from raw vectors.
+
+    Args:
+        video_id: YouTube video ID
+        vectors: Embedding vectors as a list of lists or a 2-D array
+        chunks: Text chunks corresponding to the vectors
+        transcript: Optional full transcript
+        normalized: Set when vectors are already L2-normalized
+        complete: False for an index that streaming ingestion is still filling
+
+    Returns:
+        VideoIndex with a contiguous float32 matrix
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if not normalized and len(matrix):
+        matrix = normalize_rows(matrix).astype(np.float32, copy=False)
+    return VideoIndex(video_id, np.ascontiguousarray(matrix), list(chunks), transcript, complete)
+
+
+class VideoIndexCache:
+    """Thread-safe LRU cache of VideoIndex objects bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, VideoIndex]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, video_id: str) -> Optional[VideoIndex]:
+        """Return the cached index for a video and mark it most recently used."""
+        with self._lock:
+            index = self._entries.get(video_id)
+            if index is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(video_id)
+            self.hits += 1
+            return index
+
+    def put(self, index: VideoIndex) -> None:
+        """
+        Insert an index, evicting least recently used entries to stay within budget.
+
+        Re-putting the same index after append() refreshes its accounted size.
+        """
+        nbytes = index.nbytes
+        with self._lock:
+            self._remove(index.video_id)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[index.video_id] = index
+            self._sizes[index.video_id] = nbytes
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted_id)
+                self.evictions += 1
+
+    def invalidate(self, video_id: str) -> None:
+        """Drop a video from the cache, e.g. after its stored data changed."""
+        with self._lock:
+            self._remove(video_id)
+
+    def clear(self) -> None:
+        """Drop every cached index."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Return cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, video_id: str) -> None:
+        if self._entries.pop(video_id, None) is not None:
+            self._bytes -= self._sizes.pop(video_id)
+
+
+# Process-wide cache shared by every session
+video_index_cache = VideoIndexCache(
+    int(float(os.getenv("VIDEO_INDEX_CACHE_MB", "512")) * 1024 * 1024)
+)
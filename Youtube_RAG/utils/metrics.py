@@ -0,0 +1,249 @@
+"""
+In-process metrics: counters and timing histograms with Prometheus text and JSON exports.
+
+Graph nodes are timed by instrument_node (see main.build_graph); the external
+calls record what they send and how long they take:
+
+    graph_node_seconds{node}                time spent in each graph node
+    graph_node_errors_total{node}           nodes that raised
+    graph_route_total{route}                router decisions
+    llm_request_seconds{purpose}            Gemini calls (agent, summary)
+    llm_prompt_tokens_total{purpose}        prompt tokens reported by the model
+    llm_completion_tokens_total{purpose}    completion tokens reported by the model
+    whisper_request_seconds                 Whisper uploads
+    whisper_upload_bytes_total              audio bytes uploaded to Whisper
+    embedding_request_seconds{kind}         embedding API calls (chunks, query)
+    embedding_chunks_total                  chunks sent to the embedding API
+    embedding_chunks_reused_total           chunks served from the embedding store
+    embedding_retries_total                 embedding batches retried after an error
+    whisper_retries_total                   Whisper uploads retried after an error
+    summary_errors_total                    conversation summaries that failed
+    prefetch_errors_total                   speculative retrievals that failed
+    server_turn_errors_total                HTTP chat turns that failed
+    db_video_load_seconds                   loading a video index from the database
+
+Each process has its own registry, so background ingestion workers' numbers
+are not part of the app's export.
+
+With METRICS_TRACE_LOG set to a file path, every request run inside
+trace_request() appends one JSON line to it listing the spans and counts it caused.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds, from cached lookups up to long uploads
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+TRACE_LOG_PATH = os.getenv("METRICS_TRACE_LOG")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and labels."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Add value to a counter."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one observation (e.g. seconds taken) in a histogram."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(self.buckets)}
+            histogram["count"] += 1
+            histogram["sum"] += value
+            histogram["max"] = max(histogram["max"], value)
+            position = bisect.bisect_left(self.buckets, value)
+            if position < len(self.buckets):
+                histogram["buckets"][position] += 1
+
+    def snapshot(self) -> Dict:
+        """
+        Return every metric as plain data.
+
+        Returns:
+            Dict with "counters" ({name: [{labels, value}]}) and "histograms"
+            ({name: [{labels, count, sum, mean, max, buckets}]}), buckets being
+            cumulative counts per upper bound
+        """
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(labels), "value": value} for labels, value in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+            histograms = {}
+            for name, series in sorted(self._histograms.items()):
+                histograms[name] = []
+                for labels, histogram in sorted(series.items()):
+                    cumulative, total = {}, 0
+                    for bound, count in zip(self.buckets, histogram["buckets"]):
+                        total += count
+                        cumulative[str(bound)] = total
+                    histograms[name].append({
+                        "labels": dict(labels),
+                        "count": histogram["count"],
+                        "sum": round(histogram["sum"], 6),
+                        "mean": round(histogram["sum"] / histogram["count"], 6),
+                        "max": round(histogram["max"], 6),
+                        "buckets": cumulative,
+                    })
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self) -> str:
+        """Export the snapshot as JSON."""
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self) -> str:
+        """Export in the Prometheus text exposition format."""
+        lines = []
+        snapshot = self.snapshot()
+        for name, series in snapshot["counters"].items():
+            lines.append(f"# TYPE {name} counter")
+            for entry in series:
+                lines.append(f"{name}{_format_labels(_labels(entry['labels']))} {_format_value(entry['value'])}")
+        for name, series in snapshot["histograms"].items():
+            lines.append(f"# TYPE {name} histogram")
+            for entry in series:
+                labels = _labels(entry["labels"])
+                for bound, count in entry["buckets"].items():
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', bound))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {entry['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(entry['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop every recorded value."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Trace of the request running in this context (None when tracing is off)
+_current_trace: ContextVar[Optional[Dict]] = ContextVar("metrics_trace", default=None)
+_trace_lock = threading.Lock()
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """Add to a counter, and to the current request's trace."""
+    metrics.inc(name, value, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        key = f"{name}{_format_labels(_labels(labels))}"
+        with _trace_lock:
+            trace["counts"][key] = trace["counts"].get(key, 0) + value
+
+
+@contextmanager
+def timed(name: str, **labels) -> Iterator[None]:
+    """Record how long the block takes in a histogram, and as a span of the current request's trace."""
+    trace = _current_trace.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        metrics.observe(name, seconds, **labels)
+        if trace is not None:
+            with _trace_lock:
+                trace["spans"].append({
+                    "name": name,
+                    **labels,
+                    "start": round(start - trace["_start"], 4),
+                    "seconds": round(seconds, 4),
+                })
+
+
+def record_llm_usage(response, purpose: str) -> None:
+    """Count the prompt and completion tokens a chat model reported for one call."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        count("llm_prompt_tokens_total", usage["input_tokens"], purpose=purpose)
+    if usage.get("output_tokens"):
+        count("llm_completion_tokens_total", usage["output_tokens"], purpose=purpose)
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """Wrap a graph node (or router) so each call is timed as graph_node_seconds{node=name}."""
+    @wraps(node)
+    def instrumented(state):
+        try:
+            with timed("graph_node_seconds", node=name):
+                return node(state)
+        except Exception:
+            count("graph_node_errors_total", node=name)
+            raise
+
+    return instrumented
+
+
+@contextmanager
+def trace_request(request_id: str, **attributes) -> Iterator[Optional[Dict]]:
+    """
+    Collect the spans and counts of one request and append them to METRICS_TRACE_LOG.
+
+    Does nothing unless METRICS_TRACE_LOG is set. Work handed to other threads
+    is traced only if they run in a copy of this context (as LangGraph's nodes do).
+
+    Args:
+        request_id: Identifies the request in the log (e.g. session and turn)
+        attributes: Extra fields written with the trace
+    """
+    if not TRACE_LOG_PATH:
+        yield None
+        return
+
+    trace = {"request_id": request_id, **attributes, "started_at": time.time(),
+             "_start": time.perf_counter(), "spans": [], "counts": {}}
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace["seconds"] = round(time.perf_counter() - trace.pop("_start"), 4)
+        try:
+            line = json.dumps(trace, default=str)
+            with _trace_lock, open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except Exception as e:
+            print(f"Error: {e}")
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
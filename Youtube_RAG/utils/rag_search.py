@@ -1,41 +1,316 @@
-from typing import List
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from .embeddings import create_single_embedding
+from .embeddings import create_single_embedding, create_query_embeddings
+from .index_cache import VideoIndex, build_video_index
+from .ann_index import top_k_indices
+from .vector_codec import normalize_rows
+from .db_handler import load_library_index, load_video_chunks, load_video_index, search_chunks_fulltext
+
+
+# Standard constant from the reciprocal-rank fusion paper; damps the head of each ranking
+RRF_K = 60
+# Ranked candidates taken from each retriever before fusion, per requested result
+FUSION_DEPTH = 4
+# Cap on sections returned when several queries are searched together
+MAX_MULTI_QUERY_RESULTS = 10
+
+_QUESTION_WORDS = {
+    "what", "why", "how", "who", "whom", "whose", "when", "where", "which",
+    "do", "does", "did", "is", "are", "was", "were", "can", "could", "should", "would",
+    "explain", "describe", "summarize", "summarise", "tell", "give", "list", "compare",
+}
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = RRF_K) -> List[int]:
+    """
+    Merge several rankings of chunk ids into one.
+    
+    Each id scores sum(1 / (k + rank)) over the rankings it appears in, so ids
+    ranked well by more than one retriever rise to the top.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def is_keyword_query(query: str) -> bool:
+    """
+    Guess whether a query is a keyword lookup (names, codes, "exact phrases")
+    rather than a natural-language question that needs semantic matching.
+    """
+    if '"' in query:
+        return True
+    words = re.findall(r"\w+", query.lower())
+    return 0 < len(words) <= 4 and words[0] not in _QUESTION_WORDS and not query.rstrip().endswith("?")
+
+
+def lexical_search(query: str, video_id: str, top_k: int = 5) -> List[str]:
+    """
+    Full-text (BM25) search over one video's chunks, with no network call.
+    
+    Args:
+        query: Keywords or "quoted phrases"
+        video_id: YouTube video ID
+        top_k: Number of chunks to return (default: 5)
+    
+    Returns:
+        List of up to top_k matching chunks; empty if nothing matches
+    """
+    return [text for _, text in search_chunks_fulltext(video_id, query, limit=top_k)]
+
+
+def _fuse_with_fulltext(
+    query: str,
+    video_id: Optional[str],
+    similarities: np.ndarray,
+    top_k: int
+) -> List[int]:
+    """Rank chunk positions by vector similarity, fused with BM25 when a video_id is given."""
+    depth = max(top_k * FUSION_DEPTH, 20)
+    vector_ranking = top_k_indices(similarities, depth).tolist()
+    if not video_id:
+        return vector_ranking[:top_k]
+    
+    lexical_ranking = [
+        chunk_id for chunk_id, _ in search_chunks_fulltext(video_id, query, limit=depth)
+        if chunk_id < len(similarities)
+    ]
+    if not lexical_ranking:
+        return vector_ranking[:top_k]
+    return reciprocal_rank_fusion([vector_ranking, lexical_ranking])[:top_k]
 
 
 def semantic_search(
     query: str,
-    vectors: List[List[float]],
+    vectors: Union[List[List[float]], np.ndarray],
     chunks: List[str],
-    top_k: int = 5
+    top_k: int = 5,
+    video_id: Optional[str] = None
 ) -> List[str]:
     """
     Perform semantic search to find the most similar chunks to a query.
     
     Args:
         query: The search query string
-        vectors: List of embedding vectors (each vector is a list of floats)
+        vectors: Embedding vectors as a list of lists or a (num_chunks, dim) array
         chunks: List of text chunks corresponding to the vectors
         top_k: Number of top similar chunks to return (default: 3)
+        video_id: Stored video the chunks belong to; when given, the vector
+            ranking is fused with a full-text (BM25) ranking
     
     Returns:
         List of the top_k most similar chunks
     """
-    if not vectors or not chunks:
+    if vectors is None or len(vectors) == 0 or not chunks:
         return []
     
     if len(vectors) != len(chunks):
         raise ValueError("Number of vectors must match number of chunks")
     
     # Generate embedding for the query
-    query_embedding = create_single_embedding(query)
+    query_vector = _normalized_queries([create_single_embedding(query)])[0]
     
     # Calculate cosine similarity between query and all chunks
-    similarities = cosine_similarity([query_embedding], vectors)[0]
+    matrix = normalize_rows(np.asarray(vectors, dtype=np.float32))
+    similarities = matrix @ query_vector
     
-    # Get indices of top_k most similar chunks
-    top_indices = np.argsort(similarities)[-top_k:][::-1]
+    # Get indices of top_k most relevant chunks
+    top_indices = _fuse_with_fulltext(query, video_id, similarities, top_k)
     
     # Return the corresponding chunks
     return [chunks[i] for i in top_indices]
+
+
+def search_video_index(
+    query: str,
+    index: VideoIndex,
+    top_k: int = 5,
+    hybrid: bool = True
+) -> List[str]:
+    """
+    Perform semantic search against a cached, pre-normalized video index.
+    
+    Args:
+        query: The search query string
+        index: VideoIndex holding the normalized matrix and chunks
+        top_k: Number of top similar chunks to return (default: 5)
+        hybrid: Fuse the vector ranking with the video's full-text (BM25) ranking
+    
+    Returns:
+        List of the top_k most similar chunks
+    """
+    matrix, chunks = index.snapshot()
+    if len(chunks) == 0:
+        return []
+    
+    query_vector = _normalized_queries([create_single_embedding(query)])[0]
+    
+    # Rows are unit length, so the dot product is the cosine similarity
+    similarities = matrix @ query_vector
+    top_indices = _fuse_with_fulltext(query, index.video_id if hybrid else None, similarities, top_k)
+    
+    return [chunks[i] for i in top_indices]
+
+
+def search_video_index_batch(
+    queries: Sequence[str],
+    index: VideoIndex,
+    top_k: int = 5
+) -> List[List[Tuple[str, float]]]:
+    """
+    Search several queries against one video index in a single round trip.
+    
+    All queries are embedded in one request and scored with one matrix
+    multiply; only the top_k of each row are sorted.
+    
+    Args:
+        queries: Search query strings
+        index: VideoIndex holding the normalized matrix and chunks
+        top_k: Number of chunks to return per query (default: 5)
+    
+    Returns:
+        For each query, a list of (chunk, cosine similarity), best first
+    """
+    matrix, chunks = index.snapshot()
+    if not queries:
+        return []
+    if len(chunks) == 0:
+        return [[] for _ in queries]
+    
+    query_matrix = _normalized_queries(create_query_embeddings(list(queries)))
+    similarities = query_matrix @ matrix.T
+    top_indices = top_k_indices(similarities, top_k)
+    
+    return [
+        [(chunks[i], float(similarities[row, i])) for i in indices]
+        for row, indices in enumerate(top_indices)
+    ]
+
+
+def semantic_search_batch(
+    queries: Sequence[str],
+    vectors: Union[List[List[float]], np.ndarray],
+    chunks: List[str],
+    top_k: int = 5
+) -> List[List[Tuple[str, float]]]:
+    """
+    Batch version of semantic_search for raw vectors; see search_video_index_batch.
+    
+    Returns:
+        For each query, a list of (chunk, cosine similarity), best first
+    """
+    if vectors is None or len(vectors) == 0 or not chunks:
+        return [[] for _ in queries]
+    return search_video_index_batch(queries, build_video_index("", vectors, chunks), top_k)
+
+
+def merge_query_results(results: Sequence[Sequence[Tuple[str, float]]], limit: int) -> List[str]:
+    """
+    Interleave per-query results (best of each query first), dropping duplicates.
+    
+    Keeps every question of a multi-question turn represented in the answer context.
+    """
+    merged = []
+    for rank in range(max((len(r) for r in results), default=0)):
+        for query_results in results:
+            if rank < len(query_results) and query_results[rank][0] not in merged:
+                merged.append(query_results[rank][0])
+    return merged[:limit]
+
+
+def _normalized_queries(embeddings) -> np.ndarray:
+    """Stack query embeddings into a row-normalized float32 matrix."""
+    return normalize_rows(np.asarray(embeddings, dtype=np.float32)).astype(np.float32, copy=False)
+
+
+def retrieve_sections(
+    query: str,
+    video_id: Optional[str] = None,
+    vectors: Optional[Union[List[List[float]], np.ndarray]] = None,
+    chunks: Optional[List[str]] = None,
+    additional_queries: Sequence[str] = (),
+    lexical_fast_path: bool = True
+) -> Tuple[List[str], Optional[VideoIndex]]:
+    """
+    Find the sections of one video that answer a query, using the cheapest path available.
+    
+    Keyword-style queries are answered from the full-text index with no network
+    call. Otherwise the shared pre-normalized index is searched (it may still be
+    growing during streaming ingestion), falling back to the given vectors and
+    chunks. Additional queries are searched in one batch with the query.
+    
+    Args:
+        query: The search query string
+        video_id: Stored video to search
+        vectors: Fallback embedding vectors when the video is not stored
+        chunks: Fallback text chunks corresponding to vectors
+        additional_queries: Other questions or phrasings to search together
+        lexical_fast_path: Allow answering keyword queries from the full-text index
+    
+    Returns:
+        (sections, index); index is the VideoIndex searched, if any
+    """
+    if video_id and not additional_queries and lexical_fast_path and is_keyword_query(query):
+        sections = lexical_search(query, video_id)
+        if sections:
+            return sections, None
+    
+    index = load_video_index(video_id) if video_id else None
+    
+    if additional_queries:
+        # All queries share one embedding request and one matrix multiply
+        queries = [query] + list(additional_queries)
+        if index is not None:
+            batch_results = search_video_index_batch(queries, index)
+        else:
+            batch_results = semantic_search_batch(queries, vectors, chunks)
+        return merge_query_results(batch_results, MAX_MULTI_QUERY_RESULTS), index
+    
+    if index is not None:
+        return search_video_index(query, index), index
+    return semantic_search(query, vectors, chunks, video_id=video_id), None
+
+
+def search_library(
+    query: str,
+    top_k: int = 5,
+    video_ids: Optional[Sequence[str]] = None
+) -> List[Dict]:
+    """
+    Search the chunks of every stored video through the library ANN index.
+    
+    Args:
+        query: The search query string
+        top_k: Number of chunks to return (default: 5)
+        video_ids: Optional YouTube video IDs to restrict the search to
+    
+    Returns:
+        List of dicts with: video_id, url, chunk_id, score, text; best match first
+    """
+    index = load_library_index()
+    if index is None or len(index) == 0:
+        return []
+    
+    hits = index.search(create_single_embedding(query), top_k=top_k, video_ids=video_ids)
+    
+    # Fetch only the matched chunk texts, one query per video
+    texts = {}
+    for video_id in {video_id for video_id, _, _ in hits}:
+        chunk_ids = [chunk_id for hit_video, chunk_id, _ in hits if hit_video == video_id]
+        chunks = load_video_chunks(video_id, chunk_ids) or []
+        if len(chunks) == len(chunk_ids):
+            texts.update(((video_id, chunk_id), text) for chunk_id, text in zip(chunk_ids, chunks))
+    
+    return [
+        {
+            "video_id": video_id,
+            "url": f"https://www.youtube.com/watch?v={video_id}",
+            "chunk_id": chunk_id,
+            "score": round(score, 4),
+            "text": texts.get((video_id, chunk_id), ""),
+        }
+        for video_id, chunk_id, score in hits
+    ]
@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+from langgraph.config import get_config
+from .embedding_cache import normalize_query_text
+from .metrics import count
+from .rag_search import retrieve_sections
+
+
+# Share of the tool query's words that must appear in the prefetched question
+MIN_QUERY_OVERLAP = 0.6
+# One per concurrently answered turn (SERVER_MAX_CONCURRENT_TURNS), so sessions don't queue behind each other
+PREFETCH_WORKERS = 8
+# Prefetches nobody claimed are dropped after this long
+PREFETCH_TTL_SECONDS = 120.0
+
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+# (session id, video id) -> (question, future, started at)
+_prefetches: Dict[Tuple[str, str], Tuple[str, Future, float]] = {}
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def current_session_id() -> str:
+    """Return the thread id (session) of the graph run calling this, or "" outside a graph run."""
+    try:
+        return str(get_config().get("configurable", {}).get("thread_id") or "")
+    except RuntimeError:
+        return ""
+
+
+def query_overlap(query: str, question: str) -> float:
+    """Fraction of the words in query that also occur in question."""
+    query_words = set(normalize_query_text(query).split())
+    question_words = set(normalize_query_text(question).split())
+    if not query_words:
+        return 0.0
+    return len(query_words & question_words) / len(query_words)
+
+
+def _expire_prefetches() -> None:
+    """Drop prefetches older than PREFETCH_TTL_SECONDS; call with _lock held."""
+    cutoff = time.monotonic() - PREFETCH_TTL_SECONDS
+    for key in [key for key, entry in _prefetches.items() if entry[2] < cutoff]:
+        _prefetches.pop(key)[1].cancel()
+
+
+def start_prefetch(session_id: str, video_id: str, question: str, vectors=None, chunks=None, **kwargs) -> Future:
+    """
+    Start retrieving sections for a user's question in the background.
+
+    Only the latest prefetch per session and video is kept. A prefetch for the
+    same question is reused only while it is still running; a finished one is
+    redone, as a streaming video may have grown since. Extra keyword arguments
+    are passed to retrieve_sections.
+
+    Returns:
+        Future resolving to retrieve_sections' (sections, index)
+    """
+    key = (session_id, video_id)
+    with _lock:
+        _expire_prefetches()
+        entry = _prefetches.get(key)
+        if entry is not None and entry[0] == question and not entry[1].done():
+            return entry[1]
+        if entry is not None:
+            entry[1].cancel()
+        future = _executor.submit(retrieve_sections, question, video_id, vectors, chunks, **kwargs)
+        _prefetches[key] = (question, future, time.monotonic())
+        return future
+
+
+def prefetch_result(future: Future, timeout: Optional[float]) -> Optional[Tuple[List[str], object]]:
+    """Return a prefetch's (sections, index) if it finishes within timeout, else None."""
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        return None
+    except Exception as e:
+        count("prefetch_errors_total")
+        logger.warning("Prefetch failed: %s", e)
+        return None
+
+
+def take_prefetched(
+    session_id: str,
+    video_id: str,
+    query: str,
+    timeout: Optional[float] = None
+) -> Optional[Tuple[List[str], object]]:
+    """
+    Claim the session's prefetched sections for a video if they were retrieved for a similar query.
+
+    Waits up to timeout for a running prefetch (it is the same work a fresh
+    search would do); one still queued is cancelled instead.
+
+    Returns:
+        (sections, index), or None when there is no matching prefetch or it
+        did not finish in time
+    """
+    with _lock:
+        _expire_prefetches()
+        entry = _prefetches.get((session_id, video_id))
+        if entry is None or query_overlap(query, entry[0]) < MIN_QUERY_OVERLAP:
+            return None
+        del _prefetches[(session_id, video_id)]
+    if entry[1].cancel():
+        return None
+    return prefetch_result(entry[1], timeout)
+
+
+def discard_prefetch(session_id: str, video_id: str) -> None:
+    """Drop a session's prefetch for a video, e.g. when its turn ended without searching."""
+    with _lock:
+        entry = _prefetches.pop((session_id, video_id), None)
+    if entry is not None:
+        entry[1].cancel()
@@ -1,41 +1,320 @@
-import requests
+import io
+import logging
 import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from dotenv import load_dotenv
+from config import settings
+from .clients import clients
+from .audio_segmenter import probe_duration, detect_silences, plan_segments, cut_segment
+from .embedding_scheduler import is_retryable_error, retry_delay
+from .metrics import count, timed
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-def audio_to_text(audio_bytes: bytes) -> str:
+
+# Azure Whisper endpoint
+WHISPER_ENDPOINT = os.getenv(
+    "OPENAI_AZURE_WHISPER_ENDPOINT",
+    "https://grow-me82mm7z-eastus2.cognitiveservices.azure.com/openai/deployments/whisper/audio/translations?api-version=2024-06-01"
+)
+
+# Audio longer than SEGMENT_SECONDS is transcribed in concurrent segments; so is
+# audio larger than this, whatever its length (see the WHISPER_* settings)
+SEGMENT_THRESHOLD_BYTES = int(settings.WHISPER_SEGMENT_THRESHOLD_MB * 1024 * 1024)
+SEGMENT_SECONDS = settings.WHISPER_SEGMENT_SECONDS
+SEGMENT_OVERLAP_SECONDS = settings.WHISPER_SEGMENT_OVERLAP_SECONDS
+MAX_WORKERS = settings.WHISPER_MAX_WORKERS
+MAX_RETRIES = settings.WHISPER_MAX_RETRIES
+
+CONTENT_TYPES = {".mp3": "audio/mpeg", ".m4a": "audio/mp4", ".ogg": "audio/ogg", ".opus": "audio/ogg", ".wav": "audio/wav"}
+
+# Raw bytes, a path on disk, or a seekable binary file object
+AudioSource = Union[bytes, str, os.PathLike, BinaryIO]
+
+
+def audio_to_text(audio: AudioSource, segmented: Optional[bool] = None) -> str:
     """
-    Converts audio bytes to text using Azure Whisper API.
+    Converts audio to text using Azure Whisper API.
+    
+    Paths and file objects are streamed to the API from disk rather than read
+    into memory.
     
     Args:
-        audio_bytes: Audio data in bytes format
+        audio: Audio as bytes, a file path, or a binary file object
+        segmented: Split the audio and transcribe segments concurrently.
+            None (default) segments audio longer than WHISPER_SEGMENT_SECONDS
+            or larger than WHISPER_SEGMENT_THRESHOLD_MB.
         
     Returns:
         Transcribed text from the audio
     """
+    if segmented is None:
+        segmented = _audio_size(audio) > SEGMENT_THRESHOLD_BYTES or _audio_duration(audio) > SEGMENT_SECONDS
+    
+    if segmented:
+        return stitch_segments(transcribe_segments(audio))
+    
+    return _transcribe_with_retry(audio)["text"]
+
+
+def iter_transcribed_segments(
+    audio: AudioSource,
+    segment_seconds: float = SEGMENT_SECONDS,
+    overlap_seconds: float = SEGMENT_OVERLAP_SECONDS,
+    max_workers: int = MAX_WORKERS
+) -> Iterator[Dict]:
+    """
+    Split audio at silences near fixed windows and transcribe the pieces concurrently.
+    
+    Segments are yielded in order as soon as each one (and every one before it)
+    has been transcribed, so callers can start working on the beginning of the
+    audio while the rest is still uploading.
+    
+    Args:
+        audio: Audio as a file path (preferred), bytes, or a binary file object
+        segment_seconds: Target segment length
+        overlap_seconds: Audio shared by neighbouring segments
+        max_workers: Concurrent Whisper uploads
+        
+    Yields:
+        Dicts with start, end (seconds into the full audio), text, sentences
+        (list of {start, end, text} with absolute times), and the neighbouring
+        segments' boundaries prev_end / next_start used for stitching
+    """
+    work_dir = tempfile.mkdtemp(prefix="whisper_segments_")
+    try:
+        source_path = _as_path(audio, work_dir)
+        extension = os.path.splitext(source_path)[1] or ".mp3"
+        
+        duration = probe_duration(source_path)
+        silences = detect_silences(source_path) if duration > segment_seconds else []
+        windows = plan_segments(duration, segment_seconds, overlap_seconds, silences)
+        print(f"   Transcribing {len(windows)} segment(s) of {duration / 60:.1f} min audio")
+        
+        def transcribe_window(i: int) -> Dict:
+            start, end = windows[i]
+            segment_path = cut_segment(source_path, start, end, os.path.join(work_dir, f"segment_{i:04d}{extension}"))
+            try:
+                result = _transcribe_with_retry(segment_path, verbose=True)
+            finally:
+                os.unlink(segment_path)
+            sentences = [
+                {"start": start + s["start"], "end": start + s["end"], "text": s["text"].strip()}
+                for s in result.get("segments") or []
+            ] or [{"start": start, "end": end, "text": result["text"].strip()}]
+            return {
+                "start": start,
+                "end": end,
+                "text": result["text"].strip(),
+                "sentences": sentences,
+                "prev_end": windows[i - 1][1] if i > 0 else None,
+                "next_start": windows[i + 1][0] if i + 1 < len(windows) else None,
+            }
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(windows)))) as executor:
+            futures = [executor.submit(transcribe_window, i) for i in range(len(windows))]
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def transcribe_segments(audio: AudioSource, **kwargs) -> List[Dict]:
+    """Transcribe all segments; see iter_transcribed_segments for arguments."""
+    return list(iter_transcribed_segments(audio, **kwargs))
+
+
+def iter_stitched_segments(segments: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Remove speech repeated in the overlaps, one segment at a time.
+    
+    Sentences are split between neighbours at the middle of their shared audio;
+    any words still duplicated across the seam are dropped from the later segment.
+    
+    Yields:
+        Dicts with start, end and the de-duplicated text of each segment
+    """
+    previous_text = ""
+    for segment in segments:
+        keep_from = (segment["start"] + segment["prev_end"]) / 2 if segment.get("prev_end") is not None else float("-inf")
+        keep_until = (segment["next_start"] + segment["end"]) / 2 if segment.get("next_start") is not None else float("inf")
+        text = " ".join(
+            s["text"] for s in segment["sentences"]
+            if keep_from <= s["start"] < keep_until and s["text"]
+        )
+        if previous_text and text:
+            text = _drop_repeated_prefix(previous_text, text)
+        if text:
+            previous_text = text
+        yield {"start": segment["start"], "end": segment["end"], "text": text}
+
+
+def stitch_segments(segments: List[Dict]) -> str:
+    """Join segment transcripts into one text without the overlapping speech."""
+    return " ".join(s["text"] for s in iter_stitched_segments(segments) if s["text"])
+
+
+def _drop_repeated_prefix(previous: str, text: str, max_words: int = 30) -> str:
+    """Remove the longest run of words that ends `previous` and also starts `text`."""
+    def normalize(word: str) -> str:
+        return re.sub(r"[^\w']", "", word.lower())
+    
+    tail = [normalize(w) for w in previous.split()[-max_words:]]
+    words = text.split()
+    head = [normalize(w) for w in words[:max_words]]
     
-    # Azure Whisper endpoint
-    endpoint = "https://grow-me82mm7z-eastus2.cognitiveservices.azure.com/openai/deployments/whisper/audio/translations?api-version=2024-06-01"
+    for size in range(min(len(tail), len(head)), 1, -1):
+        if tail[-size:] == head[:size]:
+            return " ".join(words[size:])
+    return text
+
+
+def _transcribe_with_retry(audio: AudioSource, verbose: bool = False) -> Dict:
+    attempt = 0
+    while True:
+        try:
+            return _transcribe(audio, verbose)
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not is_retryable_error(e) or not _is_rewindable(audio):
+                raise
+            delay = retry_delay(e, attempt)
+            count("whisper_retries_total")
+            logger.warning("Transcription failed (%s); retrying in %.1fs", e, delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+def _transcribe(audio: AudioSource, verbose: bool = False) -> Dict:
+    """Upload one audio file to Whisper and return the parsed JSON response."""
     
     # Get API key from environment
     api_key = os.getenv("OPENAI_AZURE_API_KEY")
     
-    # Set headers
-    headers = {
-        "api-key": api_key,
-    }
+    # verbose_json adds per-sentence timestamps
+    fields = {"response_format": "verbose_json"} if verbose else {}
     
-    # Prepare the file data
-    files = {
-        "file": ("audio.mp3", audio_bytes, "audio/mpeg")
-    }
-    
-    # Make the request
-    response = requests.post(endpoint, headers=headers, files=files)
+    with _open_audio(audio) as (fileobj, size, filename):
+        content_type = CONTENT_TYPES.get(os.path.splitext(filename)[1].lower(), "audio/mpeg")
+        body = _MultipartBody(fileobj, size, filename, content_type, fields)
+        
+        # Set headers
+        headers = {
+            "api-key": api_key,
+            "Content-Type": body.content_type,
+        }
+        
+        # Make the request over the shared keep-alive session; the body is read
+        # from disk in blocks as it is sent
+        session = clients.http_session()
+        with timed("whisper_request_seconds"):
+            response = session.post(WHISPER_ENDPOINT, headers=headers, data=body, timeout=clients.request_timeout)
+        count("whisper_upload_bytes_total", len(body))
     response.raise_for_status()
     
-    # Extract and return the transcribed text
+    # Extract the transcribed text
     result = response.json()
-    return result.get("text", "")
+    result["text"] = result.get("text", "")
+    return result
+
+
+class _MultipartBody:
+    """Read-only file object producing a multipart/form-data body around a streamed file."""
+    
+    def __init__(self, fileobj: BinaryIO, size: int, filename: str, content_type: str, fields: Dict[str, str]):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        
+        head = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        
+        self._parts = [io.BytesIO(head), fileobj, io.BytesIO(tail)]
+        self._length = len(head) + size + len(tail)
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def read(self, size: int = -1) -> bytes:
+        data = b""
+        while self._parts and (size < 0 or len(data) < size):
+            block = self._parts[0].read(-1 if size < 0 else size - len(data))
+            if not block:
+                self._parts.pop(0)
+                continue
+            data += block
+        return data
+
+
+@contextmanager
+def _open_audio(audio: AudioSource) -> Iterator[Tuple[BinaryIO, int, str]]:
+    """Yield (file object positioned at the start, size in bytes, upload filename)."""
+    if isinstance(audio, (bytes, bytearray)):
+        yield io.BytesIO(audio), len(audio), "audio.mp3"
+    elif isinstance(audio, (str, os.PathLike)):
+        with open(audio, "rb") as f:
+            yield f, os.path.getsize(audio), os.path.basename(audio)
+    else:
+        audio.seek(0)
+        yield audio, _audio_size(audio), os.path.basename(getattr(audio, "name", "audio.mp3") or "audio.mp3")
+
+
+def _audio_size(audio: AudioSource) -> int:
+    if isinstance(audio, (bytes, bytearray)):
+        return len(audio)
+    if isinstance(audio, (str, os.PathLike)):
+        return os.path.getsize(audio)
+    position = audio.tell()
+    size = audio.seek(0, os.SEEK_END)
+    audio.seek(position)
+    return size
+
+
+def _audio_duration(audio: AudioSource) -> float:
+    """Length of the audio in seconds; 0 if ffprobe can't tell (it is then sent in one piece)."""
+    work_dir = tempfile.mkdtemp(prefix="whisper_probe_")
+    try:
+        return probe_duration(_as_path(audio, work_dir))
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        print(f"   Could not measure audio length ({e}); transcribing it in one piece")
+        return 0.0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _is_rewindable(audio: AudioSource) -> bool:
+    return not hasattr(audio, "read") or audio.seekable()
+
+
+def _as_path(audio: AudioSource, work_dir: str) -> str:
+    """Return a path ffmpeg can read, copying bytes or file objects into work_dir if needed."""
+    if isinstance(audio, (str, os.PathLike)):
+        return os.fspath(audio)
+    
+    source_path = os.path.join(work_dir, "source.mp3")
+    with open(source_path, "wb") as f:
+        if isinstance(audio, (bytes, bytearray)):
+            f.write(audio)
+        else:
+            audio.seek(0)
+            shutil.copyfileobj(audio, f)
+    return source_path
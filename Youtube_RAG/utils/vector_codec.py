@@ -0,0 +1,98 @@
+import struct
+from typing import List, Tuple, Union
+import numpy as np
+
+
+# Header layout (little-endian):
+#   magic   4s  b"YRV1"
+#   flags   B   bit 0 set when rows are L2-normalized
+#   pad     3x
+#   dim     I   vector dimension
+#   count   I   number of vectors
+VECTOR_MAGIC = b"YRV1"
+FLAG_NORMALIZED = 0x01
+_HEADER = struct.Struct("<4sB3xII")
+HEADER_SIZE = _HEADER.size
+_DTYPE = np.dtype("<f4")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row of a matrix, leaving all-zero rows untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def encode_vectors(
+    vectors: Union[List[List[float]], np.ndarray],
+    normalize: bool = False
+) -> bytes:
+    """
+    Pack embedding vectors into a contiguous little-endian float32 blob.
+
+    Args:
+        vectors: List of embedding vectors or a 2-D array
+        normalize: L2-normalize each vector before packing
+
+    Returns:
+        Header followed by count * dim float32 values
+    """
+    matrix = np.asarray(vectors, dtype=_DTYPE)
+    if matrix.size == 0:
+        matrix = matrix.reshape(0, 0)
+    if matrix.ndim != 2:
+        raise ValueError("Vectors must be a 2-D sequence")
+
+    flags = 0
+    if normalize and matrix.shape[0]:
+        matrix = normalize_rows(matrix).astype(_DTYPE, copy=False)
+        flags |= FLAG_NORMALIZED
+
+    count, dim = matrix.shape
+    header = _HEADER.pack(VECTOR_MAGIC, flags, dim, count)
+    return header + np.ascontiguousarray(matrix).tobytes()
+
+
+def decode_vectors(blob: bytes) -> np.ndarray:
+    """
+    Unpack a blob produced by encode_vectors into a (count, dim) float32 array.
+
+    Args:
+        blob: Encoded vector bytes
+
+    Returns:
+        Read-only array backed by a single copy of the blob payload
+    """
+    magic, _flags, dim, count = _HEADER.unpack_from(blob)
+    if magic != VECTOR_MAGIC:
+        raise ValueError("Not an encoded vector blob")
+
+    expected = HEADER_SIZE + count * dim * _DTYPE.itemsize
+    if len(blob) != expected:
+        raise ValueError(f"Corrupt vector blob: expected {expected} bytes, got {len(blob)}")
+
+    return np.frombuffer(blob, dtype=_DTYPE, count=count * dim, offset=HEADER_SIZE).reshape(count, dim)
+
+
+def read_header(blob: bytes) -> Tuple[bool, int, int]:
+    """
+    Parse just the header of an encoded blob.
+
+    Returns:
+        (normalized, dim, count)
+    """
+    magic, flags, dim, count = _HEADER.unpack_from(blob)
+    if magic != VECTOR_MAGIC:
+        raise ValueError("Not an encoded vector blob")
+    return bool(flags & FLAG_NORMALIZED), dim, count
+
+
+def is_normalized(blob: bytes) -> bool:
+    """Check the header flag that marks pre-normalized vectors."""
+    _magic, flags, _dim, _count = _HEADER.unpack_from(blob)
+    return bool(flags & FLAG_NORMALIZED)
+
+
+def is_encoded(value) -> bool:
+    """Check whether a stored column value is an encoded vector blob."""
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:4]) == VECTOR_MAGIC